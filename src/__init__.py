@@ -1,3 +1,11 @@
-from .main import main
+__all__ = ['main']
 
-__all__ = ['main']
\ No newline at end of file
+
+def __getattr__(name):
+    # Import the GUI entry point on first use so headless tools such as
+    # ``python -m src.render`` don't pull in customtkinter
+    if name == 'main':
+        from .main import main as gui_main
+        globals()['main'] = gui_main
+        return gui_main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,12 +8,14 @@ from services.speech_service import SpeechService
 from tkinter import messagebox
 import logging
 from utils.file_utils import read_audio_prompt
+from utils.tk_dispatcher import TkDispatcher
 
 class AudioGeneratorController:
     def __init__(self, model: AudioGeneratorModel, view, config):
         self.model = model
         self.view = view
         self.config = config
+        self.dispatcher = TkDispatcher.get_instance()
         self.timeline_controller = None 
         self.add_to_timeline_callback = None
         self.add_to_new_audio_files_callback = None
@@ -34,6 +36,7 @@ class AudioGeneratorController:
         self.music_service = MusicService(self.config, self.update_status)
         self.sfx_service = SFXService(self.config, self.update_status)
         self.speech_service = SpeechService(self.config, self.update_status)
+        self.speech_service.voice_catalog.add_listener(self.on_voice_catalog_changed)
 
     def setup_view_commands(self):
         self.view.set_generate_command(self.process_input)
@@ -114,13 +117,18 @@ class AudioGeneratorController:
                 return result
             else:
                 def process_thread():
-                    result = service_method(*args)
+                    try:
+                        result = service_method(*args)
+                    except Exception as e:
+                        # Services only raise for rate limits, which a manual request does not retry
+                        logging.error(f"Error generating audio: {str(e)}")
+                        result = None
                     if result:
-                        self.view.after(0, lambda: self.handle_successful_generation(result))
+                        self.dispatcher.post(lambda: self.handle_successful_generation(result))
                     else:
-                        self.view.after(0, lambda: self.view.update_output("Error: An error occurred during audio generation."))
-                    self.view.after(0, lambda: self.view.generate_button.configure(state="normal"))
-                    self.view.after(0, self.view.hide_progress_bar)
+                        self.dispatcher.post(lambda: self.view.update_output("Error: An error occurred during audio generation."))
+                    self.dispatcher.post(lambda: self.view.generate_button.configure(state="normal"))
+                    self.dispatcher.post(self.view.hide_progress_bar)
 
                 threading.Thread(target=process_thread, daemon=True).start()
                 return None
@@ -168,9 +176,10 @@ class AudioGeneratorController:
                 self.view.update_status("Error: Please enter some text")
                 return None
 
+            # Manual generation always asks the provider for a fresh take instead of the generation cache
             return self._process_request(
-                self.speech_service.text_to_speech_file,
-                [text_prompt, voice_id],
+                self.speech_service.process_speech_request,
+                [text_prompt, voice_id, False],
                 synchronous=False
             )
 
@@ -249,7 +258,7 @@ class AudioGeneratorController:
         text_prompt = self.view.user_input.get("1.0", "end-1c").strip()
         duration = self.view.duration_var.get()
         return self._process_request(self.sfx_service.process_sfx_request, 
-                                     [text_prompt, duration],
+                                     [text_prompt, duration, False],  # bypass the generation cache
                                      synchronous)
 
     def process_music_request(self, text_prompt=None, make_instrumental=None, synchronous=False):
@@ -257,14 +266,21 @@ class AudioGeneratorController:
             text_prompt = self.view.user_input.get("1.0", "end-1c").strip()
         if make_instrumental is None:
             make_instrumental = self.view.instrumental_var.get()
-        
+        # An explicit request from the user retries a server that gave up after failed starts
+        self.music_service.reset_api_server()
+
         return self._process_request(self.music_service.process_music_request, 
-                                [text_prompt, make_instrumental],
+                                [text_prompt, make_instrumental, False],  # bypass the generation cache
                                 synchronous)
         
     def handle_successful_generation(self, result):
         self.view.update_output(f"Audio generated successfully. File saved to: {result}")
         self.view.update_status("Ready")
+        if self.timeline_controller:
+            try:
+                self.timeline_controller.project_model.media_index.record(result)
+            except Exception as e:
+                logging.error(f"Error indexing generated audio: {str(e)}")
         self.view.audio_file_selector.refresh_files(self.view.current_module.get().lower())
         self.model.load_audio(result)
         self.view.audio_visualizer.update_waveform(result)
@@ -288,7 +304,7 @@ class AudioGeneratorController:
     
     def on_playback_finished(self):
         """Handle playback finished event."""
-        self.view.after(0, self.view.on_playback_finished)
+        self.dispatcher.post(self.view.on_playback_finished)
 
     def _update_ui_after_playback(self):
         self.model.seek(0)  # Reset the seek position to the start
@@ -325,6 +341,14 @@ class AudioGeneratorController:
             self.view.audio_visualizer.update_playhead(current_time)
             self.playhead_update_id = self.view.after(50, self.update_playhead)  # Update every 50ms
 
+    def get_audio_prompt(self, file_path):
+        if self.timeline_controller:
+            try:
+                return self.timeline_controller.project_model.media_index.get_prompt(file_path)
+            except Exception as e:
+                logging.error(f"Error reading prompt from media index: {str(e)}")
+        return read_audio_prompt(file_path)
+
     def on_audio_file_select(self, file_path):
         if file_path and os.path.exists(file_path):
             self.model.load_audio(file_path)
@@ -335,7 +359,7 @@ class AudioGeneratorController:
             self.view.add_to_reaper_button.configure(state="normal")
             
             # Display the prompt used to generate the audio
-            prompt = read_audio_prompt(file_path)
+            prompt = self.get_audio_prompt(file_path)
             if prompt:
                 self.view.update_output(f"Prompt used: {prompt}")
             else:
@@ -354,6 +378,11 @@ class AudioGeneratorController:
         voices = self.speech_service.get_user_voices()
         self.view.update_voice_dropdown(voices)
 
+    def on_voice_catalog_changed(self, source):
+        # Called from the catalog's refresh thread
+        if source == 'user':
+            self.dispatcher.post(self.load_voices)
+
     def add_audio_to_timeline(self):
         selected_file = self.view.audio_file_selector.get_selected_file()
         if selected_file and self.add_to_timeline_callback:
@@ -382,6 +411,7 @@ class AudioGeneratorController:
 
     def quit(self):
         self.model.quit()
+        self.music_service.shutdown()
 
     def delete_audio_file(self, file_path):
         try:
@@ -7,6 +7,7 @@ import os
 import logging
 import webbrowser
 from datetime import datetime
+from utils.tk_dispatcher import TkDispatcher
 
 class MainController:
     def __init__(self, model, view, config, project_model):
@@ -18,9 +19,12 @@ class MainController:
         self.script_editor_controller = None
         self.timeline_controller = None
 
+        # Background threads hand their results to the Tk thread through this
+        TkDispatcher.get_instance().attach(self.view)
         self.setup_controllers()
         self.setup_callbacks()
         self.load_default_project()
+        self.schedule_autosave()
 
     def setup_controllers(self):
         audio_model = self.model.get_audio_model()
@@ -71,6 +75,7 @@ class MainController:
     def load_default_project(self):
         try:
             self.project_model.ensure_default_project()
+            self.check_recovery_data()
             self.update_current_project(self.project_model.current_project)
             self.update_output_directories()
             if self.timeline_controller:
@@ -82,6 +87,28 @@ class MainController:
             self.view.update_status(error_message)
             self.view.show_error("Error", error_message)
 
+    def check_recovery_data(self):
+        """Offer to restore timeline edits autosaved by a session that ended without saving"""
+        if not self.project_model.has_recovery_data():
+            return
+        if messagebox.askyesno("Recover Unsaved Changes",
+                               "This project has unsaved timeline changes from a previous session. Restore them?"):
+            self.project_model.restore_recovery_data()
+        else:
+            self.project_model.discard_recovery_data()
+
+    def schedule_autosave(self):
+        interval = self.config.get('settings', {}).get('autosave_interval_seconds', 60)
+        if interval > 0:
+            self.view.after(int(interval * 1000), self.autosave)
+
+    def autosave(self):
+        try:
+            self.project_model.autosave()
+        except Exception as e:
+            logging.error(f"Error during autosave: {str(e)}")
+        self.schedule_autosave()
+
     def load_last_opened_script(self):
         last_script = self.project_model.get_last_opened_script()
         if last_script:
@@ -113,8 +140,17 @@ class MainController:
         else:
             self.view.update_status("Project creation cancelled.")
         
-    def save_project(self):
-        success, message = self.project_model.save_project()
+    def save_project(self, wait=False):
+        """Save in the background; ``wait`` blocks until the files are on disk (quit and close)"""
+        if wait:
+            self.on_project_save_finished(*self.project_model.save_project())
+            return
+        self.view.update_status("Saving project...")
+        dispatcher = TkDispatcher.get_instance()
+        self.project_model.save_project(
+            on_complete=lambda success, message: dispatcher.post(self.on_project_save_finished, success, message))
+
+    def on_project_save_finished(self, success, message):
         if success:
             if self.timeline_controller:
                 self.timeline_controller.on_project_saved()
@@ -129,6 +165,7 @@ class MainController:
             if self.timeline_controller:
                 self.timeline_controller.hide()  # Hide the timeline view before changing projects
             self.project_model.load_project(project_name)
+            self.check_recovery_data()
             self.update_current_project(project_name)
             self.update_output_directories()
             self.clear_input_fields()
@@ -241,6 +278,8 @@ class MainController:
     def quit(self):
         if self.audio_controller:
             self.audio_controller.quit()
+        self.project_model.close()
+        TkDispatcher.get_instance().detach()
         self.view.quit()
 
     def on_close(self):
@@ -249,9 +288,12 @@ class MainController:
             if response is None:  # Cancel
                 return
             elif response:  # Yes
-                self.save_project()
+                self.save_project(wait=True)
             else:  # No
                 self.timeline_controller.discard_unsaved_changes()
+        if self.audio_controller:
+            self.audio_controller.quit()
+        self.project_model.close()
         self.view.quit()
 
     def edit_delete_project(self):
@@ -1,14 +1,14 @@
 import os
 import logging
 import threading
-import time
 import json
 import random 
 import hashlib
-import requests
 from tkinter import filedialog, messagebox
 from services.pdf_analysis_service import PDFAnalysisService
 from utils.audio_clip import AudioClip
+from utils.generation_scheduler import GenerationScheduler
+from utils.tk_dispatcher import TkDispatcher
 
 class ScriptEditorController:
     def __init__(self, model, view, config, project_model, audio_controller, timeline_controller):
@@ -18,6 +18,7 @@ class ScriptEditorController:
         self.project_model = project_model
         self.audio_controller = audio_controller
         self.timeline_controller = timeline_controller
+        self.dispatcher = TkDispatcher.get_instance()
         self.view.set_create_audio_callback(self.create_audio)
         self.current_script_path = None
         self.setup_view_commands()
@@ -57,54 +58,31 @@ class ScriptEditorController:
         font_family = self.view.font_family_var.get()
         font_size = self.view.font_size_var.get()
         
-        try:
-            project_dir = self.project_model.get_project_dir()
-            metadata_file = os.path.join(project_dir, "project_metadata.json")
-            
-            # Load existing metadata
-            if os.path.exists(metadata_file):
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-            else:
-                metadata = {}
-            
-            # Update font preferences
-            if 'script_editor' not in metadata:
-                metadata['script_editor'] = {}
-            metadata['script_editor']['font_family'] = font_family
-            metadata['script_editor']['font_size'] = font_size
-            
-            # Save updated metadata
-            with open(metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2)
-            
-            self.view.update_status(f"Font preferences saved: Family={font_family}, Size={font_size}")
-        except ValueError:
+        if not self.project_model.current_project:
             self.view.update_status("No active project. Font preferences not saved.")
+            return
+
+        # Coalesced with other metadata changes and written in the background
+        self.project_model.set_script_editor_preferences(font_family=font_family, font_size=font_size)
+        self.view.update_status(f"Font preferences saved: Family={font_family}, Size={font_size}")
 
     def load_font_preferences(self):
-        try:
-            project_dir = self.project_model.get_project_dir()
-            metadata_file = os.path.join(project_dir, "project_metadata.json")
-            
-            if os.path.exists(metadata_file):
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                
-                script_editor_prefs = metadata.get('script_editor', {})
-                font_family = script_editor_prefs.get('font_family')
-                font_size = script_editor_prefs.get('font_size')
-                
-                if font_family and font_size:
-                    self.view.font_family_var.set(font_family)
-                    self.view.font_size_var.set(font_size)
-                    self.view.update_font()
-                    self.view.update_status(f"Loaded font preferences: Family={font_family}, Size={font_size}")
-            else:
-                self.view.update_status("No saved font preferences found. Using defaults.")
-        except ValueError:
+        if not self.project_model.current_project:
             # No project is currently active, use default font settings
             self.view.update_status("No active project. Using default font settings.")
+            return
+
+        script_editor_prefs = self.project_model.get_script_editor_preferences()
+        font_family = script_editor_prefs.get('font_family')
+        font_size = script_editor_prefs.get('font_size')
+
+        if font_family and font_size:
+            self.view.font_family_var.set(font_family)
+            self.view.font_size_var.set(font_size)
+            self.view.update_font()
+            self.view.update_status(f"Loaded font preferences: Family={font_family}, Size={font_size}")
+        else:
+            self.view.update_status("No saved font preferences found. Using defaults.")
 
     def get_script_hash(self):
         return hashlib.md5(self.get_script_text().encode()).hexdigest()
@@ -203,14 +181,14 @@ class ScriptEditorController:
                     output_path = self.get_next_analysis_filename()
                     with open(output_path, 'w') as file:
                         json.dump(analysis, file, indent=2)
-                    self.view.after(0, lambda: self.view.update_status(f"Analysis saved to: {output_path}"))
+                    self.dispatcher.post(lambda: self.view.update_status(f"Analysis saved to: {output_path}"))
                 else:
-                    self.view.after(0, lambda: self.view.update_status("Error: Failed to analyze script"))
+                    self.dispatcher.post(lambda: self.view.update_status("Error: Failed to analyze script"))
             except Exception as e:
-                self.view.after(0, lambda: self.view.update_status(f"Error analyzing script: {str(e)}"))
+                self.dispatcher.post(lambda: self.view.update_status(f"Error analyzing script: {str(e)}"))
             finally:
-                self.view.after(0, self.view.hide_progress_bar)
-                self.view.after(0, lambda: self.view.analyze_script_button.configure(state="normal"))
+                self.dispatcher.post(self.view.hide_progress_bar)
+                self.dispatcher.post(lambda: self.view.analyze_script_button.configure(state="normal"))
 
         threading.Thread(target=analysis_thread, daemon=True).start()
 
@@ -242,56 +220,103 @@ class ScriptEditorController:
         self.view.create_audio_button.configure(state="disabled")
 
         def audio_creation_thread():
+            scheduler = self.create_generation_scheduler()
             try:
                 script_analysis = analysis.get('script_analysis', [])
-                total_elements = len(script_analysis)
-                
+
+                # Voices are chosen once per character up front so parallel lines never race for them
+                self.dispatcher.post(lambda: self.view.update_status("Selecting character voices..."))
+                for speaker in dict.fromkeys(element['character'] for element in script_analysis
+                                             if element['type'] == 'character_line'):
+                    self.resolve_character_voice(speaker)
+
                 for i, element in enumerate(script_analysis, 1):
-                    self.view.update_status(f"Processing element {i} of {total_elements}")
-                    self.view.progress_bar.set(i / total_elements)
-                    
                     if element['type'] == 'character_line':
-                        self.process_speech_element(element, i)
+                        self.process_speech_element(scheduler, element, i)
                     elif element['type'] == 'sfx':
-                        self.process_sfx_element(element, i)
+                        self.process_sfx_element(scheduler, element, i)
                     elif element['type'] == 'music':
-                        self.process_music_element(element, i)
-                    
-                    time.sleep(0.1)
+                        self.process_music_element(scheduler, element, i)
 
-                self.view.after(0, lambda: self.view.update_status("Audio creation completed and added to timeline."))
+                scheduler.wait()
+                failed = scheduler.get_progress()['failed']
+                logging.info(f"Generation cache stats: {self.audio_controller.speech_service.cache.get_stats()}")
+                if failed:
+                    message = f"Audio creation completed; {failed} element(s) could not be generated."
+                else:
+                    message = "Audio creation completed and added to timeline."
+                self.dispatcher.post(lambda: self.view.update_status(message))
             except Exception as e:
                 error_msg = f"Error creating audio: {str(e)}"
                 logging.error(error_msg, exc_info=True)
-                self.view.after(0, lambda: self.view.update_status(error_msg))
+                self.dispatcher.post(lambda: self.view.update_status(error_msg))
             finally:
-                self.view.after(0, self.view.hide_progress_bar)
-                self.view.after(0, lambda: self.view.create_audio_button.configure(state="normal"))
+                scheduler.shutdown()
+                self.dispatcher.post(self.view.hide_progress_bar)
+                self.dispatcher.post(lambda: self.view.create_audio_button.configure(state="normal"))
 
         threading.Thread(target=audio_creation_thread, daemon=True).start()
 
-    def process_speech_element(self, element, index):
+    def create_generation_scheduler(self):
+        settings = self.config.get('settings', {})
+        return GenerationScheduler(concurrency=settings.get('generation_concurrency'),
+                                   requests_per_minute=settings.get('generation_requests_per_minute'),
+                                   max_retries=settings.get('generation_max_retries', 3),
+                                   on_progress=self.on_generation_progress)
+
+    def on_generation_progress(self, progress):
+        self.dispatcher.post(lambda: self.update_generation_progress(progress))
+
+    def update_generation_progress(self, progress):
+        total = progress['total']
+        if not total:
+            return
+        finished = progress['done'] + progress['failed']
+        status = f"Generated {finished} of {total} elements ({progress['running']} in progress"
+        if progress['failed']:
+            status += f", {progress['failed']} failed"
+        self.view.update_status(status + ")")
+        self.view.progress_bar.set(finished / total)
+
+    def resolve_character_voice(self, speaker):
+        if speaker in self.character_voices:
+            return self.character_voices[speaker]
+
+        voice_char = self.get_voice_characteristics(speaker)
+        chosen_voice_name, chosen_voice_id = self.get_suitable_voice(speaker, voice_char)
+        if not self.audio_controller.speech_service.ensure_voice_in_library(chosen_voice_id, chosen_voice_name):
+            self.dispatcher.post(lambda: self.view.update_status(
+                f"Failed to add voice '{chosen_voice_name}' to library. Using default voice."))
+            chosen_voice_name, chosen_voice_id = self.get_default_voice(voice_char.get('Gender', ''))
+
+        self.character_voices[speaker] = (chosen_voice_name, chosen_voice_id)
+        return chosen_voice_name, chosen_voice_id
+
+    def commit_generated_clip(self, file_path, track_name, index):
+        # Clips are placed on the Tk thread; the scheduler hands them over in script order
+        self.dispatcher.post(lambda: self.add_clip_to_timeline(file_path, track_name, index))
+
+    def index_generated_file(self, file_path):
+        """Probe a freshly generated file on the worker so placing its clip hits the media index"""
+        if file_path:
+            try:
+                self.project_model.media_index.record(file_path)
+            except Exception as e:
+                logging.error(f"Error indexing generated audio: {str(e)}")
+        return file_path
+
+    def process_speech_element(self, scheduler, element, index):
         speaker = element['character']
         sentence = element['content']
-        
-        self.view.update_status(f"Generating speech for {speaker}: {sentence[:30]}...")
-        
-        if speaker not in self.character_voices:
-            voice_char = self.get_voice_characteristics(speaker)
-            chosen_voice_name, chosen_voice_id = self.get_suitable_voice(speaker, voice_char)
-            self.character_voices[speaker] = (chosen_voice_name, chosen_voice_id)
-        else:
-            chosen_voice_name, chosen_voice_id = self.character_voices[speaker]
-        
-        if not self.audio_controller.speech_service.ensure_voice_in_library(chosen_voice_id, chosen_voice_name):
-            self.view.update_status(f"Failed to add voice '{chosen_voice_name}' to library. Using default voice.")
-            chosen_voice_name, chosen_voice_id = self.get_default_voice(voice_char['Gender'])
+        chosen_voice_name, chosen_voice_id = self.resolve_character_voice(speaker)
+        speech_service = self.audio_controller.speech_service
 
-        # Use the speech_service directly instead of process_speech_request
-        audio_file = self.audio_controller.speech_service.text_to_speech_file(sentence, chosen_voice_id)
-        
-        if audio_file:
-            self.add_clip_to_timeline(audio_file, speaker, index)
+        scheduler.submit(
+            'speech',
+            lambda: self.index_generated_file(
+                speech_service.text_to_speech_file(sentence, chosen_voice_id, voice_name=chosen_voice_name)),
+            lambda audio_file: self.commit_generated_clip(audio_file, speaker, index),
+            f"speech for {speaker}: {sentence[:30]}")
 
     def get_default_voice(self, gender):
         default_voices = {
@@ -300,38 +325,31 @@ class ScriptEditorController:
         }
         return default_voices.get(gender.lower(), default_voices['male'])
 
-    def process_sfx_element(self, element, index):
+    def process_sfx_element(self, scheduler, element, index):
         description = element['content']
-        duration = element.get('duration', 0)
-        
-        self.view.update_status(f"Generating SFX: {description[:30]}...")
-        
-        # Set the input fields in the audio controller view
-        self.audio_controller.view.current_module.set("SFX")
-        self.audio_controller.view.user_input.delete("1.0", "end")
-        self.audio_controller.view.user_input.insert("1.0", description)
-        self.audio_controller.view.duration_var.set(str(duration))
-        
-        # Call process_sfx_request without keyword arguments
-        audio_file = self.audio_controller.process_sfx_request(synchronous=True)
-        
-        if audio_file:
-            self.add_clip_to_timeline(audio_file, "SFX", index)
+        duration = str(element.get('duration', 0))
+        sfx_service = self.audio_controller.sfx_service
+
+        if sfx_service.validate_duration(duration) is None and duration != "0":
+            logging.warning(f"Skipping SFX with invalid duration {duration}: {description[:30]}")
+            return
+
+        scheduler.submit(
+            'sfx',
+            lambda: self.index_generated_file(sfx_service.process_sfx_request(description, duration)),
+            lambda audio_file: self.commit_generated_clip(audio_file, "SFX", index),
+            f"SFX: {description[:30]}")
 
-    def process_music_element(self, element, index):
+    def process_music_element(self, scheduler, element, index):
         description = element['content']
         instrumental = element.get('instrumental', 'yes') == 'yes'
-        
-        self.view.update_status(f"Generating Music: {description[:30]}...")
-        
-        audio_file = self.audio_controller.process_music_request(
-            text_prompt=description,
-            make_instrumental=instrumental,
-            synchronous=True
-        )
-        
-        if audio_file:
-            self.add_clip_to_timeline(audio_file, "Music", index)
+        music_service = self.audio_controller.music_service
+
+        scheduler.submit(
+            'music',
+            lambda: self.index_generated_file(music_service.process_music_request(description, instrumental)),
+            lambda audio_file: self.commit_generated_clip(audio_file, "Music", index),
+            f"music: {description[:30]}")
 
     def add_clip_to_timeline(self, file_path, track_name, index):
         if file_path:
@@ -401,68 +419,25 @@ class ScriptEditorController:
         logging.info(f"Searching voice for {speaker}: gender={gender}, age={age}, accent={accent}, description={description}")
 
         # First, try to find a matching voice in the user's library
-        user_voices = self.audio_controller.speech_service.get_user_voices()
-        
-        # Get detailed information about user voices
-        user_voice_details = {}
-        for name, voice_id in user_voices:
-            url = f"https://api.elevenlabs.io/v1/voices/{voice_id}"
-            headers = {"xi-api-key": self.audio_controller.speech_service.api_key}
-            try:
-                response = requests.get(url, headers=headers)
-                response.raise_for_status()
-                voice_data = response.json()
-                
-                # Check if voice is fine-tuned for multilingual model
-                fine_tuning = voice_data.get('fine_tuning', {})
-                state = fine_tuning.get('state', {})
-                if state.get('eleven_multilingual_v2') != 'fine_tuned':
-                    continue
-                
-                user_voice_details[voice_id] = voice_data
-            except Exception as e:
-                logging.error(f"Error fetching voice details for {name}: {str(e)}")
-                continue
-
-        # Search for matching voice in user library
-        for name, voice_id in user_voices:
-            voice_data = user_voice_details.get(voice_id, {})
-            if (voice_data.get('gender', '').lower() == gender and
-                age in voice_data.get('age', '').lower() and
-                (accent == 'none' or accent in voice_data.get('accent', '').lower()) and
-                description in voice_data.get('description', '').lower()):
-                logging.info(f"Found matching voice in user library: {name}")
-                return name, voice_id
+        voice_catalog = self.audio_controller.speech_service.voice_catalog
+        for voice in voice_catalog.find_voices('user', gender, age, accent, description):
+            logging.info(f"Found matching voice in user library: {voice['name']}")
+            return voice['name'], voice['voice_id']
 
         # If no match in user library, search public library
-        available_voices = self.audio_controller.speech_service.get_available_voices()
-        
-        # Filter voices based on characteristics
-        matching_voices = []
-        for voice in available_voices:
-            # Check if voice is fine-tuned for multilingual model
-            fine_tuning = voice.get('fine_tuning', {})
-            state = fine_tuning.get('state', {})
-            if state.get('eleven_multilingual_v2') != 'fine_tuned':
-                continue
-                
-            if (gender == voice['gender'].lower() and
-                age in voice['age'].lower() and
-                (accent == 'none' or accent in voice['accent'].lower())):
-                matching_voices.append(voice)
+        matching_voices = voice_catalog.find_voices('shared', gender, age, accent)
 
         logging.info(f"Found {len(matching_voices)} matching voices in public library for {speaker}")
 
         # Try to find a voice with matching description
-        for voice in matching_voices:
-            if description in voice['descriptive'].lower():
-                voice_name = voice['name']
-                voice_id = voice['voice_id']
-                logging.info(f"Selected voice from public library: {voice_name} (matches description)")
-                
-                # Add the voice to the user's library
-                if self.audio_controller.speech_service.ensure_voice_in_library(voice_id, voice_name):
-                    return voice_name, voice_id
+        for voice in voice_catalog.find_voices('shared', gender, age, accent, description):
+            voice_name = voice['name']
+            voice_id = voice['voice_id']
+            logging.info(f"Selected voice from public library: {voice_name} (matches description)")
+
+            # Add the voice to the user's library
+            if self.audio_controller.speech_service.ensure_voice_in_library(voice_id, voice_name):
+                return voice_name, voice_id
 
         # If no matching description but we have voices with matching characteristics
         if matching_voices:
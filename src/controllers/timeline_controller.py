@@ -4,10 +4,9 @@ from utils.audio_clip import AudioClip
 from tkinterdnd2 import DND_FILES
 import logging 
 from tkinter import messagebox, filedialog
-from pydub import AudioSegment
-import soundfile as sf
-import numpy as np
-from utils.file_utils import read_audio_prompt
+from utils.timeline_renderer import ParallelTimelineRenderer
+import threading
+from utils.tk_dispatcher import TkDispatcher
 
 class TimelineController:
     def __init__(self, master, timeline_model, project_model):
@@ -19,7 +18,8 @@ class TimelineController:
         self.unsaved_changes = False
         self.imported_audio_files = set()
         self.max_playhead_position = 1800  # Set a maximum playhead position in sec (e.g., 30m -> 1800s)
-        self.timeline_model.on_playhead_update = self.update_playhead_view
+        self.export_thread = None
+        self.dispatcher = TkDispatcher.get_instance()
         self.timeline_model.add_state_change_callback(self.on_playback_state_change)
 
     def show(self):
@@ -68,11 +68,6 @@ class TimelineController:
             self.view.update_tracks(tracks)
             for track_index, track_data in enumerate(tracks):
                 for clip in track_data['clips']:
-                    # Ensure each clip has the prompt information and title
-                    if not hasattr(clip, 'prompt'):
-                        clip.prompt = read_audio_prompt(clip.file_path)
-                    if not hasattr(clip, 'title'):
-                        clip.title = os.path.basename(clip.file_path)
                     self.view.draw_clip(clip, track_index)
             self.view.redraw_timeline()
         self.project_model.clear_timeline_clips()
@@ -99,7 +94,8 @@ class TimelineController:
 
     def save_timeline_data(self):
         if self.timeline_model.is_modified:
-            self.project_model.update_timeline_data(self.timeline_model.get_serializable_tracks())
+            # The model already holds the live tracks; just queue them for writing
+            self.project_model.save_timeline_data()
             self.timeline_model.set_modified(False)
             self.project_model.update_saved_audio_files()
             self.unsaved_changes = False
@@ -115,8 +111,8 @@ class TimelineController:
 
     def rename_track(self, track, new_name):
         try:
-            track_index = self.model.get_track_index(track)
-            self.model.rename_track(track_index, new_name)
+            track_index = self.timeline_model.get_track_index(track)
+            self.timeline_model.rename_track(track_index, new_name)
             self.view.update_track_labels()
         except ValueError:
             logging.error(f"Track not found: {track}")
@@ -180,12 +176,14 @@ class TimelineController:
         start_time = self.timeline_model.get_playhead_position()
         
         # Find the next available position
-        for clip in selected_track['clips']:
-            if clip.x <= start_time < clip.x + clip.duration:
-                start_time = clip.x + clip.duration
+        overlapping = self.timeline_model.get_clips_at(selected_track, start_time)
+        while overlapping:
+            start_time = max(clip.x + clip.duration for clip in overlapping)
+            overlapping = [clip for clip in self.timeline_model.get_clips_at(selected_track, start_time)
+                           if clip.x + clip.duration > start_time]
         
         # Create the new clip
-        new_clip = AudioClip(file_path, start_time)
+        new_clip = self.timeline_model.create_clip(file_path, start_time)
         
         # Add the clip to the model
         self.timeline_model.add_clip_to_track(track_index, new_clip)
@@ -202,7 +200,7 @@ class TimelineController:
         track_index = self.get_or_create_track(track_name)
         
         # Create the new clip
-        new_clip = AudioClip(file_path, start_time, index)
+        new_clip = self.timeline_model.create_clip(file_path, start_time, index)
         
         # Add the clip to the model
         self.timeline_model.add_clip_to_track(track_index, new_clip)
@@ -226,11 +224,7 @@ class TimelineController:
         self.unsaved_changes = True
 
     def remove_clip_from_all_tracks(self, file_path):
-        tracks = self.timeline_model.get_tracks()
-        for track_index, track in enumerate(tracks):
-            clips_to_remove = [clip for clip in track['clips'] if clip.file_path == file_path]
-            for clip in clips_to_remove:
-                self.timeline_model.remove_clip_from_track(track_index, clip)
+        self.timeline_model.remove_clips_for_file(file_path)
         
         # Update the view
         if self.view:
@@ -260,19 +254,11 @@ class TimelineController:
             tracks = self.timeline_model.get_tracks()
             
             if 0 <= old_track_index < len(tracks) and 0 <= new_track_index < len(tracks):
-                old_track = tracks[old_track_index]
-                new_track = tracks[new_track_index]
-                
-                # Remove the clip from the old track
-                old_track['clips'] = [c for c in old_track['clips'] if c.file_path != clip.file_path]
-                
-                # Update the clip's position
-                clip.x = new_x
-                
-                # Add the clip to the new track
-                new_track['clips'].append(clip)
+                # Let the model move the clip so its clip index stays in sync
+                if not self.timeline_model.move_clip(clip, new_x, old_track_index, new_track_index):
+                    logging.warning(f"Clip not found on track {old_track_index}")
+                    return False
                 
-                self.timeline_model.set_modified(True)
                 if self.view:
                     self.view.update_tracks(tracks)
                     self.view.redraw_timeline()
@@ -291,8 +277,8 @@ class TimelineController:
         active_tracks = self.get_active_tracks()
         self.timeline_model.update_playing_tracks(active_tracks)
 
-    def update_track_volume(self, track):
-        self.timeline_model.update_track_volume(track)
+    def update_track_volume(self, track, volume_db=None):
+        self.timeline_model.update_track_volume(track, volume_db)
 
     def update_active_tracks(self):
         active_tracks = self.get_active_tracks()
@@ -306,6 +292,17 @@ class TimelineController:
         return [track for track in tracks if not track.get("mute", False)]
 
     def on_playback_state_change(self, is_playing, position):
+        if not self.view:
+            return
+        if threading.current_thread() is threading.main_thread():
+            self._apply_playback_state(is_playing, position)
+        else:
+            # The stream's finished callback runs on the audio thread
+            self.dispatcher.post(self._apply_playback_state, is_playing, position)
+
+    def _apply_playback_state(self, is_playing, position):
+        if is_playing != self.timeline_model.is_playing:
+            return  # Superseded, e.g. a late stream-finished report after playback restarted
         if self.view and self.view.winfo_exists():
             if is_playing:
                 self.view.on_playback_started(position)
@@ -321,10 +318,6 @@ class TimelineController:
         self.timeline_model.stop_timeline()
         logging.info("Timeline playback stopped from controller")
 
-    def update_playhead_view(self, position):
-        if self.view:
-            self.view.update_playhead_position(position)
-            
     def set_playhead_position(self, position):
         self.timeline_model.set_playhead_position(position)
         if self.view:
@@ -376,19 +369,21 @@ class TimelineController:
     def discard_unsaved_changes(self):
         self.project_model.remove_unsaved_audio_files()
         self.project_model.clear_timeline_clips()
+        self.project_model.discard_recovery_data()
         self.load_timeline_data()
         self.unsaved_changes = False
 
     def save_project(self):
         if self.project_model:
-            success, message = self.project_model.save_project()
-            if success:
-                self.on_project_saved()
-                if self.view:
-                    self.view.update_status("Project saved successfully")
-            else:
-                if self.view:
-                    self.view.update_status(f"Failed to save project: {message}")
+            self.update_status("Saving project...")
+            self.project_model.save_project(
+                on_complete=lambda success, message: self.dispatcher.post(self.on_save_finished, success, message))
+
+    def on_save_finished(self, success, message):
+        if success:
+            self.on_project_saved()
+        else:
+            self.update_status(f"Failed to save project: {message}")
 
     def open_project(self):
         if self.master_controller:
@@ -402,11 +397,11 @@ class TimelineController:
         return self.timeline_model.is_playing
 
     def toggle_solo(self, track):
-        track["solo"] = not track.get("solo", False)
+        self.timeline_model.set_track_property(track, "solo", not track.get("solo", False))
         self.update_track_solo_mute(track)
 
     def toggle_mute(self, track):
-        track["mute"] = not track.get("mute", False)
+        self.timeline_model.set_track_property(track, "mute", not track.get("mute", False))
         self.update_track_solo_mute(track)
     
     def add_track(self, track_name=None):
@@ -440,8 +435,7 @@ class TimelineController:
 
     def get_clip_duration(self, file_path):
         try:
-            audio = AudioSegment.from_file(file_path)
-            return len(audio) / 1000.0  # Convert milliseconds to seconds
+            return self.project_model.media_index.get_duration(file_path)
         except Exception as e:
             logging.error(f"Error getting clip duration: {str(e)}")
             return 0  # Return 0 duration if there's an error
@@ -449,9 +443,7 @@ class TimelineController:
     def get_track_end_time(self, track_index):
         if 0 <= track_index < len(self.timeline_model.get_tracks()):
             track = self.timeline_model.get_tracks()[track_index]
-            if track['clips']:
-                last_clip = max(track['clips'], key=lambda clip: clip.x + clip.duration)
-                return last_clip.x + last_clip.duration
+            return self.timeline_model.get_end_time([track])
         return 0  # Return 0 if the track is empty or doesn't exist
     
     def export_audio(self):
@@ -467,61 +459,59 @@ class TimelineController:
         if not file_path:
             return  # User cancelled the file dialog
 
-        try:
-            self.view.show_progress_bar(determinate=True)
-            self.view.update_status("Exporting audio...")
-
-            # Get the end time of the last clip
-            end_time = max(
-                clip.x + clip.duration
-                for track in self.timeline_model.get_tracks()
-                for clip in track['clips']
-            )
-
-            # Initialize an empty numpy array for the final mix
-            sample_rate = 44100
-            channels = 2
-            final_mix = np.zeros((int(end_time * sample_rate), channels))
-
-            total_clips = sum(len(track['clips']) for track in self.timeline_model.get_tracks())
-            processed_clips = 0
-
-            for track in self.timeline_model.get_tracks():
-                for clip in track['clips']:
-                    audio_data = self.timeline_model.get_clip_frames(clip, 0, clip.duration)
-                    start_sample = int(clip.x * sample_rate)
-                    end_sample = start_sample + len(audio_data)
-                    
-                    if end_sample > len(final_mix):
-                        pad_length = end_sample - len(final_mix)
-                        final_mix = np.pad(final_mix, ((0, pad_length), (0, 0)))
-
-                    final_mix[start_sample:end_sample] += audio_data * track.get("volume", 1.0)
-
-                    processed_clips += 1
-                    self.view.progress_bar.set(processed_clips / total_clips)
-
-            # Normalize the final mix
-            max_amplitude = np.max(np.abs(final_mix))
-            if max_amplitude > 0:
-                final_mix = final_mix / max_amplitude
-
-            # Export as MP3
-            with sf.SoundFile(file_path, 'w', samplerate=sample_rate, channels=channels, format='mp3') as f:
-                f.write(final_mix)
-
-            self.view.update_status(f"Audio exported successfully to {file_path}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export audio: {str(e)}")
-        finally:
-            self.view.hide_progress_bar()
+        if self.export_thread and self.export_thread.is_alive():
+            messagebox.showinfo("Export", "An export is already running")
+            return
+
+        self.view.show_progress_bar(determinate=True)
+        self.view.update_status("Exporting audio...")
+
+        # The renderer snapshots the timeline here, so edits during export don't affect it
+        settings = self.timeline_model.config.get('settings', {})
+        renderer = ParallelTimelineRenderer(self.timeline_model, workers=settings.get('export_workers'))
+
+        def export_thread():
+            try:
+                renderer.export(file_path, format='mp3', progress_callback=self.update_export_progress)
+                self.dispatcher.post(lambda: self.view.update_status(f"Audio exported successfully to {file_path}"))
+            except Exception as e:
+                logging.error(f"Error exporting audio: {str(e)}")
+                error_message = str(e)
+                self.dispatcher.post(lambda: messagebox.showerror("Export Error", f"Failed to export audio: {error_message}"))
+                self.dispatcher.post(lambda: self.view.update_status("Export failed"))
+            finally:
+                self.dispatcher.post(self.view.hide_progress_bar)
+
+        self.export_thread = threading.Thread(target=export_thread, daemon=True)
+        self.export_thread.start()
+
+    def update_export_progress(self, fraction):
+        self.dispatcher.post(lambda: self.view.progress_bar.set(fraction))
 
     def undo_action(self):
-        self.timeline_model.undo()
-        self.load_timeline_data()
-        self.update_status("Undo successful")
+        if self.timeline_model.undo():
+            self.refresh_after_history_change()
+            self.update_status("Undo successful")
+        else:
+            self.update_status("Nothing to undo")
 
     def redo_action(self):
-        self.timeline_model.redo()
-        self.load_timeline_data()
-        self.update_status("Redo successful")
\ No newline at end of file
+        if self.timeline_model.redo():
+            self.refresh_after_history_change()
+            self.update_status("Redo successful")
+        else:
+            self.update_status("Nothing to redo")
+
+    def refresh_after_history_change(self):
+        """Sync the view and project with the live tracks after an undo or redo"""
+        tracks = self.timeline_model.get_tracks()
+        self.project_model.clear_timeline_clips()
+        for track in tracks:
+            for clip in track['clips']:
+                self.project_model.add_clip_to_timeline(clip.file_path)
+        self.update_active_tracks()
+        if self.view:
+            self.view.invalidate_clip_hit_index()
+            self.view.update_tracks(tracks)
+            self.view.update_timeline_duration()
+        self.unsaved_changes = True
\ No newline at end of file
@@ -42,7 +42,7 @@ def main():
     root.withdraw()  # Hide the root window
     
     main_model = MainModel()
-    project_model = ProjectModel(config['projects']['base_dir'])
+    project_model = ProjectModel(config['projects']['base_dir'], config)
     view = MainView(root, config, project_model)
     controller = MainController(main_model, view, config, project_model)
 
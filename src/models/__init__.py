@@ -1,5 +1,21 @@
-from .main_model import MainModel
-from .project_model import ProjectModel
-from .audio_generator_model import AudioGeneratorModel
-from .script_editor_model import ScriptEditorModel
-from .timeline_model import TimelineModel
\ No newline at end of file
+import importlib
+
+# Models are imported on first access so that headless tools can load
+# ProjectModel/TimelineModel without pulling in pygame via AudioGeneratorModel
+_MODELS = {
+    'MainModel': '.main_model',
+    'ProjectModel': '.project_model',
+    'AudioGeneratorModel': '.audio_generator_model',
+    'ScriptEditorModel': '.script_editor_model',
+    'TimelineModel': '.timeline_model',
+}
+
+__all__ = list(_MODELS)
+
+
+def __getattr__(name):
+    if name in _MODELS:
+        model = getattr(importlib.import_module(_MODELS[name], __name__), name)
+        globals()[name] = model
+        return model
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,19 +3,31 @@ import json
 import datetime
 import logging
 import shutil
+import copy
 from models.timeline_model import TimelineModel  
 from pydub import AudioSegment
+from utils.file_utils import probe_audio_file
+from utils.media_index import MediaIndex
+from utils.project_writer import ProjectWriter
+from utils import timeline_store
 
 class ProjectModel:
-    def __init__(self, base_projects_dir):
+    def __init__(self, base_projects_dir, config=None):
         self.base_projects_dir = base_projects_dir
+        self.config = config or {}
         self.current_project = None
         self.metadata = {}
         self.default_project_name = "Default Project"
-        self.timeline_model = TimelineModel()  
+        self.timeline_model = TimelineModel(self.config)
+        self.media_index = MediaIndex()
+        self.timeline_model.set_media_index(self.media_index)
         self.saved_audio_files = set()
         self.new_audio_files = set()
         self.timeline_clips = set()
+        settings = self.config.get('settings', {})
+        self.writer = ProjectWriter(delay=settings.get('save_debounce_seconds', 1.0))
+        self.dirty_sections = set()  # 'metadata' and/or 'timeline' waiting to be written
+        self.timeline_format = settings.get('timeline_format', 'json')  # 'json' or columnar 'npz'
 
     def ensure_default_project(self):
         default_project_path = os.path.join(self.base_projects_dir, self.default_project_name)
@@ -43,44 +55,112 @@ class ProjectModel:
             "last_opened_script": None
         }
         self.timeline_model.clear_tracks()  # Clear tracks for new project
+        self.timeline_model.set_cache_dir(self.get_cache_dir())
+        self.media_index.open(self.get_media_index_path())
         self.save_project_metadata()
         self.save_timeline_data()
+        self.writer.flush(wait=True)
 
     def load_project(self, project_name):
         project_dir = os.path.join(self.base_projects_dir, project_name)
         if not os.path.exists(project_dir):
             raise ValueError(f"Project '{project_name}' does not exist")
         
+        # Queued writes (e.g. from create_project) must land before the files are read back
+        self.writer.flush(wait=True)
         self.current_project = project_name
+        self.timeline_model.set_cache_dir(self.get_cache_dir())
+        self.media_index.open(self.get_media_index_path())
         self.load_project_metadata()
         self.load_timeline_data()
         self.saved_audio_files.update(self.get_all_project_audio_files())
 
-    def save_project(self):
+    def save_project(self, on_complete=None):
+        """Save the project.
+
+        With ``on_complete`` the files are written in the background and
+        ``on_complete(success, message)`` is called once they are on disk,
+        from the writer thread. Without it the call blocks until then and
+        returns ``(success, message)``; that is only meant for quit and close.
+        """
         if not self.current_project:
             raise ValueError("No project is currently active")
-        
+
+        project_name = self.current_project
+        recovery_path = self.get_recovery_path()
         try:
-            self.save_project_metadata()
-            self.save_timeline_data()
+            if self.timeline_model.is_modified:
+                self.mark_dirty('timeline')
+            self.mark_dirty('metadata')
+            self.writer.pop_errors()  # only failures of this save are reported
+            self.flush_dirty_sections()
+            self.timeline_model.mark_as_saved()
+            # A failed save keeps these files on disk, so discarding changes never loses audio
             self.update_saved_audio_files()
             self.saved_audio_files.update(self.get_all_project_audio_files())
-            logging.info(f"Project '{self.current_project}' saved successfully.")
-            return True, "Project saved successfully."
+            if on_complete is None:
+                self.flush_writes()
+                result = self._finish_save(project_name, recovery_path)
+                self.writer.flush(wait=True)
+                return result
+            self.writer.when_written(lambda errors: on_complete(*self._finish_save(
+                project_name, recovery_path, self._format_write_errors(errors))))
         except Exception as e:
-            error_msg = f"Failed to save project: {str(e)}"
+            result = self._finish_save(project_name, recovery_path, str(e))
+            if on_complete is None:
+                return result
+            on_complete(*result)
+
+    def _finish_save(self, project_name, recovery_path, error=None):
+        if error:
+            if project_name == self.current_project:
+                self.timeline_model.is_modified = True  # the edits stay protected by autosave
+            error_msg = f"Failed to save project: {error}"
             logging.error(error_msg)
             return False, error_msg
+        # The saved timeline supersedes the autosave, which is only dropped once the save is on disk
+        self.writer.remove(recovery_path)
+        logging.info(f"Project '{project_name}' saved successfully.")
+        return True, "Project saved successfully."
+
+    def _format_write_errors(self, errors):
+        return "; ".join(f"{os.path.basename(path)}: {message}" for path, message in errors)
+
+    def flush_writes(self, timeout=30):
+        """Block until queued writes are on disk; raise if any of them failed"""
+        if not self.writer.flush(wait=True, timeout=timeout):
+            raise IOError(f"Timed out after {timeout}s waiting for project files to be written")
+        errors = self.writer.pop_errors()
+        if errors:
+            raise IOError(self._format_write_errors(errors))
+
+    def mark_dirty(self, section):
+        self.dirty_sections.add(section)
+
+    def flush_dirty_sections(self):
+        """Queue a write for every section changed since it was last saved"""
+        if 'metadata' in self.dirty_sections:
+            self.save_project_metadata()
+        if 'timeline' in self.dirty_sections:
+            self.save_timeline_data()
+
+    def get_metadata_path(self):
+        return os.path.join(self.get_project_dir(), "project_metadata.json")
+
+    def get_timeline_path(self):
+        return timeline_store.get_timeline_file(self.get_project_dir(), self.timeline_format)
+
+    def get_recovery_path(self):
+        return os.path.join(self.get_project_dir(), "timeline_data.autosave.json")
 
     def save_project_metadata(self):
+        """Queue the metadata for a debounced background write"""
         self.metadata["last_modified"] = datetime.datetime.now().isoformat()
-        
-        metadata_file = os.path.join(self.get_project_dir(), "project_metadata.json")
-        with open(metadata_file, 'w') as f:
-            json.dump(self.metadata, f, indent=2)
+        self.writer.write(self.get_metadata_path(), copy.deepcopy(self.metadata), indent=2)
+        self.dirty_sections.discard('metadata')
     
     def load_project_metadata(self):
-        metadata_file = os.path.join(self.get_project_dir(), "project_metadata.json")
+        metadata_file = self.get_metadata_path()
         if os.path.exists(metadata_file):
             try:
                 with open(metadata_file, 'r') as f:
@@ -92,19 +172,63 @@ class ProjectModel:
             self.metadata = {}
 
     def save_timeline_data(self):
-        timeline_file = os.path.join(self.get_project_dir(), "timeline_data.json")
+        """Queue the timeline for a debounced background write"""
         serializable_tracks = self.timeline_model.get_serializable_tracks()
-        with open(timeline_file, 'w') as f:
-            json.dump(serializable_tracks, f, indent=2)
+        if self.timeline_format == 'npz':
+            self.writer.write_with(self.get_timeline_path(), timeline_store.save_npz, serializable_tracks)
+        else:
+            self.writer.write(self.get_timeline_path(), serializable_tracks)
+        self.dirty_sections.discard('timeline')
+
+    def autosave(self):
+        """Write unsaved timeline edits to a recovery file next to the project"""
+        if not self.current_project or not self.timeline_model.is_modified:
+            return False
+        self.writer.write(self.get_recovery_path(), {
+            'saved_at': datetime.datetime.now().isoformat(),
+            'tracks': self.timeline_model.get_serializable_tracks()
+        })
+        return True
+
+    def has_recovery_data(self):
+        """True if an autosave is newer than the saved timeline, i.e. the last session ended unsaved"""
+        recovery_file = self.get_recovery_path()
+        if not os.path.exists(recovery_file):
+            return False
+        timeline_file = self.get_timeline_path()
+        return not os.path.exists(timeline_file) or os.path.getmtime(recovery_file) > os.path.getmtime(timeline_file)
+
+    def restore_recovery_data(self):
+        try:
+            with open(self.get_recovery_path(), 'r') as f:
+                recovery = json.load(f)
+            self.timeline_model.load_from_serializable(recovery['tracks'])
+            self.timeline_model.set_modified(True)
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Error restoring autosaved timeline: {str(e)}")
+            return False
+
+    def discard_recovery_data(self):
+        self.writer.remove(self.get_recovery_path())
+
+    def close(self):
+        """Block until every queued write is on disk"""
+        self.writer.close()
 
     def load_timeline_data(self):
-        timeline_file = os.path.join(self.get_project_dir(), "timeline_data.json")
-        if os.path.exists(timeline_file):
+        json_file = timeline_store.get_timeline_file(self.get_project_dir(), 'json')
+        if self.timeline_format == 'npz' and not os.path.exists(self.get_timeline_path()) and os.path.exists(json_file):
+            timeline_store.migrate_json_to_npz(self.get_project_dir())
+            logging.info(f"Migrated {json_file} to the columnar timeline format")
+        # Load whichever format was saved last, so switching timeline_format never loses edits
+        timeline_file = timeline_store.find_timeline_file(self.get_project_dir())
+
+        if timeline_file:
             try:
-                with open(timeline_file, 'r') as f:
-                    serializable_tracks = json.load(f)
+                serializable_tracks = timeline_store.load_timeline(timeline_file)
                 self.timeline_model.load_from_serializable(serializable_tracks)
-            except json.JSONDecodeError as e:
+            except (OSError, ValueError, KeyError) as e:
                 print(f"Error parsing timeline data: {str(e)}")
                 self.timeline_model.clear_tracks()
         else:
@@ -144,6 +268,17 @@ class ProjectModel:
         self.metadata['last_opened_script'] = script_path
         self.save_project_metadata()
 
+    def get_script_editor_preferences(self):
+        return self.metadata.get('script_editor', {})
+
+    def set_script_editor_preferences(self, **preferences):
+        """Update script editor preferences; written with the next debounced metadata save"""
+        script_editor = self.metadata.setdefault('script_editor', {})
+        if all(script_editor.get(key) == value for key, value in preferences.items()):
+            return
+        script_editor.update(preferences)
+        self.save_project_metadata()
+
     def get_scripts_dir(self):
         if not self.current_project:
             raise ValueError("No project is currently active")
@@ -154,6 +289,16 @@ class ProjectModel:
             raise ValueError("No project is currently active")
         return os.path.join(self.get_project_dir(), "output", category)
 
+    def get_cache_dir(self):
+        if not self.current_project:
+            raise ValueError("No project is currently active")
+        return os.path.join(self.get_project_dir(), "cache", "pcm")
+
+    def get_media_index_path(self):
+        if not self.current_project:
+            raise ValueError("No project is currently active")
+        return os.path.join(self.get_project_dir(), "cache", "media_index.sqlite")
+
     def get_project_dir(self):
         if not self.current_project:
             raise ValueError("No project is currently active")
@@ -166,12 +311,12 @@ class ProjectModel:
         if self.is_file_in_output_directory(file_path):
             return file_path
         
-        # Load the audio file
-        audio = AudioSegment.from_file(file_path)
+        # Read the sample rate from the header; only decode if we have to resample
+        sample_rate = probe_audio_file(file_path)['sample_rate']
         
         # Check if the sample rate is either 44.1kHz or 48kHz
-        if audio.frame_rate not in [44100, 48000]:
-            raise ValueError(f"Unsupported sample rate: {audio.frame_rate}Hz. Only 44.1kHz and 48kHz are supported.")
+        if sample_rate not in [44100, 48000]:
+            raise ValueError(f"Unsupported sample rate: {sample_rate}Hz. Only 44.1kHz and 48kHz are supported.")
         
         audio_files_dir = self.get_audio_files_dir()
         file_name = os.path.basename(file_path)
@@ -180,15 +325,16 @@ class ProjectModel:
         os.makedirs(audio_files_dir, exist_ok=True)
         
         # Resample if necessary
-        if audio.frame_rate == 48000:
+        if sample_rate == 48000:
             print(f"Resampling {file_name} from 48kHz to 44.1kHz")
-            audio = audio.set_frame_rate(44100)
+            audio = AudioSegment.from_file(file_path).set_frame_rate(44100)
             audio.export(destination, format="wav")
         else:
             # If it's already 44.1kHz, just copy the file
             shutil.copy2(file_path, destination)
         
         print(f"File imported to: {destination}")
+        self.media_index.record(destination)
         self.new_audio_files.add(destination)
         return destination
     
@@ -240,8 +386,13 @@ class ProjectModel:
         if os.path.exists(new_path):
             raise ValueError("A project with this name already exists")
         
+        # Let queued writes land before the directory moves away under them
+        self.writer.flush(wait=True)
+        self.media_index.close()
         os.rename(old_path, new_path)
         self.current_project = new_name
+        self.timeline_model.set_cache_dir(self.get_cache_dir())
+        self.media_index.open(self.get_media_index_path())
         self.metadata["name"] = new_name
         self.save_project_metadata()
 
@@ -250,6 +401,9 @@ class ProjectModel:
             raise ValueError("No project is currently active")
         
         project_path = self.get_project_dir()
+        self.writer.discard(project_path)
+        self.writer.flush(wait=True)
+        self.media_index.open(None)
         shutil.rmtree(project_path)
         self.current_project = None
         self.metadata = {}
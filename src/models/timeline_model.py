@@ -1,25 +1,42 @@
 # timeline_model.py
-import pyaudio
+import os
+import tempfile
 import numpy as np
 import time
 import logging
 import threading
-import sounddevice as sd
-from pydub import AudioSegment
 from utils.audio_clip import AudioClip
 from utils.audio_buffer_manager import AudioBufferManager
+from utils.clip_index import ClipIndex
+from utils.pcm_cache import PCMCache
+from utils.audio_cache import AudioCache
+from utils.media_index import MediaIndex
+from utils.edit_history import (EditHistory, AddClipCommand, RemoveClipCommand, MoveClipCommand,
+                                TrackPropertyCommand)
 
 
 class TimelineModel:
-    def __init__(self):
+    def __init__(self, config=None):
+        self.config = config or {}
         self.tracks = []
         self.is_playing = False
         self.playhead_position = 0
         self.start_time = 0
         self.audio_stream = None
         self.active_clips = []
-        self.audio_cache = {}
-        self.cache_lock = threading.Lock()
+        settings = self.config.get('settings', {})
+        self.pcm_cache = PCMCache(
+            os.path.join(tempfile.gettempdir(), 'ai_audio_creator', 'pcm'),
+            sample_rate=44100,
+            channels=2
+        )
+        self.audio_cache = AudioCache(
+            self._load_decoded_audio,
+            budget_bytes=int(settings.get('audio_cache_budget_mb', 1024) * 1024 * 1024),
+            distance_fn=self._get_playhead_distances
+        )
+        self.clip_indexes = {}  # id(track) -> (track, ClipIndex)
+        self.media_index = MediaIndex()
         self.stop_event = threading.Event()
         self.state_lock = threading.Lock()
         self.is_stopping = False
@@ -30,11 +47,17 @@ class TimelineModel:
         self.max_playhead_position = 1800
         self.quantization_interval = 1 / 44100
 
-        self.undo_stack = []
-        self.redo_stack = []
+        self.history = EditHistory(
+            max_depth=settings.get('undo_depth', 100),
+            max_bytes=int(settings.get('undo_memory_mb', 16) * 1024 * 1024)
+        )
         self.is_modified = False
 
-        self.buffer_manager = AudioBufferManager(self, buffer_size=2048)
+        self.buffer_manager = AudioBufferManager(
+            self,
+            buffer_size=2048,
+            lookahead_blocks=settings.get('playback_lookahead_blocks', 8)
+        )
 
     def add_state_change_callback(self, callback):
         self.state_change_callbacks.append(callback)
@@ -55,10 +78,13 @@ class TimelineModel:
                 self.is_playing = True
                 self.stop_event.clear()
 
+            # Imported here so headless rendering never needs an audio device library
+            import sounddevice as sd
+
             self._notify_state_change(True, self.playhead_position)
             self.buffer_manager.is_playing = True
-            self.buffer_manager.reset()
-            self.buffer_manager.playhead_position = self.playhead_position
+            self.buffer_manager.update_playhead(self.playhead_position)
+            self.buffer_manager.start()
             self.start_time = time.time() - self.playhead_position
 
             def audio_callback(outdata, frames, time, status):
@@ -76,7 +102,6 @@ class TimelineModel:
                     
                     data, _ = self.buffer_manager.get_audio_data(None, frames, None, None)
                     outdata[:] = data
-                    self.update_playhead()
                 except Exception as e:
                     logging.error(f"Error in audio callback: {str(e)}")
                     raise sd.CallbackStop
@@ -102,18 +127,22 @@ class TimelineModel:
             with self.state_lock:
                 if not self.is_playing or self.is_stopping:
                     return
+                self.update_playhead()  # Keep the position the audio actually reached
                 self.is_stopping = True
                 self.is_playing = False  # Set this early to stop audio callback
 
             # Signal stop to all components
             self.stop_event.set()
             self.buffer_manager.is_playing = False
+            self.buffer_manager.stop()
             
             # Start cleanup in a separate thread
             threading.Thread(target=self._cleanup_audio_stream, daemon=True).start()
             
             # Notify state change immediately
             self._notify_state_change(False, self.playhead_position)
+            logging.info(f"Playback stats: {self.buffer_manager.get_stats()}, "
+                         f"decoded audio cache: {self.get_cache_stats()}")
             
         except Exception as e:
             logging.error(f"Error in stop_timeline: {str(e)}")
@@ -151,8 +180,10 @@ class TimelineModel:
             # Set flags first
             self.stop_event.set()
             self.buffer_manager.is_playing = False
+            self.buffer_manager.stop()
             
             with self.state_lock:
+                self.update_playhead()
                 self.is_playing = False
                 self.is_stopping = False
             
@@ -175,49 +206,78 @@ class TimelineModel:
         threading.Thread(target=self._preload_audio_files_thread, daemon=True).start()
 
     def _preload_audio_files_thread(self):
-        for track in self.tracks:
-            for clip in track['clips']:
-                self._cache_audio_file(clip.file_path)
+        # Warm the cache nearest-first around the playhead and stop once the
+        # budget is used up; everything else is mapped on demand during playback
+        distances = self._get_playhead_distances(
+            {clip.file_path for track in self.tracks for clip in track['clips']})
+        for file_path in sorted(distances, key=distances.get):
+            if self.audio_cache.is_full():
+                break
+            self._cache_audio_file(file_path)
+
+    def _get_playhead_distances(self, file_paths):
+        """Return the distance in seconds from the playhead to the nearest use of each file"""
+        position = self.get_playhead_position()
+        wanted = set(file_paths)
+        distances = {}
+        for track in list(self.tracks):
+            for clip in list(track['clips']):
+                if clip.file_path not in wanted:
+                    continue
+                if clip.x <= position <= clip.x + clip.duration:
+                    distance = 0.0
+                else:
+                    distance = min(abs(clip.x - position), abs(clip.x + clip.duration - position))
+                distances[clip.file_path] = min(distance, distances.get(clip.file_path, float('inf')))
+        # Files no clip uses any more are the first to go
+        for file_path in wanted:
+            distances.setdefault(file_path, float('inf'))
+        return distances
+
+    def set_cache_dir(self, cache_dir):
+        """Point the decoded-PCM cache at a project's cache directory"""
+        self.pcm_cache.set_cache_dir(cache_dir)
+        self.audio_cache.clear()
+
+    def set_cache_budget(self, budget_mb):
+        self.audio_cache.set_budget(int(budget_mb * 1024 * 1024))
+
+    def get_cache_stats(self):
+        """Return hit/miss/eviction statistics for the decoded audio cache"""
+        return self.audio_cache.get_stats()
+
+    def _load_decoded_audio(self, file_path):
+        try:
+            # Memory-mapped; decoding only happens if the disk cache is cold
+            samples = self.pcm_cache.get(file_path)
+            logging.info(f"Cached audio file: {file_path}")
+            return samples
+        except Exception as e:
+            logging.error(f"Error caching audio file {file_path}: {str(e)}")
+            return None
 
     def _cache_audio_file(self, file_path):
-        if file_path not in self.audio_cache:
-            try:
-                audio = AudioSegment.from_file(file_path)
-                if audio.frame_rate != self.target_sample_rate:
-                    logging.info(f"Converting {file_path} from {audio.frame_rate}Hz to {self.target_sample_rate}Hz")
-                    audio = audio.set_frame_rate(self.target_sample_rate)
-                    audio.export(file_path, format="wav")
-                    audio = AudioSegment.from_file(file_path)  # Reload the converted file
-                
-                samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
-                samples = samples.reshape((-1, 2)) if audio.channels == 2 else np.column_stack((samples, samples))
-                
-                with self.cache_lock:
-                    self.audio_cache[file_path] = {
-                        'samples': samples / 32768.0,
-                        'duration': len(audio) / 1000.0
-                    }
-                logging.info(f"Cached audio file: {file_path}")
-            except Exception as e:
-                logging.error(f"Error caching audio file {file_path}: {str(e)}")
+        return self.audio_cache.get(file_path)
+
+    def get_clip_samples(self, clip):
+        """Return the whole decoded (memory-mapped) sample array for ``clip``"""
+        return self.audio_cache.get(clip.file_path)
 
     def get_clip_frames(self, clip, start_time, duration):
-        with self.cache_lock:
-            if clip.file_path not in self.audio_cache:
-                self._cache_audio_file(clip.file_path)
-            
-            cached_data = self.audio_cache[clip.file_path]
+        cached_samples = self.audio_cache.get(clip.file_path)
+        if cached_samples is None:
+            return None
 
         start_sample = int(round(start_time * self.sample_rate))
         end_sample = int(round((start_time + duration) * self.sample_rate))
 
-        if end_sample > len(cached_data['samples']):
+        if end_sample > len(cached_samples):
             samples = np.zeros((end_sample - start_sample, 2), dtype=np.float32)
-            available_samples = len(cached_data['samples']) - start_sample
+            available_samples = len(cached_samples) - start_sample
             if available_samples > 0:
-                samples[:available_samples] = cached_data['samples'][start_sample:start_sample + available_samples]
+                samples[:available_samples] = cached_samples[start_sample:start_sample + available_samples]
         else:
-            samples = cached_data['samples'][start_sample:end_sample]
+            samples = cached_samples[start_sample:end_sample]
 
         return samples
 
@@ -232,6 +292,41 @@ class TimelineModel:
         if self.is_playing:
             self.active_clips = self.get_active_clips(active_tracks)
 
+    def set_media_index(self, media_index):
+        self.media_index = media_index
+
+    def create_clip(self, file_path, x, index=None, duration=None, info=None):
+        """Create an AudioClip from the media index instead of re-reading the file"""
+        if info is None:
+            info = self.media_index.get(file_path)
+        return AudioClip(file_path, x, index=index,
+                         duration=info['duration'] if duration is None else duration,
+                         prompt=info['comments'].get('Prompt'))
+
+    def get_clip_index(self, track):
+        """Return the interval index for ``track``, rebuilding it if it went stale"""
+        entry = self.clip_indexes.get(id(track))
+        if entry is None or entry[0] is not track or len(entry[1]) != len(track['clips']):
+            entry = (track, ClipIndex(track['clips']))
+            self.clip_indexes[id(track)] = entry
+        return entry[1]
+
+    def get_clips_in_range(self, track, start_time, end_time):
+        """Return the clips of ``track`` overlapping [start_time, end_time)"""
+        return self.get_clip_index(track).query(start_time, end_time)
+
+    def get_clips_at(self, track, time):
+        """Return the clips of ``track`` that contain ``time``"""
+        return self.get_clip_index(track).query_point(time)
+
+    def get_end_time(self, tracks=None):
+        """Return the end time of the last clip on ``tracks`` (all tracks by default)"""
+        tracks = self.tracks if tracks is None else tracks
+        return max((self.get_clip_index(track).end_time() for track in tracks), default=0.0)
+
+    def invalidate_clip_indexes(self):
+        self.clip_indexes.clear()
+
     def add_track(self, track_data):
         # Initialize track with volume in decibels (0 dB by default)
         if 'volume_db' not in track_data:
@@ -244,12 +339,14 @@ class TimelineModel:
 
     def rename_track(self, track_index, new_name):
         if 0 <= track_index < len(self.tracks):
-            self.tracks[track_index]['name'] = new_name
-            self.is_modified = True
+            self.set_track_property(self.tracks[track_index], 'name', new_name)
 
     def remove_track(self, track_index):
         if 0 <= track_index < len(self.tracks):
+            self.clip_indexes.pop(id(self.tracks[track_index]), None)
             del self.tracks[track_index]
+            # Removing a track deletes its audio files, so older edits can't be replayed
+            self.history.clear()
             self.is_modified = True
 
     def add_clip_to_track(self, track_index, clip):
@@ -266,19 +363,20 @@ class TimelineModel:
         insert_position = next((i for i, existing_clip in enumerate(track['clips']) 
                                 if getattr(existing_clip, 'index', float('inf')) > clip.index), 
                             len(track['clips']))
-        track['clips'].insert(insert_position, clip)
-        self.buffer_manager.reset()
-        self.set_modified(True)
+        self._insert_clip(track, clip, insert_position)
+        self.history.push(AddClipCommand(track, clip, insert_position))
 
     def remove_clip_from_track(self, track_index, clip_index):
         if 0 <= track_index < len(self.tracks):
             if 0 <= clip_index < len(self.tracks[track_index]['clips']):
                 del self.tracks[track_index]['clips'][clip_index]
                 self.is_modified = True
-        self.buffer_manager.reset()
+        self.buffer_manager.invalidate()
 
     def clear_tracks(self):
         self.tracks.clear()
+        self.clip_indexes.clear()
+        self.history.clear()
         self.is_modified = True
 
     def get_tracks(self):
@@ -290,6 +388,8 @@ class TimelineModel:
             if 'volume_db' not in track:
                 track['volume_db'] = 0.0  # Default to 0 dB
         self.tracks = tracks_data
+        self.clip_indexes.clear()
+        self.history.clear()
         self.is_modified = True
 
     def mark_as_saved(self):
@@ -302,12 +402,22 @@ class TimelineModel:
             self.tracks[track_index]["mute"] = track.get("mute", False)
             self.is_modified = True
 
-    def update_track_volume(self, track):
+    def update_track_volume(self, track, volume_db=None):
         track_index = self.get_track_index(track)
         if 0 <= track_index < len(self.tracks):
             # Update volume in decibels
-            self.tracks[track_index]["volume_db"] = track.get("volume_db", 0.0)
-            self.is_modified = True
+            if volume_db is None:
+                volume_db = track.get("volume_db", 0.0)
+            self.set_track_property(self.tracks[track_index], "volume_db", volume_db)
+
+    def set_track_property(self, track, key, value):
+        """Change one track property (name, solo, mute, volume_db) and record it for undo"""
+        defaults = {'solo': False, 'mute': False, 'volume_db': 0.0}
+        old_value = track.get(key, defaults.get(key))
+        if old_value == value:
+            return
+        self._set_track_property(track, key, value)
+        self.history.push(TrackPropertyCommand(track, key, old_value, value))
 
     def db_to_amplitude(self, db):
         """Convert decibels to amplitude multiplier"""
@@ -317,17 +427,15 @@ class TimelineModel:
 
     def update_playhead(self):
         if self.is_playing:
-            self.playhead_position = time.time() - self.start_time
-            # Notify the view to update the playhead position
-            if hasattr(self, 'on_playhead_update'):
-                self.on_playhead_update(self.playhead_position)
+            self.playhead_position = self.buffer_manager.playhead_position
 
     def quantize_position(self, position):
         return round(position / self.quantization_interval) * self.quantization_interval
 
     def get_playhead_position(self):
         if self.is_playing:
-            return time.time() - self.start_time
+            # Published by the audio callback from the frames actually handed to the device
+            return self.buffer_manager.playhead_position
         return self.playhead_position
 
     def set_playhead_position(self, position):
@@ -344,21 +452,64 @@ class TimelineModel:
 
     def remove_clip_from_track(self, track_index, clip):
         if 0 <= track_index < len(self.tracks):
-            if clip in self.tracks[track_index]['clips']:
-                self.tracks[track_index]['clips'].remove(clip)
-                self.is_modified = True
-                # Remove the clip from active_clips if it's there
-                self.active_clips = [(c, t) for c, t in self.active_clips if c != clip]
+            track = self.tracks[track_index]
+            if clip in track['clips']:
+                position = self._remove_clip(track, clip)
+                self.history.push(RemoveClipCommand(track, clip, position))
+
+    def remove_clips_for_file(self, file_path):
+        """Remove every clip playing ``file_path`` without recording history, as the file is gone"""
+        for track in self.tracks:
+            for clip in [clip for clip in track['clips'] if clip.file_path == file_path]:
+                self._remove_clip(track, clip)
+        # Older edits of these clips can't be replayed either
+        self.history.forget_file(file_path)
 
     def move_clip(self, clip, new_x, old_track_index, new_track_index):
         if 0 <= old_track_index < len(self.tracks) and 0 <= new_track_index < len(self.tracks):
-            if clip in self.tracks[old_track_index]['clips']:
-                self.tracks[old_track_index]['clips'].remove(clip)
-                self.tracks[new_track_index]['clips'].append(clip)
-                clip.x = max(0, new_x)
-                self.is_modified = True
+            old_track = self.tracks[old_track_index]
+            new_track = self.tracks[new_track_index]
+            if clip in old_track['clips']:
+                old_x = clip.x
+                self._move_clip(clip, old_track, new_track, max(0, new_x))
+                self.history.push(MoveClipCommand(clip, old_track, old_x, new_track, clip.x))
                 return True
         return False
+
+    # The edits below are shared by the public methods and by undo/redo; they never touch the history
+
+    def _insert_clip(self, track, clip, position):
+        track['clips'].insert(position, clip)
+        self.get_clip_index(track).add(clip)
+        self.buffer_manager.invalidate()
+        self.is_modified = True
+
+    def _remove_clip(self, track, clip):
+        """Remove ``clip`` from ``track`` and return the list position it had"""
+        clip_index = self.get_clip_index(track)
+        position = track['clips'].index(clip)
+        del track['clips'][position]
+        clip_index.remove(clip)
+        self.buffer_manager.invalidate()
+        self.is_modified = True
+        # Remove the clip from active_clips if it's there
+        self.active_clips = [(c, t) for c, t in self.active_clips if c != clip]
+        return position
+
+    def _move_clip(self, clip, old_track, new_track, new_x):
+        old_index = self.get_clip_index(old_track)
+        new_index = self.get_clip_index(new_track)
+        old_track['clips'].remove(clip)
+        old_index.remove(clip)
+        clip.x = new_x
+        new_track['clips'].append(clip)
+        new_index.add(clip)
+        self.buffer_manager.invalidate()
+        self.is_modified = True
+
+    def _set_track_property(self, track, key, value):
+        track[key] = value
+        self.is_modified = True
     
     def get_active_tracks(self):
         solo_tracks = [track for track in self.tracks if track.get("solo", False)]
@@ -374,7 +525,8 @@ class TimelineModel:
                 serializable_clips.append({
                     'file_path': clip.file_path,
                     'x': clip.x,
-                    'duration': clip.duration
+                    'duration': clip.duration,
+                    'index': clip.index
                 })
             serializable_tracks.append({
                 'name': track['name'],
@@ -387,10 +539,16 @@ class TimelineModel:
 
     def load_from_serializable(self, serializable_tracks):
         self.tracks = []
+        infos = {}  # file_path -> media index entry; clips often share files
         for track_data in serializable_tracks:
             clips = []
             for clip_data in track_data['clips']:
-                clips.append(AudioClip(clip_data['file_path'], clip_data['x']))
+                file_path = clip_data['file_path']
+                info = infos.get(file_path)
+                if info is None:
+                    info = infos[file_path] = self.media_index.get(file_path)
+                clips.append(self.create_clip(file_path, clip_data['x'], index=clip_data.get('index'),
+                                              duration=clip_data.get('duration'), info=info))
             self.tracks.append({
                 'name': track_data['name'],
                 'clips': clips,
@@ -398,6 +556,8 @@ class TimelineModel:
                 'mute': track_data.get('mute', False),
                 'volume_db': track_data.get('volume_db', 0.0)  # Load volume in dB
             })
+        self.clip_indexes.clear()
+        self.history.clear()
         self.is_modified = False
 
     def __del__(self):
@@ -411,32 +571,10 @@ class TimelineModel:
     def set_modified(self, value):
         self.is_modified = value
 
-    def save_state(self):
-        state = {
-            'tracks': self.get_serializable_tracks(),
-            'playhead_position': self.playhead_position
-        }
-        self.undo_stack.append(state)
-        self.redo_stack.clear()
-
     def undo(self):
-        if self.undo_stack:
-            current_state = {
-                'tracks': self.get_serializable_tracks(),
-                'playhead_position': self.playhead_position
-            }
-            self.redo_stack.append(current_state)
-            previous_state = self.undo_stack.pop()
-            self.load_from_serializable(previous_state['tracks'])
-            self.set_playhead_position(previous_state['playhead_position'])
+        """Revert the most recent edit; returns False if there was nothing to undo"""
+        return self.history.undo(self) is not None
 
     def redo(self):
-        if self.redo_stack:
-            current_state = {
-                'tracks': self.get_serializable_tracks(),
-                'playhead_position': self.playhead_position
-            }
-            self.undo_stack.append(current_state)
-            next_state = self.redo_stack.pop()
-            self.load_from_serializable(next_state['tracks'])
-            self.set_playhead_position(next_state['playhead_position'])
+        """Re-apply the most recently undone edit; returns False if there was nothing to redo"""
+        return self.history.redo(self) is not None
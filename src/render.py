@@ -0,0 +1,95 @@
+"""Headless timeline renderer.
+
+Usage: python -m src.render <project_dir> [-o OUTPUT] [--format FORMAT] [--workers N]
+
+Loads a project's timeline (timeline_data.json or .npz) without any GUI, audio device or pygame
+imports, mixes it with the streaming export engine and exits non-zero if any
+referenced media file is missing or the render fails.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+# Modules inside src import each other absolutely (``from models...``)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config_manager import load_config
+from models.project_model import ProjectModel
+from utils import timeline_store
+from utils.timeline_renderer import TimelineRenderer, ParallelTimelineRenderer
+
+
+def find_missing_media(project_dir):
+    serializable_tracks = timeline_store.load_timeline(timeline_store.find_timeline_file(project_dir))
+    return sorted({clip_data['file_path']
+                   for track_data in serializable_tracks
+                   for clip_data in track_data['clips']
+                   if not os.path.exists(clip_data['file_path'])})
+
+
+def load_project(project_dir, config=None):
+    project_dir = os.path.abspath(project_dir)
+    project_model = ProjectModel(os.path.dirname(project_dir), config)
+    project_model.load_project(os.path.basename(project_dir))
+    return project_model
+
+
+def create_renderer(timeline_model, workers=None):
+    if workers == 1:
+        return TimelineRenderer(timeline_model)
+    return ParallelTimelineRenderer(timeline_model, workers=workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a project timeline without the GUI.")
+    parser.add_argument("project_dir", help="Project directory containing timeline_data.json or timeline_data.npz")
+    parser.add_argument("-o", "--output", help="Output file (default: <project_dir>/<project>.mp3)")
+    parser.add_argument("--format", default=None,
+                        help="soundfile format name, e.g. MP3, WAV, FLAC (default: from the extension)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Render processes; 1 renders in-process (default: settings.export_workers)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(name)s - %(message)s')
+
+    project_dir = os.path.abspath(args.project_dir)
+    if timeline_store.find_timeline_file(project_dir) is None:
+        print(f"Error: no timeline data in {project_dir}", file=sys.stderr)
+        return 1
+
+    missing = find_missing_media(project_dir)
+    if missing:
+        print(f"Error: {len(missing)} media file(s) missing:", file=sys.stderr)
+        for file_path in missing:
+            print(f"  {file_path}", file=sys.stderr)
+        return 1
+
+    config = load_config()
+    workers = args.workers if args.workers is not None else config.get('settings', {}).get('export_workers')
+    output_path = args.output or os.path.join(project_dir, f"{os.path.basename(project_dir)}.mp3")
+
+    try:
+        load_start = time.perf_counter()
+        project_model = load_project(project_dir, config)
+        load_time = time.perf_counter() - load_start
+
+        render_start = time.perf_counter()
+        renderer = create_renderer(project_model.timeline_model, workers)
+        frames = renderer.export(output_path, format=args.format)
+        render_time = time.perf_counter() - render_start
+    except Exception as e:
+        logging.error(f"Error rendering {project_dir}: {str(e)}", exc_info=True)
+        print(f"Error: failed to render {project_dir}: {str(e)}", file=sys.stderr)
+        return 1
+
+    duration = frames / project_model.timeline_model.sample_rate
+    speed = duration / render_time if render_time > 0 else 0.0
+    print(f"Loaded {project_dir} in {load_time:.2f}s")
+    print(f"Rendered {duration:.1f}s of audio to {output_path} in {render_time:.2f}s ({speed:.1f}x realtime)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
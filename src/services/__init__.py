@@ -1,6 +1,9 @@
+from .generation_cache import GenerationCache
+from .http_client import HttpClient
 from .llm_service import LLMService
 from .music_service import MusicService
 from .sfx_service import SFXService
 from .speech_service import SpeechService
+from .voice_catalog import VoiceCatalog
 
-__all__ = ['LLMService', 'MusicService', 'SFXService', 'SpeechService']
\ No newline at end of file
+__all__ = ['GenerationCache', 'HttpClient', 'LLMService', 'MusicService', 'SFXService', 'SpeechService', 'VoiceCatalog']
\ No newline at end of file
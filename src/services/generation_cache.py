@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+
+
+class GenerationCache:
+    """Shared store of generated audio keyed by the request that produced it.
+
+    A request key hashes the provider and every parameter that affects the
+    audio (model, voice, voice settings, text or prompt, duration, output
+    format). The audio itself is stored once by its SHA-256 under
+    ``objects/``. A SQLite table maps request keys to objects, so identical
+    lines from another run or another project reuse the same file. Hits are
+    hardlinked into the project's output directory, and copied if the link
+    crosses devices, so a cached clip costs no extra disk space. The least
+    recently used entries are evicted once the store exceeds ``max_bytes``.
+    An entry is dropped if its object was modified, e.g. through a hardlinked
+    project file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS generations (
+            key TEXT PRIMARY KEY,
+            provider TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            created REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 * 1024 * 1024, enabled=True):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.connection = None
+        if enabled:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            self.connection = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+            self.connection.execute(self.SCHEMA)
+            self.connection.commit()
+
+    @classmethod
+    def get_instance(cls, config=None):
+        """Return the shared cache, configured from ``config['settings']`` on first use"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                settings = (config or {}).get('settings', {})
+                try:
+                    cls._instance = cls(settings.get('generation_cache_dir', './cache/generations'),
+                                        max_bytes=int(settings.get('generation_cache_max_mb', 2048)) * 1024 * 1024,
+                                        enabled=settings.get('generation_cache_enabled', True))
+                except (OSError, sqlite3.Error) as e:
+                    logging.error(f"Error opening generation cache, caching disabled: {str(e)}")
+                    cls._instance = cls(None, enabled=False)
+            return cls._instance
+
+    @staticmethod
+    def make_key(provider, **params):
+        payload = json.dumps({'provider': provider, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + '.mp3')
+
+    def lookup(self, key):
+        """Return ``(object_path, filename)`` for a cached request, or None"""
+        if not self.enabled:
+            return None
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT digest, filename, size, mtime_ns FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                digest, filename, size, mtime_ns = row
+                object_path = self.get_object_path(digest)
+                try:
+                    stat = os.stat(object_path)
+                except OSError:
+                    stat = None
+                if stat is not None and stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                    self.connection.execute(
+                        "UPDATE generations SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+                    self.connection.commit()
+                    self.stats['hits'] += 1
+                    return object_path, filename
+                self.logger.warning(f"Dropping stale generation cache entry {key[:12]}")
+                self._delete_entry(key, digest)
+            self.stats['misses'] += 1
+            return None
+
+    def store(self, key, provider, file_path):
+        """Add the generated ``file_path`` to the store under ``key``"""
+        if not self.enabled or not file_path or not os.path.exists(file_path):
+            return
+        try:
+            digest = self._hash_file(file_path)
+            object_path = self.get_object_path(digest)
+            with self.lock:
+                if not os.path.exists(object_path):
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    self._link_or_copy(file_path, object_path)
+                stat = os.stat(object_path)
+                now = time.time()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (key, provider, digest, os.path.basename(file_path), stat.st_size, stat.st_mtime_ns, now, now))
+                self.connection.commit()
+                self.stats['stores'] += 1
+                self._evict()
+        except (OSError, sqlite3.Error) as e:
+            self.logger.error(f"Error storing {file_path} in generation cache: {str(e)}")
+
+    def materialize(self, object_path, target_path):
+        """Place a cached object at ``target_path`` (hardlink, or copy across devices)"""
+        os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+        temp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._link_or_copy(object_path, temp_path)
+        os.replace(temp_path, target_path)
+        return target_path
+
+    def get_stats(self):
+        stats = dict(self.stats, entries=0, objects=0, bytes=0, max_bytes=self.max_bytes)
+        if not self.enabled:
+            return stats
+        with self.lock:
+            stats['entries'] = self.connection.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+            stats['objects'], stats['bytes'] = self._get_object_usage()
+        return stats
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.connection.execute("DELETE FROM generations")
+            self.connection.commit()
+            shutil.rmtree(self.objects_dir, ignore_errors=True)
+            os.makedirs(self.objects_dir, exist_ok=True)
+
+    def _get_object_usage(self):
+        row = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM "
+            "(SELECT digest, MAX(size) AS size FROM generations GROUP BY digest)").fetchone()
+        return row[0], row[1]
+
+    def _evict(self):
+        _, total = self._get_object_usage()
+        if total <= self.max_bytes:
+            return
+        rows = self.connection.execute(
+            "SELECT digest, MAX(last_used), MAX(size) FROM generations GROUP BY digest ORDER BY MAX(last_used)"
+        ).fetchall()
+        for digest, _, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM generations WHERE digest = ?", (digest,))
+            self._remove_object(digest)
+            total -= size
+            self.stats['evictions'] += 1
+        self.connection.commit()
+
+    def _delete_entry(self, key, digest):
+        self.connection.execute("DELETE FROM generations WHERE key = ?", (key,))
+        if not self.connection.execute("SELECT 1 FROM generations WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            self._remove_object(digest)
+        self.connection.commit()
+
+    def _remove_object(self, digest):
+        try:
+            os.remove(self.get_object_path(digest))
+        except OSError:
+            pass
+
+    def _hash_file(self, file_path):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _link_or_copy(self, source, target):
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
@@ -0,0 +1,101 @@
+import time
+import random
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+class HttpClient:
+    """Process-wide HTTP transport shared by all providers.
+
+    A single ``requests.Session`` keeps a pool of keep-alive connections per
+    host, so repeated API calls skip the TCP and TLS handshakes, and the pool
+    is sized for concurrent generation workers. Every request gets a default
+    (connect, read) timeout. Idempotent requests are retried with jittered
+    exponential backoff (honouring ``Retry-After``) on connection errors,
+    timeouts and 429/5xx. Other methods, e.g. paid generation POSTs, are only
+    retried when nothing reached the server (connect failures) or on 429;
+    anything else is left to the caller.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, timeout=(10, 120), max_retries=2, backoff_base=0.5, backoff_max=8.0, pool_size=16):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @classmethod
+    def get_instance(cls, config=None):
+        """Return the shared client, configured from ``config['settings']`` on first use"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                settings = (config or {}).get('settings', {})
+                cls._instance = cls(timeout=(settings.get('http_connect_timeout', 10),
+                                             settings.get('http_read_timeout', 120)),
+                                    max_retries=settings.get('http_max_retries', 2),
+                                    pool_size=settings.get('http_pool_size', 16))
+            return cls._instance
+
+    def request(self, method, url, timeout=None, max_retries=None, **kwargs):
+        """Send a request through the pooled session; the caller still checks the status"""
+        method = method.upper()
+        retries = self.max_retries if max_retries is None else max_retries
+        kwargs.setdefault('timeout', self.timeout if timeout is None else timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= retries or (method not in IDEMPOTENT_METHODS and not self._was_not_sent(e)):
+                    raise
+                delay = self._get_backoff(attempt)
+                self.logger.warning(f"{method} {url} failed ({str(e)}); retrying in {delay:.1f}s")
+            else:
+                # A POST that failed with 5xx may already have been processed (and billed); only 429 is safe
+                retryable = RETRY_STATUS_CODES if method in IDEMPOTENT_METHODS else (429,)
+                if response.status_code not in retryable or attempt >= retries:
+                    return response
+                delay = self._get_retry_after(response) or self._get_backoff(attempt)
+                self.logger.warning(f"{method} {url} returned {response.status_code}; retrying in {delay:.1f}s")
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def _was_not_sent(self, error):
+        """True if the connection failed before any of the request reached the server"""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def _get_backoff(self, attempt):
+        return min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _get_retry_after(self, response):
+        try:
+            return min(self.backoff_max * 4, float(response.headers.get('Retry-After', 0))) or None
+        except (TypeError, ValueError):
+            return None
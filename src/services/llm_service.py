@@ -3,12 +3,15 @@ import logging
 import threading
 import os
 import json
-import requests
+from services.http_client import HttpClient
 
 class LLMService:
     def __init__(self, config, status_update_callback, output_update_callback):
         self.config = config
         self.client = OpenAI(api_key=self.config['api']['openai_api_key'])
+        self.http = HttpClient.get_instance(config)
+        # Long script analyses can take minutes; POST read timeouts are not retried
+        self.read_timeout = self.config.get('settings', {}).get('llm_read_timeout', 600)
         self.prompts_config = self.load_prompts_config()
         self.logger = logging.getLogger(__name__)
         self.status_update_callback = status_update_callback
@@ -105,7 +108,7 @@ class LLMService:
     def process_with_openrouter(self, messages):
         """Process the request using OpenRouter API"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 url="https://openrouter.ai/api/v1/chat/completions",
                 headers={
                     "Authorization": f"Bearer {self.config['api']['openrouter_api_key']}",
@@ -117,7 +120,8 @@ class LLMService:
                     "messages": messages,
                     "temperature": 0.7,
                     "max_tokens": 500
-                }
+                },
+                timeout=(self.http.timeout[0], self.read_timeout)
             )
             response.raise_for_status()
             return response.json()['choices'][0]['message']['content']
@@ -2,19 +2,31 @@ import os
 import time
 import requests
 import re
-import subprocess
 import logging
 from mutagen.id3 import ID3, TIT2, COMM
 from mutagen.mp3 import MP3
 from pydub import AudioSegment
+from services.http_client import HttpClient
+from services.generation_cache import GenerationCache
+from services.suno_sidecar import SunoSidecar
+from utils.file_utils import replace_atomically
+from utils.generation_scheduler import is_rate_limit_error
 
 class MusicService:
     def __init__(self, config, status_update_callback):
         self.config = config
         self.base_url = self.config['api']['base_url']
+        self.http = HttpClient.get_instance(config)
+        self.cache = GenerationCache.get_instance(config)
         self.output_dir = self.config['music_gen']['output_dir']
         self.logger = logging.getLogger(self.__class__.__name__)
         self.status_update_callback = status_update_callback
+        music_config = self.config['music_gen']
+        self.sidecar = SunoSidecar(music_config['api_directory'], self.base_url, self.http,
+                                   mode=music_config.get('api_mode', 'dev'),
+                                   startup_timeout=music_config.get('api_startup_timeout', 60),
+                                   restart_cooldown=music_config.get('api_restart_cooldown', 300),
+                                   status_callback=self.update_status)
 
     def update_output_directory(self, new_output_dir):
         self.output_dir = new_output_dir
@@ -24,46 +36,19 @@ class MusicService:
         if self.status_update_callback:
             self.status_update_callback(message)
 
-    def start_api(self):
-        """Start the API server."""
-        self.logger.info("Starting API server...")
-        self.update_status("Starting API server...")
-        api_process = subprocess.Popen(['npm', 'run', 'dev'], cwd=self.config['music_gen']['api_directory'])
-        
-        if self.wait_for_api_start():
-            self.logger.info("API started successfully.")
-            self.update_status("API started successfully.")
-            return api_process
-        else:
-            self.logger.error("Failed to start API server.")
-            self.update_status("Failed to start API server.")
-            api_process.terminate()
-            return None
-
-    def wait_for_api_start(self, timeout=30, interval=0.5):
-        """Wait for the API to start and become responsive."""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                response = requests.get(f'{self.base_url}/api/get_limit', timeout=1)
-                if response.status_code == 200:
-                    return True
-            except requests.RequestException:
-                pass
-            time.sleep(interval)
-        return False
-    
     def generate_audio_by_prompt(self, payload):
         """Generate audio based on the given prompt."""
         url = f"{self.base_url}/api/generate"
         try:
-            response = requests.post(url, json=payload, headers={'Content-Type': 'application/json'})
+            response = self.http.post(url, json=payload, headers={'Content-Type': 'application/json'})
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             error_msg = f"Failed to generate audio: {str(e)}"
             self.logger.error(error_msg)
             self.update_status(error_msg)
+            if is_rate_limit_error(e):
+                raise  # rate limits are retried by the caller (see GenerationScheduler)
             return None
 
     def get_audio_information(self, audio_ids):
@@ -72,13 +57,15 @@ class MusicService:
         self.update_status("Fetching audio information...")
         url = f"{self.base_url}/api/get"
         try:
-            response = requests.get(url, params={'ids': audio_ids})
+            response = self.http.get(url, params={'ids': audio_ids})
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             error_msg = f"Failed to get audio information: {str(e)}"
             self.logger.error(error_msg)
             self.update_status(error_msg)
+            if is_rate_limit_error(e):
+                raise  # rate limits are retried by the caller (see GenerationScheduler)
             return None
 
     def download_audio(self, url, output_path):
@@ -86,11 +73,11 @@ class MusicService:
         self.logger.info("Downloading audio...")
         self.update_status("Downloading audio...")
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            with open(output_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
+            with self.http.get(url, stream=True) as response:
+                response.raise_for_status()
+                with open(output_path, 'wb') as file:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        file.write(chunk)
             return True
         except requests.RequestException as e:
             error_msg = f"Failed to download audio: {str(e)}"
@@ -98,18 +85,30 @@ class MusicService:
             self.update_status(error_msg)
             return False
 
-    def create_song(self, text_prompt, make_instrumental):
+    def create_song(self, text_prompt, make_instrumental, use_cache=True):
         """Create a song based on the text prompt."""
+        cache_key = GenerationCache.make_key('suno', prompt=text_prompt, make_instrumental=make_instrumental,
+                                             sample_rate=44100)
+        cached = self.cache.lookup(cache_key) if use_cache else None
+        if cached:
+            # Identical prompts reuse the stored song without starting the API server
+            object_path, filename = cached
+            self.logger.info("Reusing cached music for identical request...")
+            self.update_status("Reusing cached music for identical request...")
+            try:
+                return self.cache.materialize(object_path, os.path.join(self.output_dir, filename))
+            except OSError as e:
+                self.logger.error(f"Failed to reuse cached music: {str(e)}")
+
         self.logger.info("Starting music generation process...")
         self.update_status("Starting music generation process...")
-        api_process = self.start_api()
-        if api_process is None:
+        if not self.sidecar.ensure_running():
             self.logger.error("Failed to start API server.")
             self.update_status("Failed to start API server.")
             return None
 
-        self.logger.info("API started. Generating song...")
-        self.update_status("API started. Generating song...")
+        self.logger.info("API ready. Generating song...")
+        self.update_status("API ready. Generating song...")
 
         try:
             os.makedirs(self.output_dir, exist_ok=True)
@@ -150,25 +149,28 @@ class MusicService:
             self.logger.info("Audio ready. Downloading...")
             self.update_status("Audio ready. Downloading...")
             url = data[0]['audio_url']
-            if self.download_audio(url, output_filename):
-                self.convert_to_44100hz(output_filename)
-                self.add_id3_tag(output_filename, text_prompt, make_instrumental)
-                return output_filename
-            else:
-                raise Exception("Failed to download audio file")
+            # Build the song in a temp file: an existing file of the same title may be hardlinked to the cache
+            with replace_atomically(output_filename) as temp_path:
+                if not self.download_audio(url, temp_path):
+                    raise Exception("Failed to download audio file")
+                self.convert_to_44100hz(temp_path)
+                self.add_id3_tag(temp_path, text_prompt, make_instrumental)
+            self.cache.store(cache_key, 'suno', output_filename)
+            return output_filename
 
         except Exception as e:
             self.logger.error(str(e))
             self.update_status(str(e))
+            if is_rate_limit_error(e):
+                raise  # rate limits are retried by the caller (see GenerationScheduler)
             return None
         finally:
-            api_process.terminate()
             self.logger.info("Music generation process completed.")
             self.update_status("Music generation process completed.")
         
     def convert_to_44100hz(self, file_path):
         try:
-            audio = AudioSegment.from_file(file_path)
+            audio = AudioSegment.from_file(file_path, format="mp3")
             if audio.frame_rate != 44100:
                 self.logger.info(f"Converting {file_path} from {audio.frame_rate}Hz to 44100Hz")
                 audio = audio.set_frame_rate(44100)
@@ -202,6 +204,14 @@ class MusicService:
         except Exception as e:
             self.logger.error(f"Failed to add ID3 tag: {str(e)}")
             
-    def process_music_request(self, text_prompt: str, make_instrumental: bool):
+    def reset_api_server(self):
+        """Let the next request try to start the Suno API server again after repeated failures"""
+        self.sidecar.reset()
+
+    def shutdown(self):
+        """Stop the Suno API server if this app started it"""
+        self.sidecar.stop()
+
+    def process_music_request(self, text_prompt: str, make_instrumental: bool, use_cache: bool = True):
         """Process a music generation request."""
-        return self.create_song(text_prompt, make_instrumental)
+        return self.create_song(text_prompt, make_instrumental, use_cache)
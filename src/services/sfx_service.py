@@ -2,6 +2,9 @@ import os
 import re
 from elevenlabs.client import ElevenLabs
 import logging
+from services.generation_cache import GenerationCache
+from utils.file_utils import replace_atomically
+from utils.generation_scheduler import is_rate_limit_error
 from mutagen.id3 import ID3, TIT2, COMM
 from mutagen.mp3 import MP3
 
@@ -9,6 +12,7 @@ class SFXService:
     def __init__(self, config, status_update_callback):
         self.config = config
         self.elevenlabs = ElevenLabs(api_key=self.config['api']['elevenlabs_api_key'])
+        self.cache = GenerationCache.get_instance(config)
         self.output_dir = self.config['sfx_gen']['output_dir']
         self.logger = logging.getLogger(self.__class__.__name__)
         self.status_update_callback = status_update_callback
@@ -21,7 +25,7 @@ class SFXService:
         if self.status_update_callback:
             self.status_update_callback(message)
 
-    def generate_sound_effect(self, text_prompt: str, duration: float = None):
+    def generate_sound_effect(self, text_prompt: str, duration: float = None, use_cache: bool = True):
         self.logger.info("Initializing sound effect generation...")
 
         sanitized_text_prompt = re.sub(r'[\\/*?:"<>|]', "", text_prompt)
@@ -32,6 +36,13 @@ class SFXService:
             self.logger.info("Ensuring output directory exists...")
             os.makedirs(self.output_dir, exist_ok=True)
 
+            cache_key = GenerationCache.make_key('elevenlabs_sfx', text=sanitized_text_prompt, duration=duration,
+                                                 prompt_influence=0.5)
+            cached = self.cache.lookup(cache_key) if use_cache else None
+            if cached:
+                self.logger.info("Reusing cached sound effect for identical request...")
+                return self.cache.materialize(cached[0], output_path)
+
             self.logger.info("Sending request to ElevenLabs API...")
             self.update_status("Sending request to ElevenLabs API...")
             result = self.elevenlabs.text_to_sound_effects.convert(
@@ -42,14 +53,19 @@ class SFXService:
 
             self.logger.info("Receiving and writing audio data...")
             self.update_status("Receiving and writing audio data...")
-            with open(output_path, "wb") as f:
-                for chunk in result:
-                    f.write(chunk)
-            self.add_id3_tag(output_path, text_prompt, duration)
+            # Write to a private temp file and swap it in, so parallel requests for the same prompt never interleave
+            with replace_atomically(output_path) as temp_path:
+                with open(temp_path, "wb") as f:
+                    for chunk in result:
+                        f.write(chunk)
+                self.add_id3_tag(temp_path, text_prompt, duration)
+            self.cache.store(cache_key, 'elevenlabs_sfx', output_path)
             return output_path
         except Exception as e:
             self.logger.error(f"Error generating sound effect: {str(e)}")
             self.update_status(f"Error generating sound effect: {str(e)}")
+            if is_rate_limit_error(e):
+                raise  # rate limits are retried by the caller (see GenerationScheduler)
             return None
 
     def add_id3_tag(self, file_path, prompt, duration=None):
@@ -88,11 +104,11 @@ class SFXService:
             self.logger.error(f"Invalid duration: {str(e)}")
             return None
 
-    def process_sfx_request(self, text_prompt: str, duration: str):
+    def process_sfx_request(self, text_prompt: str, duration: str, use_cache: bool = True):
         """Process an SFX generation request."""
         validated_duration = self.validate_duration(duration)
         if validated_duration is not None or duration == "0":
-            return self.generate_sound_effect(text_prompt, validated_duration)
+            return self.generate_sound_effect(text_prompt, validated_duration, use_cache)
         else:
             self.logger.warning("Invalid duration. Please enter a valid duration (0.5-22s) or 0 for automatic.")
             return None
\ No newline at end of file
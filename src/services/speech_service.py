@@ -6,7 +6,12 @@ import requests
 from elevenlabs import VoiceSettings
 from elevenlabs.client import ElevenLabs
 import logging
-from utils.file_utils import sanitize_filename
+import threading
+from utils.file_utils import sanitize_filename, replace_atomically
+from services.http_client import HttpClient
+from services.generation_cache import GenerationCache
+from services.voice_catalog import VoiceCatalog
+from utils.generation_scheduler import is_rate_limit_error
 from mutagen.id3 import ID3, TIT2, COMM
 from mutagen.mp3 import MP3
 import datetime
@@ -16,6 +21,12 @@ class SpeechService:
         self.config = config
         self.api_key = self.config['api']['elevenlabs_api_key']
         self.client = ElevenLabs(api_key=self.api_key)
+        self.http = HttpClient.get_instance(config)
+        self.cache = GenerationCache.get_instance(config)
+        settings = self.config.get('settings', {})
+        self.voice_catalog = VoiceCatalog(self.api_key, self.http,
+                                          cache_path=settings.get('voice_catalog_path', './cache/voice_catalog.json'),
+                                          ttl=settings.get('voice_catalog_ttl_seconds', 3600))
         self.output_dir = self.config['speech_gen']['output_dir']
         self.logger = logging.getLogger(self.__class__.__name__)
         self.status_update_callback = status_update_callback
@@ -23,6 +34,7 @@ class SpeechService:
         self.current_preview_index = 0  # Track which preview we're currently playing
         self.preview_audio_files = []  # Store temporary preview files
         self.current_voice_description = None  # Store the description used to generate previews
+        self.file_lock = threading.Lock()  # Parallel generations must not pick the same file number
 
         # Default voice settings
         self.default_voice_settings = {
@@ -42,13 +54,11 @@ class SpeechService:
 
     def ensure_voice_in_library(self, voice_id, voice_name):
         # First, check if the voice is already in the user's library
-        user_voices = self.get_user_voices()
-        if any(id == voice_id for _, id in user_voices):
+        if self.voice_catalog.get_user_voice(voice_id):
             return True  # Voice is already in the library
 
         # If not, get the public_owner_id from available voices
-        available_voices = self.get_available_voices()
-        voice_info = next((v for v in available_voices if v['voice_id'] == voice_id), None)
+        voice_info = self.voice_catalog.get_shared_voice(voice_id)
         
         if not voice_info:
             self.logger.error(f"Voice {voice_id} not found in available voices.")
@@ -65,8 +75,9 @@ class SpeechService:
         }
 
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = self.http.post(url, json=payload, headers=headers)
             response.raise_for_status()
+            self.voice_catalog.invalidate('user')
             self.logger.info(f"Voice '{voice_name}' (ID: {voice_id}) added to the library successfully.")
             return True
         except requests.RequestException as e:
@@ -74,33 +85,12 @@ class SpeechService:
             return False
     
     def get_available_voices(self):
-        #returns all public available voices in the ElevenLabs Public Library
-        url = "https://api.elevenlabs.io/v1/shared-voices"
-        querystring = {"category": "professional", "use_cases": "narrative_story", "language": "en"}
-        headers = {"xi-api-key": self.api_key}
-
-        try:
-            response = requests.get(url, headers=headers, params=querystring)
-            response.raise_for_status()
-            data = response.json()
-            return data.get('voices', [])
-        except requests.RequestException as e:
-            self.logger.error(f"Failed to fetch available voices: {str(e)}")
-            return []
+        #returns all public available voices in the ElevenLabs Public Library (cached by the voice catalog)
+        return self.voice_catalog.get_shared_voices()
     
     def get_user_voices(self):
-        #returns voices in ElevenLabs User Library
-        url = "https://api.elevenlabs.io/v1/voices"
-        headers = {"xi-api-key": self.api_key}
-
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            voices = response.json().get('voices', [])
-            return [(voice['name'], voice['voice_id']) for voice in voices]
-        except requests.RequestException as e:
-            self.logger.error(f"Failed to fetch user voices: {str(e)}")
-            return []
+        #returns voices in ElevenLabs User Library (cached by the voice catalog)
+        return self.voice_catalog.get_user_voices()
         
     def get_next_file_number(self, voice_name):
         pattern = re.compile(fr"^{re.escape(voice_name)}_(\d+)\.mp3$")
@@ -111,53 +101,79 @@ class SpeechService:
         ]
         return max(existing_numbers, default=0) + 1
 
-    def text_to_speech_file(self, text_prompt: str, voice_id: str, voice_settings: dict = None):
+    def text_to_speech_file(self, text_prompt: str, voice_id: str, voice_settings: dict = None, voice_name: str = None,
+                            use_cache: bool = True):
         self.logger.info("Initializing speech generation...")
         try:
             # Use provided voice settings or defaults
             settings = voice_settings if voice_settings is not None else self.default_voice_settings
-            
-            self.logger.info("Sending request to ElevenLabs API...")
-            response = self.client.text_to_speech.convert(
-                voice_id=voice_id,
-                optimize_streaming_latency="0",
-                output_format="mp3_44100_96",
-                text=text_prompt,
-                model_id="eleven_multilingual_v2",
-                voice_settings=VoiceSettings(
-                    stability=settings['stability'],
-                    similarity_boost=settings['similarity_boost'],
-                    style=settings['style'],
-                    use_speaker_boost=settings['use_speaker_boost']
-                ),
-            )
+            model_id = "eleven_multilingual_v2"
+            output_format = "mp3_44100_96"
+
+            cache_key = GenerationCache.make_key('elevenlabs_tts', model_id=model_id, voice_id=voice_id,
+                                                 voice_settings=settings, text=text_prompt,
+                                                 output_format=output_format)
+            cached = self.cache.lookup(cache_key) if use_cache else None
+
+            response = None
+            if cached:
+                self.logger.info("Reusing cached speech for identical request...")
+            else:
+                self.logger.info("Sending request to ElevenLabs API...")
+                response = self.client.text_to_speech.convert(
+                    voice_id=voice_id,
+                    optimize_streaming_latency="0",
+                    output_format=output_format,
+                    text=text_prompt,
+                    model_id=model_id,
+                    voice_settings=VoiceSettings(
+                        stability=settings['stability'],
+                        similarity_boost=settings['similarity_boost'],
+                        style=settings['style'],
+                        use_speaker_boost=settings['use_speaker_boost']
+                    ),
+                )
 
             self.logger.info("Ensuring output directory exists...")
             os.makedirs(self.output_dir, exist_ok=True)
 
-            # Get the voice name from the user's voices
-            user_voices = self.get_user_voices()
-            voice_name = next((name for name, id in user_voices if id == voice_id), "Unknown")
+            # Get the voice name from the user's voices unless the caller already knows it
+            if voice_name is None:
+                voice_name = self.voice_catalog.get_voice_name(voice_id) or "Unknown"
             sanitized_voice_name = sanitize_filename(voice_name)
 
-            # Get the next available number for this voice
-            next_number = self.get_next_file_number(sanitized_voice_name)
-
-            # Create the filename
-            filename = f"{sanitized_voice_name}_{next_number}.mp3"
-            save_file_path = os.path.join(self.output_dir, filename)
-
-            self.logger.info("Receiving and writing audio data...")
-            with open(save_file_path, "wb") as f:
-                for chunk in response:
-                    if chunk:
-                        f.write(chunk)
-
-            # Add ID3 tags with both prompt and voice_id
-            self.add_id3_tag(save_file_path, text_prompt, voice_id)
+            with self.file_lock:
+                # Get the next available number for this voice
+                next_number = self.get_next_file_number(sanitized_voice_name)
+
+                # Create the filename and claim it before releasing the lock
+                filename = f"{sanitized_voice_name}_{next_number}.mp3"
+                save_file_path = os.path.join(self.output_dir, filename)
+                open(save_file_path, "wb").close()
+
+            try:
+                if cached:
+                    return self.cache.materialize(cached[0], save_file_path)
+
+                self.logger.info("Receiving and writing audio data...")
+                with replace_atomically(save_file_path) as temp_path:
+                    with open(temp_path, "wb") as f:
+                        for chunk in response:
+                            if chunk:
+                                f.write(chunk)
+
+                    # Add ID3 tags with both prompt and voice_id
+                    self.add_id3_tag(temp_path, text_prompt, voice_id)
+            except Exception:
+                os.remove(save_file_path)
+                raise
+
+            self.cache.store(cache_key, 'elevenlabs_tts', save_file_path)
             return save_file_path
         except Exception as e:
             self.logger.error(f"Failed to generate speech: {str(e)}", exc_info=True)
+            if is_rate_limit_error(e):
+                raise  # rate limits are retried by the caller (see GenerationScheduler)
             return None
     
     def add_id3_tag(self, file_path, prompt, voice_id=None):
@@ -186,8 +202,8 @@ class SpeechService:
         except Exception as e:
             self.logger.error(f"Failed to add ID3 tag: {str(e)}")
 
-    def process_speech_request(self, text_prompt: str, voice_id: str):
-        return self.text_to_speech_file(text_prompt, voice_id)
+    def process_speech_request(self, text_prompt: str, voice_id: str, use_cache: bool = True):
+        return self.text_to_speech_file(text_prompt, voice_id, use_cache=use_cache)
     
     def process_s2s_request(self, audio_file_path: str, voice_id: str, voice_settings: dict = None):
         """Process a speech-to-speech generation request."""
@@ -232,14 +248,15 @@ class SpeechService:
                 )
 
                 # Save the response to a file
-                with open(output_path, 'wb') as f:
-                    for chunk in response:
-                        if chunk:
-                            f.write(chunk)
-
-                # Add ID3 tags with original audio filename as prompt and voice_id
-                prompt = f"Speech-to-Speech conversion from: {os.path.basename(audio_file_path)}"
-                self.add_id3_tag(output_path, prompt, voice_id)
+                with replace_atomically(output_path) as temp_path:
+                    with open(temp_path, 'wb') as f:
+                        for chunk in response:
+                            if chunk:
+                                f.write(chunk)
+
+                    # Add ID3 tags with original audio filename as prompt and voice_id
+                    prompt = f"Speech-to-Speech conversion from: {os.path.basename(audio_file_path)}"
+                    self.add_id3_tag(temp_path, prompt, voice_id)
                 
                 self.update_status("Speech-to-speech conversion completed successfully")
                 return output_path
@@ -274,7 +291,7 @@ class SpeechService:
                 "text": text
             }
             
-            response = requests.post(url, json=payload, headers=headers)
+            response = self.http.post(url, json=payload, headers=headers)
             response.raise_for_status()
             
             if response.status_code == 200:
@@ -362,10 +379,11 @@ class SpeechService:
                 "played_not_selected_voice_ids": []  # Optional for RLHF
             }
             
-            response = requests.post(url, json=payload, headers=headers)
+            response = self.http.post(url, json=payload, headers=headers)
             response.raise_for_status()
             
             if response.status_code == 200:
+                self.voice_catalog.invalidate('user')
                 self.logger.info(f"Voice '{voice_name}' successfully added to library")
                 return True
             else:
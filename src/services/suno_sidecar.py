@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import atexit
+import signal
+import logging
+import threading
+import subprocess
+from urllib.parse import urlparse
+import requests
+
+
+class SunoSidecar:
+    """Single long-lived suno-api server shared by all music generations.
+
+    The server is started lazily on the first ``ensure_running()`` call and
+    kept alive for later songs instead of paying a Next.js cold start per
+    song. Before each use a cheap health check against ``/api/get_limit``
+    runs (skipped if one passed within ``health_interval`` seconds). A dead or
+    unresponsive server is restarted, but after ``max_restarts`` consecutive
+    failed starts the sidecar stops retrying until ``restart_cooldown``
+    seconds have passed or ``reset()`` is called for a user request. In ``production`` mode the app
+    is built once with ``npm run build`` (again whenever sources are newer
+    than the build) and served with ``next start``, which starts much faster
+    than the dev server. A server that is already answering at ``base_url``
+    is used as is and never stopped. The process group is terminated on
+    ``stop()`` and at interpreter exit.
+    """
+
+    def __init__(self, api_directory, base_url, http, mode='dev', startup_timeout=60, health_interval=30,
+                 max_restarts=3, restart_cooldown=300, status_callback=None):
+        self.api_directory = api_directory
+        self.base_url = base_url.rstrip('/')
+        self.http = http
+        self.mode = mode
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        self.max_restarts = max_restarts
+        self.restart_cooldown = restart_cooldown
+        self.status_callback = status_callback
+        self.port = urlparse(self.base_url).port or 3000
+        self.lock = threading.Lock()
+        self.process = None
+        self.last_healthy = 0.0
+        self.failed_starts = 0
+        self.last_failure = 0.0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        atexit.register(self.stop)
+
+    def update_status(self, message):
+        self.logger.info(message)
+        if self.status_callback:
+            self.status_callback(message)
+
+    def is_healthy(self):
+        try:
+            response = self.http.get(f'{self.base_url}/api/get_limit', timeout=2, max_retries=0)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def is_process_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def ensure_running(self):
+        """Return True once the API answers, starting or restarting the server if needed"""
+        with self.lock:
+            if time.monotonic() - self.last_healthy < self.health_interval and (
+                    self.process is None or self.is_process_alive()):
+                return True
+            if self.is_healthy():
+                self.last_healthy = time.monotonic()
+                return True
+
+            if self.process is not None:
+                self.logger.warning("Suno API server is not responding; restarting it")
+                self._terminate()
+            if self.failed_starts >= self.max_restarts:
+                if time.monotonic() - self.last_failure < self.restart_cooldown:
+                    self.logger.error(f"Suno API server failed to start {self.failed_starts} times; not retrying")
+                    return False
+                self.logger.info("Restart cooldown elapsed; trying to start the Suno API server again")
+                self.failed_starts = 0
+
+            if self._start():
+                self.failed_starts = 0
+                self.last_healthy = time.monotonic()
+                return True
+            self.failed_starts += 1
+            self.last_failure = time.monotonic()
+            self._terminate()
+            return False
+
+    def stop(self):
+        with self.lock:
+            self._terminate()
+
+    def reset(self):
+        """Allow new start attempts after ``max_restarts`` was reached, e.g. after fixing the setup"""
+        # No lock: called from the Tk thread while a start may hold it for up to startup_timeout
+        self.failed_starts = 0
+
+    def _start(self):
+        if self.mode == 'production' and self._needs_build():
+            self.update_status("Building Suno API server (one-time)...")
+            build = subprocess.run(['npm', 'run', 'build'], cwd=self.api_directory)
+            if build.returncode != 0:
+                self.logger.error(f"Suno API build failed with exit code {build.returncode}")
+                return False
+
+        script = 'start' if self.mode == 'production' else 'dev'
+        self.update_status("Starting API server...")
+        popen_kwargs = {}
+        if sys.platform == 'win32':
+            popen_kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            # npm spawns node as a child; a separate session lets stop() take down the whole tree
+            popen_kwargs['start_new_session'] = True
+        self.process = subprocess.Popen(['npm', 'run', script, '--', '-p', str(self.port)],
+                                        cwd=self.api_directory, **popen_kwargs)
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if not self.is_process_alive():
+                self.logger.error(f"Suno API server exited with code {self.process.returncode}")
+                return False
+            if self.is_healthy():
+                self.update_status("API started successfully.")
+                return True
+            time.sleep(0.5)
+        self.logger.error(f"Suno API server did not respond within {self.startup_timeout}s")
+        return False
+
+    def _needs_build(self):
+        build_id = os.path.join(self.api_directory, '.next', 'BUILD_ID')
+        if not os.path.exists(build_id):
+            return True
+        built_at = os.path.getmtime(build_id)
+        sources = [os.path.join(self.api_directory, name) for name in ('package.json', 'next.config.mjs')]
+        for root, _, files in os.walk(os.path.join(self.api_directory, 'src')):
+            sources.extend(os.path.join(root, name) for name in files)
+        return any(os.path.getmtime(path) > built_at for path in sources if os.path.exists(path))
+
+    def _terminate(self):
+        process, self.process = self.process, None
+        self.last_healthy = 0.0
+        if process is None or process.poll() is not None:
+            return
+        self.logger.info("Stopping Suno API server...")
+        try:
+            if sys.platform == 'win32':
+                process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            try:
+                if sys.platform == 'win32':
+                    process.kill()
+                else:
+                    os.killpg(process.pid, signal.SIGKILL)
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                self.logger.error(f"Error stopping Suno API server: {str(e)}")
@@ -0,0 +1,241 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from utils.project_writer import write_json_atomic
+
+USER_VOICES_URL = "https://api.elevenlabs.io/v1/voices"
+SHARED_VOICES_URL = "https://api.elevenlabs.io/v1/shared-voices"
+SHARED_VOICES_QUERY = {"category": "professional", "use_cases": "narrative_story", "language": "en"}
+INDEXED_ATTRIBUTES = ('gender', 'age', 'accent')
+TERM_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def get_voice_attribute(voice, attribute):
+    """Return a lower-cased voice label; user voices keep them under 'labels', shared voices at the top level"""
+    value = voice.get(attribute) or (voice.get('labels') or {}).get(attribute) or ''
+    return str(value).lower()
+
+
+def get_voice_description(voice):
+    return (voice.get('descriptive') or voice.get('description')
+            or (voice.get('labels') or {}).get('description') or '').lower()
+
+
+def is_fine_tuned(voice, model_id='eleven_multilingual_v2'):
+    return (voice.get('fine_tuning') or {}).get('state', {}).get(model_id) == 'fine_tuned'
+
+
+class VoiceIndex:
+    """Attribute index over one voice list.
+
+    Voices are bucketed by each label value, and descriptions are indexed by
+    term. A query value that is a bucket value or term is a single dict
+    lookup. Otherwise it falls back to a substring scan over the distinct
+    values (not over the voices), and that result is memoised for the
+    lifetime of the index. A description query narrows the candidates by
+    every query word, and only the remaining voices are checked for the full
+    phrase.
+    """
+
+    def __init__(self, voices):
+        self.voices = voices
+        self.by_id = {voice['voice_id']: voice for voice in voices}
+        self.positions = {voice['voice_id']: position for position, voice in enumerate(voices)}
+        self.buckets = {attribute: {} for attribute in INDEXED_ATTRIBUTES}
+        self.terms = {}
+        self.partial_matches = {}  # (attribute or 'terms', query) -> ids, for queries that miss exactly
+        for voice in voices:
+            for attribute in INDEXED_ATTRIBUTES:
+                self.buckets[attribute].setdefault(get_voice_attribute(voice, attribute), set()).add(voice['voice_id'])
+            for term in TERM_PATTERN.findall(get_voice_description(voice)):
+                self.terms.setdefault(term, set()).add(voice['voice_id'])
+
+    def get(self, voice_id):
+        return self.by_id.get(voice_id)
+
+    def lookup(self, attribute, query):
+        """Return the ids whose ``attribute`` value (or description term, for 'terms') equals or contains ``query``"""
+        buckets = self.terms if attribute == 'terms' else self.buckets[attribute]
+        ids = buckets.get(query)
+        if ids is not None:
+            return ids
+        key = (attribute, query)
+        if key not in self.partial_matches:
+            self.partial_matches[key] = set().union(*(ids for value, ids in buckets.items() if query in value))
+        return self.partial_matches[key]
+
+    def find(self, gender='', age='', accent='', description=''):
+        """Return voices with exactly ``gender`` whose age, accent and description match the query
+
+        Age and accent values and description words match exactly where such a
+        value exists, and as a substring otherwise. An accent of 'none'
+        matches any accent.
+        """
+        candidates = self.buckets['gender'].get(gender, set()) if gender else set(self.by_id)
+        for attribute, query in (('age', age), ('accent', '' if accent == 'none' else accent)):
+            if query and candidates:
+                candidates = candidates & self.lookup(attribute, query)
+        for word in TERM_PATTERN.findall(description):
+            if not candidates:
+                break
+            candidates = candidates & self.lookup('terms', word)
+        voices = [self.by_id[voice_id] for voice_id in sorted(candidates, key=self.positions.get)]
+        if description:
+            voices = [voice for voice in voices if description in get_voice_description(voice)]
+        return voices
+
+
+class VoiceCatalog:
+    """Disk-backed cache of the ElevenLabs user and shared voice lists.
+
+    Both lists are kept in a JSON file together with their fetch time and
+    ETag. A fresh list (younger than ``ttl`` seconds) is served without
+    touching the network. A stale list is still served, while a background
+    thread revalidates it with ``If-None-Match``. Only an empty cache blocks
+    on a fetch. Every list gets a VoiceIndex, so voice lookups by id, name or
+    attributes cost no request. Listeners are called from the refresh thread
+    whenever a list changes.
+    """
+
+    SOURCES = {
+        'user': (USER_VOICES_URL, None),
+        'shared': (SHARED_VOICES_URL, SHARED_VOICES_QUERY),
+    }
+
+    def __init__(self, api_key, http, cache_path=None, ttl=3600):
+        self.api_key = api_key
+        self.http = http
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}  # source -> {'etag', 'fetched_at', 'voices'}
+        self.indexes = {}
+        self.refreshing = set()
+        self.listeners = []
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.load()
+
+    def get_key_hash(self):
+        # The cache belongs to one account; switching API keys must not serve another library
+        return hashlib.sha256((self.api_key or '').encode('utf-8')).hexdigest()[:16]
+
+    def load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get('key_hash') != self.get_key_hash():
+                return
+            with self.lock:
+                for source, entry in data.get('sources', {}).items():
+                    if source in self.SOURCES:
+                        self.entries[source] = entry
+                        self.indexes[source] = VoiceIndex(entry['voices'])
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.error(f"Error loading voice catalog cache: {str(e)}")
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self.lock:
+            data = {'key_hash': self.get_key_hash(), 'sources': dict(self.entries)}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            write_json_atomic(self.cache_path, data)
+        except OSError as e:
+            self.logger.error(f"Error saving voice catalog cache: {str(e)}")
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def get_index(self, source):
+        """Return the index for ``source``, fetching synchronously only if nothing is cached"""
+        with self.lock:
+            entry = self.entries.get(source)
+            index = self.indexes.get(source)
+        if entry is None:
+            self.refresh(source)
+            with self.lock:
+                return self.indexes.get(source) or VoiceIndex([])
+        if time.time() - entry['fetched_at'] > self.ttl:
+            self.refresh_async(source)
+        return index
+
+    def get_user_voices(self):
+        return [(voice['name'], voice['voice_id']) for voice in self.get_index('user').voices]
+
+    def get_shared_voices(self):
+        return self.get_index('shared').voices
+
+    def get_user_voice(self, voice_id):
+        return self.get_index('user').get(voice_id)
+
+    def get_shared_voice(self, voice_id):
+        return self.get_index('shared').get(voice_id)
+
+    def get_voice_name(self, voice_id):
+        voice = self.get_user_voice(voice_id)
+        return voice['name'] if voice else None
+
+    def find_voices(self, source, gender='', age='', accent='', description='',
+                    fine_tuned_for='eleven_multilingual_v2'):
+        voices = self.get_index(source).find(gender, age, accent, description)
+        if fine_tuned_for:
+            voices = [voice for voice in voices if is_fine_tuned(voice, fine_tuned_for)]
+        return voices
+
+    def invalidate(self, source):
+        """Forget ``source`` so the next read fetches it, e.g. after adding a voice to the library"""
+        with self.lock:
+            self.entries.pop(source, None)
+            self.indexes.pop(source, None)
+
+    def refresh_async(self, source):
+        with self.lock:
+            if source in self.refreshing:
+                return
+            self.refreshing.add(source)
+        threading.Thread(target=self.refresh, args=(source,), daemon=True, name=f'voice-catalog-{source}').start()
+
+    def refresh(self, source):
+        """Revalidate ``source`` against the API; returns True if the list changed"""
+        url, params = self.SOURCES[source]
+        headers = {"xi-api-key": self.api_key}
+        with self.lock:
+            self.refreshing.add(source)
+            entry = self.entries.get(source)
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        changed = False
+        try:
+            response = self.http.get(url, headers=headers, params=params)
+            if response.status_code == 304 and entry:
+                entry['fetched_at'] = time.time()
+            else:
+                response.raise_for_status()
+                voices = response.json().get('voices', [])
+                entry = {'etag': response.headers.get('ETag'), 'fetched_at': time.time(), 'voices': voices}
+                index = VoiceIndex(voices)
+                with self.lock:
+                    previous = self.entries.get(source)
+                    changed = previous is None or previous['voices'] != voices
+                    self.entries[source] = entry
+                    self.indexes[source] = index
+            self.save()
+        except Exception as e:
+            self.logger.error(f"Failed to refresh {source} voices: {str(e)}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(source)
+        if changed:
+            for callback in self.listeners:
+                try:
+                    callback(source)
+                except Exception as e:
+                    self.logger.error(f"Error notifying voice catalog listener: {str(e)}")
+        return changed
@@ -1,139 +1,211 @@
 import numpy as np
 import threading
-import pyaudio
 import logging
+from utils.audio_mixer import AudioMixer
+
+# Callback status flags, numerically the same as pyaudio.paContinue/paComplete
+CALLBACK_CONTINUE = 0
+CALLBACK_COMPLETE = 1
+
+
+class _RingBuffer:
+    """Single-producer/single-consumer ring of pre-rendered stereo frames.
+
+    The render thread only advances ``write_index`` and the audio callback only
+    advances ``read_index``, so neither side needs a lock. A seek replaces the
+    whole ring instead of mutating it, which keeps the callback lock-free too.
+    """
+
+    def __init__(self, capacity, channels, start_position):
+        self.frames = np.zeros((capacity, channels), dtype=np.float32)
+        self.capacity = capacity
+        self.start_position = start_position  # Timeline position (s) of frame 0
+        self.read_index = 0
+        self.write_index = 0
+
+    def available(self):
+        return self.write_index - self.read_index
+
+    def free_space(self):
+        return self.capacity - self.available()
+
+    def write(self, data):
+        """Copy rendered frames into the ring. Called from the render thread only."""
+        count = data.shape[0]
+        start = self.write_index % self.capacity
+        first = min(count, self.capacity - start)
+        self.frames[start:start + first] = data[:first]
+        if first < count:
+            self.frames[:count - first] = data[first:]
+        self.write_index += count
+
+    def read_into(self, out, count):
+        """Copy ``count`` frames into ``out``. Called from the audio callback only."""
+        start = self.read_index % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.frames[start:start + first]
+        if first < count:
+            out[first:count] = self.frames[:count - first]
+        self.read_index += count
+
 
 class AudioBufferManager:
-    def __init__(self, timeline_model, buffer_size=2048):
+    def __init__(self, timeline_model, buffer_size=2048, lookahead_blocks=8):
         self.timeline_model = timeline_model
         self.buffer_size = buffer_size
-        self.current_buffer = np.zeros((buffer_size, 2), dtype=np.float32)
-        self.buffer_lock = threading.Lock()
+        self.lookahead_blocks = max(2, int(lookahead_blocks))
+        self.channels = 2
         self.playhead_position = 0
-        self.buffer_position = 0
         self.is_playing = False
         self.error_count = 0
         self.max_errors = 3
 
+        # Playback statistics
+        self.underrun_count = 0
+        self.underrun_frames = 0
+        self.blocks_rendered = 0
+
+        self._ring = self._create_ring(0)
+        self._render_buffer = np.zeros((buffer_size, self.channels), dtype=np.float32)
+        self.mixer = AudioMixer(timeline_model, self.channels, buffer_size)
+        self._render_event = threading.Event()
+        self._primed_event = threading.Event()
+        self._render_thread = None
+        self._thread_lock = threading.Lock()
+        # Bumped by every stop(); a render thread exits once it no longer owns the current generation
+        self._generation = 0
+        self._running = False
+
+    def _create_ring(self, position):
+        return _RingBuffer(self.buffer_size * self.lookahead_blocks, self.channels, position)
+
+    def set_lookahead_blocks(self, lookahead_blocks):
+        """Change how many blocks the render thread stays ahead of playback"""
+        self.lookahead_blocks = max(2, int(lookahead_blocks))
+        self.update_playhead(self.playhead_position)
+
+    def start(self, prime_timeout=0.25, join_timeout=0.5):
+        """Start the background render thread and give it a moment to pre-render"""
+        self._primed_event.clear()
+        with self._thread_lock:
+            if not self._running:
+                # A thread from before the last stop() may still be finishing its block;
+                # it exits on its own, but must not write into the ring alongside the new one
+                previous = self._render_thread
+                if previous is not None and previous.is_alive():
+                    self._render_event.set()
+                    previous.join(join_timeout)
+                self._running = True
+                self._render_thread = threading.Thread(target=self._render_loop, args=(self._generation,),
+                                                       daemon=True, name='audio-render')
+                self._render_thread.start()
+        self._render_event.set()
+        self._primed_event.wait(prime_timeout)
+
+    def stop(self):
+        """Stop the background render thread without waiting for it"""
+        with self._thread_lock:
+            self._running = False
+            self._generation += 1
+        self._render_event.set()
+
     def reset(self):
         """Reset buffer state without blocking"""
         try:
-            # Create new buffer instead of waiting for lock
-            new_buffer = np.zeros((self.buffer_size, 2), dtype=np.float32)
-            
-            # Quick swap with minimal locking
-            with self.buffer_lock:
-                self.current_buffer = new_buffer
-                self.playhead_position = 0
-                self.buffer_position = 0
-                self.error_count = 0
-                
+            self._ring = self._create_ring(0)
+            self.playhead_position = 0
+            self.error_count = 0
+            self._render_event.set()
         except Exception as e:
             logging.error(f"Error in buffer reset: {str(e)}")
 
+    def invalidate(self):
+        """Discard pre-rendered audio after a timeline edit, keeping the playhead"""
+        self.update_playhead(self.playhead_position)
+
+    def get_stats(self):
+        ring = self._ring
+        return {
+            'underruns': self.underrun_count,
+            'underrun_frames': self.underrun_frames,
+            'blocks_rendered': self.blocks_rendered,
+            'buffered_frames': ring.available(),
+            'lookahead_blocks': self.lookahead_blocks,
+        }
+
     def get_audio_data(self, in_data, frame_count, time_info, status):
-        """Get audio data for playback with minimal blocking"""
+        """Copy pre-rendered audio out of the ring buffer. Never renders or locks."""
         try:
-            # Quick check without lock
             if not self.is_playing:
-                return (np.zeros((frame_count, 2), dtype=np.float32), pyaudio.paComplete)
+                return (np.zeros((frame_count, self.channels), dtype=np.float32), CALLBACK_COMPLETE)
 
-            with self.buffer_lock:
-                # Check if we need more data
-                if self.buffer_position + frame_count > self.current_buffer.shape[0]:
-                    # Prepare new data
-                    self._fill_buffer()
-                    self.buffer_position = 0
+            ring = self._ring
+            data = np.zeros((frame_count, self.channels), dtype=np.float32)
+            available = min(ring.available(), frame_count)
+            if available > 0:
+                ring.read_into(data, available)
+            if available < frame_count:
+                # The render thread fell behind; play silence for the missing frames
+                self.underrun_count += 1
+                self.underrun_frames += frame_count - available
+                ring.read_index += frame_count - available
 
-                # Get data and advance position
-                data = self.current_buffer[self.buffer_position:self.buffer_position + frame_count].copy()
-                self.buffer_position += frame_count
-                self.playhead_position += frame_count / self.timeline_model.sample_rate
-                self.error_count = 0
+            if ring is self._ring:
+                self.playhead_position = ring.start_position + ring.read_index / self.timeline_model.sample_rate
+            self.error_count = 0
+            self._render_event.set()
 
-            return (data, pyaudio.paContinue)
+            return (data, CALLBACK_CONTINUE)
 
         except Exception as e:
             logging.error(f"Error in get_audio_data: {str(e)}")
             self.error_count += 1
-            
+
             if self.error_count >= self.max_errors:
                 logging.error("Too many consecutive errors, stopping playback")
                 self.is_playing = False
-                return (np.zeros((frame_count, 2), dtype=np.float32), pyaudio.paComplete)
-            
+                return (np.zeros((frame_count, self.channels), dtype=np.float32), CALLBACK_COMPLETE)
+
             # Return silence but keep playing
-            return (np.zeros((frame_count, 2), dtype=np.float32), pyaudio.paContinue)
+            return (np.zeros((frame_count, self.channels), dtype=np.float32), CALLBACK_CONTINUE)
 
-    def _fill_buffer(self):
-        """Fill the current buffer with new audio data"""
-        try:
-            # Create new buffer
-            new_buffer = np.zeros((self.buffer_size, 2), dtype=np.float32)
-            end_time = self.playhead_position + self.buffer_size / self.timeline_model.sample_rate
-
-            # Get active tracks without holding any locks
-            active_tracks = self.timeline_model.get_active_tracks()
-            
-            # Process each track
-            for track in active_tracks:
-                if not self.is_playing:  # Check if we should stop
-                    break
-                    
-                # Convert track volume from dB to amplitude multiplier
-                track_volume_db = track.get("volume_db", 0.0)
-                track_volume = self.timeline_model.db_to_amplitude(track_volume_db)
-                
-                for clip in track['clips']:
-                    if not self.is_playing:  # Check if we should stop
-                        break
-                        
-                    if clip.x < end_time and clip.x + clip.duration > self.playhead_position:
-                        try:
-                            clip_start = max(0, self.playhead_position - clip.x)
-                            clip_end = min(clip.duration, end_time - clip.x)
-                            
-                            # Get clip frames without holding buffer lock
-                            clip_frames = self.timeline_model.get_clip_frames(
-                                clip, clip_start, clip_end - clip_start)
-                            
-                            if clip_frames is not None and clip_frames.size > 0:
-                                buffer_start = int(max(0, (clip.x - self.playhead_position) 
-                                                     * self.timeline_model.sample_rate))
-                                buffer_end = min(buffer_start + clip_frames.shape[0], self.buffer_size)
-                                
-                                if buffer_start < buffer_end:
-                                    frames_to_add = clip_frames[:buffer_end-buffer_start] * track_volume
-                                    new_buffer[buffer_start:buffer_end] += frames_to_add
-                        
-                        except Exception as e:
-                            logging.error(f"Error processing clip {clip.file_path}: {str(e)}")
-                            continue
-
-            # Normalize if needed
-            max_amplitude = np.max(np.abs(new_buffer))
-            if max_amplitude > 1.0:
-                new_buffer = new_buffer / max_amplitude
-
-            # Update current buffer
-            self.current_buffer = new_buffer
+    def _render_loop(self, generation):
+        """Keep the ring buffer filled ahead of the audio callback"""
+        while generation == self._generation:
+            ring = self._ring
+            if ring.free_space() < self.buffer_size:
+                self._primed_event.set()
+                self._render_event.wait(0.05)
+                self._render_event.clear()
+                continue
+
+            # A block the callback already skipped past (underrun) is not worth rendering
+            if ring.write_index < ring.read_index:
+                ring.write_index = ring.read_index
+
+            start_frame = int(round(ring.start_position * self.timeline_model.sample_rate)) + ring.write_index
+            try:
+                self._fill_buffer(self._render_buffer, start_frame)
+            except Exception as e:
+                logging.error(f"Error filling buffer: {str(e)}")
+                self._render_buffer.fill(0)
+
+            # Drop the block if a seek swapped the ring or playback stopped while we were rendering
+            if ring is self._ring and generation == self._generation:
+                ring.write(self._render_buffer)
+                self.blocks_rendered += 1
+
+    def _fill_buffer(self, buffer, start_frame):
+        """Mix one block of the timeline starting at ``start_frame`` into ``buffer``"""
+        self.mixer.mix(start_frame, buffer)
 
-        except Exception as e:
-            logging.error(f"Error filling buffer: {str(e)}")
-            self.current_buffer.fill(0)
-        
     def update_playhead(self, position):
         """Update playhead position without blocking"""
         try:
-            # Create new buffer instead of waiting for lock
-            new_buffer = np.zeros((self.buffer_size, 2), dtype=np.float32)
-            
-            # Quick swap with minimal locking
-            with self.buffer_lock:
-                self.current_buffer = new_buffer
-                self.playhead_position = position
-                self.buffer_position = 0
-                self.error_count = 0
-                
+            # Swap in a fresh ring; the render thread refills it from the new position
+            self._ring = self._create_ring(position)
+            self.playhead_position = position
+            self.error_count = 0
+            self._render_event.set()
         except Exception as e:
             logging.error(f"Error updating playhead: {str(e)}")
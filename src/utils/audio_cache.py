@@ -0,0 +1,123 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+
+class AudioCache:
+    """Byte-budgeted LRU cache for decoded sample arrays.
+
+    ``loader(key)`` produces the samples on a miss (usually a memory map from
+    PCMCache). When the cache grows past its budget, entries are evicted
+    farthest-from-the-playhead first, using ``distance_fn(keys)`` to rank them,
+    and least recently used among equally distant entries.
+    """
+
+    def __init__(self, loader, budget_bytes, distance_fn=None):
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self.distance_fn = distance_fn
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> {'samples', 'nbytes', 'last_access'}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def get(self, key):
+        """Return samples for ``key``, loading and evicting as needed"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                entry['last_access'] = time.monotonic()
+                self.entries.move_to_end(key)
+                return entry['samples']
+            self.misses += 1
+
+        # Load outside the lock so playback isn't blocked behind a decode
+        samples = self.loader(key)
+        if samples is None:
+            return None
+
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = {
+                    'samples': samples,
+                    'nbytes': samples.nbytes,
+                    'last_access': time.monotonic()
+                }
+                self.total_bytes += samples.nbytes
+            else:
+                samples = self.entries[key]['samples']
+        self.evict(protect=(key,))
+        return samples
+
+    def is_full(self):
+        with self.lock:
+            return self.total_bytes >= self.budget_bytes
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.evict()
+
+    def evict(self, protect=()):
+        """Drop entries until the cache fits its budget"""
+        with self.lock:
+            if self.total_bytes <= self.budget_bytes:
+                return
+            candidates = [key for key in self.entries if key not in protect]
+
+        distances = {}
+        if self.distance_fn and candidates:
+            try:
+                distances = self.distance_fn(candidates)
+            except Exception as e:
+                self.logger.error(f"Error ranking cache entries: {str(e)}")
+
+        with self.lock:
+            # Farthest from the playhead first, then least recently used
+            candidates.sort(key=lambda key: (-distances.get(key, 0.0),
+                                             self.entries[key]['last_access'] if key in self.entries else 0))
+            for key in candidates:
+                if self.total_bytes <= self.budget_bytes:
+                    break
+                entry = self.entries.pop(key, None)
+                if entry is None:
+                    continue
+                self.total_bytes -= entry['nbytes']
+                self.evictions += 1
+                self.logger.info(f"Evicted decoded audio for {key} ({entry['nbytes']} bytes)")
+
+    def discard(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry['nbytes']
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'budget_bytes': self.budget_bytes,
+            }
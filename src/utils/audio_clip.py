@@ -1,44 +1,66 @@
-from pydub import AudioSegment
 import logging
 import os
-from utils.file_utils import read_audio_prompt
+from utils.file_utils import probe_audio_file
+
+_UNSET = object()
+
 
 class AudioClip:
-    def __init__(self, file_path, x, index=None):
+    """Lightweight timeline clip record.
+
+    A clip never holds decoded audio. Duration and tags come from a header-only
+    probe (skipped entirely when the caller already knows them), and samples are
+    fetched through TimelineModel's shared decoded cache when playback needs them.
+    """
+
+    __slots__ = ('file_path', 'x', 'duration', 'index', 'title', '_prompt')
+
+    def __init__(self, file_path, x, index=None, duration=None, prompt=_UNSET):
         self.file_path = file_path
         self.x = x
         self.duration = 0
-        self.audio = None
         self.index = index
-        self.prompt = read_audio_prompt(file_path)
         self.title = os.path.basename(file_path)
+        self._prompt = prompt
 
         try:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"Audio file not found: {file_path}")
 
-            # Use pydub to load the audio file
-            self.audio = AudioSegment.from_file(file_path)
-            
-            # Ensure the audio is at 44.1kHz
-            if self.audio.frame_rate != 44100:
-                raise ValueError(f"Audio file {file_path} is not at 44.1kHz. It should have been converted during import.")
-            
-            self.duration = len(self.audio) / 1000.0  # Duration in seconds
+            if duration is None:
+                info = probe_audio_file(file_path)
+                duration = info['duration']
+                if self._prompt is _UNSET:
+                    self._prompt = info['comments'].get('Prompt')
+                if info['sample_rate'] and info['sample_rate'] != 44100:
+                    logging.warning(f"Audio file {file_path} is at {info['sample_rate']}Hz; "
+                                    "it will be resampled to 44.1kHz for playback.")
+
+            self.duration = duration
 
             logging.info(f"AudioClip created: file={file_path}, x={x}, duration={self.duration}, index={index}")
         except Exception as e:
             logging.error(f"Error initializing AudioClip: {str(e)}", exc_info=True)
             raise
 
-    def get_sample_array(self):
-        if self.audio:
-            return self.audio.get_array_of_samples()
-        return []
+    @property
+    def prompt(self):
+        # Tags are only read the first time a label actually needs them
+        if self._prompt is _UNSET:
+            try:
+                self._prompt = probe_audio_file(self.file_path)['comments'].get('Prompt')
+            except Exception as e:
+                logging.error(f"Error reading audio prompt: {str(e)}")
+                self._prompt = None
+        return self._prompt
+
+    @prompt.setter
+    def prompt(self, value):
+        self._prompt = value
 
     def get_display_text(self):
         if self.prompt:
             # Ensure prompt is a string and remove curly braces
             prompt_text = self.prompt if isinstance(self.prompt, str) else str(self.prompt)
             return prompt_text.strip("{}").strip()
-        return self.title
\ No newline at end of file
+        return self.title
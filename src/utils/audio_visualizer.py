@@ -1,11 +1,8 @@
 import tkinter as tk
-from PIL import Image, ImageDraw, ImageTk
+from PIL import Image, ImageTk
 import numpy as np
-import wave
-import struct
-from pydub import AudioSegment
-import threading
 import logging
+from utils.waveform_service import WaveformService
 
 class AudioVisualizer(tk.Frame):
     def __init__(self, master, **kwargs):
@@ -34,37 +31,62 @@ class AudioVisualizer(tk.Frame):
             if width <= 1 or height <= 1:  # Canvas not properly sized yet
                 self.master.after(100, lambda: self.update_waveform(audio_file))
                 return
-            thread = threading.Thread(target=self._process_audio, args=(audio_file, width, height))
-            thread.start()
+            # Only the latest request for this widget survives; older ones are cancelled
+            WaveformService.get_instance().request(
+                self, self,
+                lambda token: self._process_audio(audio_file, width, height, token),
+                self._on_waveform_rendered)
         except Exception as e:
             logging.error(f"Error updating waveform: {str(e)}", exc_info=True)
 
-    def _process_audio(self, audio_file, width, height):
-        try:
-            audio = AudioSegment.from_file(audio_file)
-            samples = np.array(audio.get_array_of_samples())
-            
-            # Downsample
-            samples = samples[::max(1, len(samples) // width)]
-            
-            # Normalize
-            if np.max(np.abs(samples)) > 0:
-                samples = samples / np.max(np.abs(samples))
-            
-            # Create image
-            img = Image.new('RGB', (width, height), color='#2b2b2b')
-            draw = ImageDraw.Draw(img)
-            
-            for x, sample in enumerate(samples):
-                y = int((1 - sample) * height / 2)
-                draw.line((x, height // 2, x, y), fill=(0, 170, 255))  # Light blue color
-
-            self.waveform_image = ImageTk.PhotoImage(img)
-            self.audio_duration = len(audio) / 1000.0  # Duration in seconds
-            
-            self.master.after(0, self._draw_waveform)
-        except Exception as e:
-            logging.error(f"Error processing audio: {str(e)}", exc_info=True)
+    def _process_audio(self, audio_file, width, height, token):
+        """Render the waveform image on a worker thread"""
+        peaks = WaveformService.get_instance().get_peaks(audio_file)
+        if token.cancelled:
+            return None
+        return audio_file, peaks.duration, self.render_waveform(peaks, width, height, normalize=True)
+
+    def _on_waveform_rendered(self, result):
+        if result is None:
+            return
+        audio_file, duration, img = result
+        if audio_file != self.current_audio_file:
+            return
+        self.waveform_image = ImageTk.PhotoImage(img)
+        self.audio_duration = duration
+        self._draw_waveform()
+
+    @staticmethod
+    def render_waveform(peaks, width, height, start_time=0.0, end_time=None, normalize=False,
+                        background=(43, 43, 43, 255), peak_color=(0, 170, 255, 255),
+                        rms_color=(120, 210, 255, 255)):
+        """Draw the peaks between start_time and end_time into a PIL image"""
+        end_time = peaks.duration if end_time is None else end_time
+        mins, maxs, rms = peaks.get_columns(start_time, end_time, width)
+        if normalize and peaks.peak > 0:
+            scale = 1.0 / peaks.peak
+            mins, maxs, rms = mins * scale, maxs * scale, rms * scale
+
+        half = height / 2
+        rows = np.arange(height)[:, None]
+        top = np.clip(np.floor(half - maxs * half), 0, height - 1)[None, :]
+        bottom = np.clip(np.ceil(half - mins * half), 0, height - 1)[None, :]
+        rms_top = np.clip(np.floor(half - rms * half), 0, height - 1)[None, :]
+        rms_bottom = np.clip(np.ceil(half + rms * half), 0, height - 1)[None, :]
+
+        pixels = np.empty((height, width, 4), dtype=np.uint8)
+        pixels[:] = background
+        pixels[(rows >= top) & (rows <= bottom)] = peak_color
+        pixels[(rows >= rms_top) & (rows <= rms_bottom) & (rows >= top) & (rows <= bottom)] = rms_color
+        return Image.fromarray(pixels, 'RGBA')
+
+    def create_waveform_image(self, audio_file, width, height, start_time=0.0, end_time=None, **colors):
+        """Return a PIL image of the waveform; safe to call from worker threads"""
+        width, height = int(width), int(height)
+        if width <= 0 or height <= 0:
+            return None
+        peaks = WaveformService.get_instance().get_peaks(audio_file)
+        return self.render_waveform(peaks, width, height, start_time, end_time, **colors)
 
     def _draw_waveform(self):
         if self.waveform_image:
@@ -83,6 +105,8 @@ class AudioVisualizer(tk.Frame):
             self.playhead_line = None
 
     def clear(self):
+        WaveformService.get_instance().cancel(self)
+        self.current_audio_file = None
         self.canvas.delete("all")
         self.waveform_image = None
         self.audio_duration = 0
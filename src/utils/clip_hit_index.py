@@ -0,0 +1,67 @@
+from utils.clip_index import ClipIndex
+
+
+class ClipHitIndex:
+    """Hit-test index from timeline rows to the clips drawn in them.
+
+    Every track row keeps a ClipIndex (clips sorted by start time) and a
+    reverse map gives the row of each clip. A click bisects the single row
+    under the cursor, and a rubber-band rectangle only visits the rows it
+    covers. The view keeps the index in step with its own clip operations.
+    ``is_stale`` catches edits that bypassed it, so the view can rebuild.
+    """
+
+    def __init__(self):
+        self.tracks = None
+        self.row_tracks = []
+        self.rows = []
+        self.clip_rows = {}
+
+    def rebuild(self, tracks):
+        self.tracks = tracks
+        self.row_tracks = list(tracks)
+        self.rows = [ClipIndex(track['clips']) for track in tracks]
+        self.clip_rows = {clip: row for row, track in enumerate(tracks) for clip in track['clips']}
+
+    def invalidate(self):
+        """Force a rebuild on the next query, e.g. after clips moved without the view"""
+        self.tracks = None
+
+    def is_stale(self, tracks):
+        if tracks is not self.tracks or len(tracks) != len(self.row_tracks):
+            return True
+        return any(track is not row_track or len(track['clips']) != len(index)
+                   for track, row_track, index in zip(tracks, self.row_tracks, self.rows))
+
+    def add(self, clip, row):
+        if clip in self.clip_rows or not 0 <= row < len(self.rows):
+            return
+        self.rows[row].add(clip)
+        self.clip_rows[clip] = row
+
+    def remove(self, clip, start=None):
+        row = self.clip_rows.pop(clip, None)
+        if row is not None:
+            self.rows[row].remove(clip, start)
+
+    def move(self, clip, old_start, row):
+        """Re-file ``clip`` after its start or row changed; ``old_start`` is its previous x"""
+        self.remove(clip, old_start)
+        self.add(clip, row)
+
+    def row_of(self, clip):
+        return self.clip_rows.get(clip, -1)
+
+    def clip_at(self, row, time):
+        """Return the clip in ``row`` that contains ``time``, preferring the latest-starting one"""
+        if not 0 <= row < len(self.rows):
+            return None
+        clips = self.rows[row].query_point(time)
+        return clips[0] if clips else None
+
+    def clips_in_rect(self, first_row, last_row, start_time, end_time):
+        """Return the clips in rows [first_row, last_row] overlapping [start_time, end_time)"""
+        clips = []
+        for row in range(max(0, first_row), min(len(self.rows), last_row + 1)):
+            clips.extend(self.rows[row].query(start_time, end_time))
+        return clips
@@ -0,0 +1,83 @@
+import bisect
+import threading
+
+
+class ClipIndex:
+    """Sorted interval index over the clips of a single track.
+
+    Clips are kept ordered by start time in parallel ``starts``/``ends`` lists so
+    overlap queries can bisect instead of scanning the whole track. Because clips
+    may overlap, the longest clip duration bounds how far back a query has to
+    look, which keeps lookups at O(log n + k) for typical timelines.
+
+    Edits happen on the UI thread while the playback render thread queries, so
+    every operation holds a short lock.
+    """
+
+    def __init__(self, clips=()):
+        self.lock = threading.Lock()
+        self.starts = []
+        self.ends = []
+        self.clips = []
+        self.max_duration = 0.0
+        self.rebuild(clips)
+
+    def __len__(self):
+        return len(self.clips)
+
+    def rebuild(self, clips):
+        ordered = sorted(clips, key=lambda clip: clip.x)
+        with self.lock:
+            self.clips = list(ordered)
+            self.starts = [clip.x for clip in ordered]
+            self.ends = [clip.x + clip.duration for clip in ordered]
+            self.max_duration = max((clip.duration for clip in ordered), default=0.0)
+
+    def add(self, clip):
+        with self.lock:
+            position = bisect.bisect_right(self.starts, clip.x)
+            self.starts.insert(position, clip.x)
+            self.ends.insert(position, clip.x + clip.duration)
+            self.clips.insert(position, clip)
+            self.max_duration = max(self.max_duration, clip.duration)
+
+    def remove(self, clip, start=None):
+        """Remove ``clip``; pass ``start`` if its x changed since it was added."""
+        start = clip.x if start is None else start
+        with self.lock:
+            position = bisect.bisect_left(self.starts, start)
+            while position < len(self.clips) and self.starts[position] == start:
+                if self.clips[position] is clip:
+                    self._delete(position)
+                    return True
+                position += 1
+
+            # Fall back to an identity search if the stored start was stale
+            for position, existing_clip in enumerate(self.clips):
+                if existing_clip is clip:
+                    self._delete(position)
+                    return True
+        return False
+
+    def _delete(self, position):
+        del self.starts[position]
+        del self.ends[position]
+        del self.clips[position]
+
+    def query(self, start_time, end_time):
+        """Return clips overlapping [start_time, end_time), ordered by start."""
+        with self.lock:
+            low = bisect.bisect_left(self.starts, start_time - self.max_duration)
+            high = bisect.bisect_left(self.starts, end_time)
+            return [self.clips[i] for i in range(low, high) if self.ends[i] > start_time]
+
+    def query_point(self, time):
+        """Return clips that contain ``time``, latest-starting first."""
+        with self.lock:
+            low = bisect.bisect_left(self.starts, time - self.max_duration)
+            high = bisect.bisect_right(self.starts, time)
+            return [self.clips[i] for i in range(high - 1, low - 1, -1) if self.ends[i] >= time]
+
+    def end_time(self):
+        with self.lock:
+            return max(self.ends, default=0.0)
@@ -0,0 +1,181 @@
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class EditCommand(ABC):
+    """One reversible timeline edit applied to live tracks and clips.
+
+    Commands keep references to the objects they changed plus the few values
+    needed to invert the change, so undo and redo never rebuild clips or touch
+    the audio files.
+    """
+
+    @abstractmethod
+    def apply(self, model):
+        pass
+
+    @abstractmethod
+    def revert(self, model):
+        pass
+
+    def references_file(self, file_path):
+        clip = getattr(self, 'clip', None)
+        return clip is not None and clip.file_path == file_path
+
+    def merge(self, other):
+        """Fold ``other`` into this command if both are one continuous edit"""
+        return False
+
+    def get_size(self):
+        """Approximate bytes kept alive by this command"""
+        return sys.getsizeof(self) + sum(sys.getsizeof(value) for value in vars(self).values())
+
+
+class AddClipCommand(EditCommand):
+    def __init__(self, track, clip, position):
+        self.track = track
+        self.clip = clip
+        self.position = position
+
+    def apply(self, model):
+        model._insert_clip(self.track, self.clip, self.position)
+
+    def revert(self, model):
+        model._remove_clip(self.track, self.clip)
+
+
+class RemoveClipCommand(EditCommand):
+    def __init__(self, track, clip, position):
+        self.track = track
+        self.clip = clip
+        self.position = position
+
+    def apply(self, model):
+        model._remove_clip(self.track, self.clip)
+
+    def revert(self, model):
+        model._insert_clip(self.track, self.clip, self.position)
+
+    def get_size(self):
+        # The history may be the only thing still holding the removed clip
+        clip = self.clip
+        return (super().get_size() + sys.getsizeof(clip) + sys.getsizeof(clip.file_path)
+                + sys.getsizeof(clip.title))
+
+
+class MoveClipCommand(EditCommand):
+    def __init__(self, clip, old_track, old_x, new_track, new_x):
+        self.clip = clip
+        self.old_track = old_track
+        self.old_x = old_x
+        self.new_track = new_track
+        self.new_x = new_x
+
+    def apply(self, model):
+        model._move_clip(self.clip, self.old_track, self.new_track, self.new_x)
+
+    def revert(self, model):
+        model._move_clip(self.clip, self.new_track, self.old_track, self.old_x)
+
+
+class TrackPropertyCommand(EditCommand):
+    MERGEABLE_KEYS = ('volume_db',)  # slider drags arrive as a stream of small changes
+    MERGE_WINDOW = 1.0  # seconds
+
+    def __init__(self, track, key, old_value, new_value):
+        self.track = track
+        self.key = key
+        self.old_value = old_value
+        self.new_value = new_value
+        self.timestamp = time.monotonic()
+
+    def apply(self, model):
+        model._set_track_property(self.track, self.key, self.new_value)
+
+    def revert(self, model):
+        model._set_track_property(self.track, self.key, self.old_value)
+
+    def merge(self, other):
+        if (isinstance(other, TrackPropertyCommand) and other.track is self.track and other.key == self.key
+                and self.key in self.MERGEABLE_KEYS and other.timestamp - self.timestamp <= self.MERGE_WINDOW):
+            self.new_value = other.new_value
+            self.timestamp = other.timestamp
+            return True
+        return False
+
+
+class EditHistory:
+    """Bounded undo/redo stacks of EditCommands.
+
+    The oldest entries are dropped once either ``max_depth`` commands or
+    ``max_bytes`` of estimated memory are exceeded.
+    """
+
+    def __init__(self, max_depth=100, max_bytes=16 * 1024 * 1024):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()  # (command, size)
+        self.redo_stack = []
+        self.memory_bytes = 0
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def push(self, command):
+        """Record a command that has already been applied"""
+        self._clear_redo()
+        if self.undo_stack and self.undo_stack[-1][0].merge(command):
+            return
+        size = command.get_size()
+        self.undo_stack.append((command, size))
+        self.memory_bytes += size
+        self._enforce_limits()
+
+    def undo(self, model):
+        if not self.undo_stack:
+            return None
+        command, size = self.undo_stack.pop()
+        command.revert(model)
+        self.redo_stack.append((command, size))
+        return command
+
+    def redo(self, model):
+        if not self.redo_stack:
+            return None
+        command, size = self.redo_stack.pop()
+        command.apply(model)
+        self.undo_stack.append((command, size))
+        return command
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.memory_bytes = 0
+
+    def forget_file(self, file_path):
+        """Drop every command whose clip plays ``file_path``, e.g. after the file was deleted"""
+        self.undo_stack = deque(entry for entry in self.undo_stack if not entry[0].references_file(file_path))
+        self.redo_stack = [entry for entry in self.redo_stack if not entry[0].references_file(file_path)]
+        self.memory_bytes = sum(size for _, size in self.undo_stack) + sum(size for _, size in self.redo_stack)
+
+    def get_stats(self):
+        return {
+            'undo_depth': len(self.undo_stack),
+            'redo_depth': len(self.redo_stack),
+            'memory_bytes': self.memory_bytes,
+        }
+
+    def _clear_redo(self):
+        for _, size in self.redo_stack:
+            self.memory_bytes -= size
+        self.redo_stack.clear()
+
+    def _enforce_limits(self):
+        while self.undo_stack and (len(self.undo_stack) > self.max_depth or self.memory_bytes > self.max_bytes):
+            _, size = self.undo_stack.popleft()
+            self.memory_bytes -= size
@@ -1,7 +1,10 @@
 import os
 import re
 import platform
+import tempfile
 import subprocess
+from contextlib import contextmanager
+import mutagen
 from mutagen.mp3 import MP3
 from mutagen.id3 import ID3
 
@@ -16,6 +19,23 @@ def sanitize_filename(filename):
     # Truncate to a reasonable length
     return sanitized[:255]  # 255 is a common maximum filename length
 
+@contextmanager
+def replace_atomically(path):
+    """
+    Yield a private temp path next to ``path`` and move it over ``path`` once the block succeeds.
+    The result is a new file, so hardlinks to the old one (e.g. generation cache objects) are never written through.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.' + os.path.basename(path),
+                                     suffix='.tmp')
+    os.close(fd)
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 def ensure_dir_exists(directory):
     """
     Ensure that a directory exists, creating it if necessary.
@@ -47,4 +67,44 @@ def read_audio_prompt(file_path):
                     return comment.text[0] if isinstance(comment.text, list) else comment.text
     except Exception as e:
         print(f"Error reading audio prompt: {str(e)}")
-    return None
\ No newline at end of file
+    return None
+
+def read_id3_comments(tags):
+    """
+    Return the ID3 COMM frames of a tag set as a {description: text} dict.
+    """
+    comments = {}
+    if tags is None or not hasattr(tags, 'getall'):
+        return comments
+    for comment in tags.getall('COMM'):
+        text = comment.text[0] if isinstance(comment.text, list) and comment.text else comment.text
+        comments.setdefault(comment.desc, str(text) if text is not None else None)
+    return comments
+
+def probe_audio_file(file_path):
+    """
+    Read duration, format and tags from the file header without decoding audio.
+    """
+    info = {
+        'duration': 0.0,
+        'sample_rate': None,
+        'channels': None,
+        'title': None,
+        'comments': {}
+    }
+    audio = mutagen.File(file_path)
+    if audio is None:
+        raise ValueError(f"Unsupported audio file: {file_path}")
+
+    info['duration'] = float(getattr(audio.info, 'length', 0.0) or 0.0)
+    info['sample_rate'] = getattr(audio.info, 'sample_rate', None)
+    info['channels'] = getattr(audio.info, 'channels', None)
+
+    tags = audio.tags
+    if tags is not None and hasattr(tags, 'getall'):
+        titles = tags.getall('TIT2')
+        if titles and titles[0].text:
+            info['title'] = str(titles[0].text[0])
+        info['comments'] = read_id3_comments(tags)
+    return info
+
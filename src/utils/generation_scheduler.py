@@ -0,0 +1,209 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = {'speech': 4, 'sfx': 2, 'music': 1}
+
+
+class GenerationError(Exception):
+    """Raised by a job whose provider call produced no audio"""
+
+
+class GenerationJob:
+    def __init__(self, sequence, provider, run_fn, commit_fn=None, description=''):
+        self.sequence = sequence
+        self.provider = provider
+        self.run_fn = run_fn
+        self.commit_fn = commit_fn
+        self.description = description
+        self.state = 'queued'  # queued, running, done, failed
+        self.future = None
+        self.attempts = 0
+        self.result = None
+        self.error = None
+
+
+class ProviderLimiter:
+    """Spaces out request starts for one provider and pauses it after failures"""
+
+    def __init__(self, requests_per_minute=0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+        self.paused_until = 0.0
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start, self.paused_until)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 errors from requests or the provider SDKs; services re-raise these for retrying"""
+    response = getattr(error, 'response', None)
+    return (getattr(error, 'status_code', None) or getattr(response, 'status_code', None)) == 429
+
+
+def get_retry_after(error):
+    """Return the delay an HTTP 429 error asks for, or None if ``error`` is not a rate limit"""
+    if not is_rate_limit_error(error):
+        return None
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after', 0)) or None
+    except (TypeError, ValueError):
+        return None
+
+
+class GenerationScheduler:
+    """Runs audio generation jobs concurrently, bounded per provider.
+
+    Each provider gets its own worker pool sized by ``concurrency`` and an
+    optional request rate limit. Failed jobs are retried with exponential
+    backoff; while a job backs off the whole provider pauses, so a rate-limited
+    API is not hammered by the other workers. The services re-raise HTTP 429
+    errors so their ``Retry-After`` is honoured here. Jobs finish in any order, but
+    their ``commit_fn`` runs strictly in submission order (a failed job simply
+    releases its slot), so timeline placement that depends on earlier clips
+    stays deterministic. ``commit_fn`` and ``on_progress`` run on a worker
+    thread while the scheduler lock is held and must only hand work off.
+    """
+
+    def __init__(self, concurrency=None, requests_per_minute=None, max_retries=3,
+                 backoff_base=1.0, backoff_max=30.0, on_progress=None):
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.requests_per_minute = requests_per_minute or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.on_progress = on_progress
+        self.condition = threading.Condition()
+        self.executors = {}
+        self.limiters = {}
+        self.jobs = []
+        self.finished = {}  # sequence -> job waiting for earlier jobs to commit
+        self.next_commit = 0
+        self.cancelled = False
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def submit(self, provider, run_fn, commit_fn=None, description=''):
+        """Queue ``run_fn()`` for ``provider``; ``commit_fn(result)`` runs in submission order on success"""
+        with self.condition:
+            job = GenerationJob(len(self.jobs), provider, run_fn, commit_fn, description)
+            self.jobs.append(job)
+            executor = self._get_executor(provider)
+        job.future = executor.submit(self._run, job)
+        return job
+
+    def wait(self, timeout=None):
+        """Block until every submitted job has committed or failed"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.next_commit == len(self.jobs), timeout)
+
+    def shutdown(self):
+        """Cancel queued jobs and stop committing; jobs mid-request finish but are discarded"""
+        with self.condition:
+            self.cancelled = True
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        with self.condition:
+            for job in self.jobs:
+                if job.future is not None and job.future.cancelled():
+                    job.state = 'failed'
+                    job.error = GenerationError("Cancelled")
+                    self.finished[job.sequence] = job
+            # Release the commit slots of cancelled jobs so wait() returns once running jobs end
+            self._advance_commits()
+            self._notify_progress()
+            self.condition.notify_all()
+
+    def get_progress(self):
+        with self.condition:
+            return self._get_progress()
+
+    def _get_progress(self):
+        counts = {'total': len(self.jobs), 'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+        for job in self.jobs:
+            counts[job.state] += 1
+        counts['committed'] = self.next_commit
+        return counts
+
+    def _get_executor(self, provider):
+        if provider not in self.executors:
+            workers = max(1, int(self.concurrency.get(provider) or 1))
+            self.executors[provider] = ThreadPoolExecutor(max_workers=workers,
+                                                          thread_name_prefix=f'generate-{provider}')
+            self.limiters[provider] = ProviderLimiter(self.requests_per_minute.get(provider, 0))
+        return self.executors[provider]
+
+    def _get_backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self, job):
+        limiter = self.limiters[job.provider]
+        while True:
+            # The job stays queued while it waits for the rate limit or a backoff pause
+            limiter.acquire()
+            if self.cancelled:
+                job.error = GenerationError("Cancelled")
+                break
+            self._set_state(job, 'running')
+            job.attempts += 1
+            try:
+                result = job.run_fn()
+                if not result:
+                    raise GenerationError(f"No audio generated for {job.description or job.provider}")
+                job.result = result
+                job.error = None
+                break
+            except Exception as e:
+                job.error = e
+                if job.attempts > self.max_retries:
+                    logging.error(f"Giving up on {job.description or job.provider} after {job.attempts} attempts: {str(e)}")
+                    break
+                delay = get_retry_after(e) or self._get_backoff(job.attempts)
+                self.logger.warning(f"Retrying {job.description or job.provider} in {delay:.1f}s: {str(e)}")
+                limiter.pause(delay)
+                self._set_state(job, 'queued')
+        self._finish(job)
+
+    def _set_state(self, job, state):
+        with self.condition:
+            job.state = state
+            self._notify_progress()
+
+    def _finish(self, job):
+        with self.condition:
+            job.state = 'failed' if job.error is not None else 'done'
+            self.finished[job.sequence] = job
+            self._advance_commits()
+            self._notify_progress()
+            self.condition.notify_all()
+
+    def _advance_commits(self):
+        while self.next_commit in self.finished:
+            ready = self.finished.pop(self.next_commit)
+            self.next_commit += 1
+            if ready.state == 'done' and ready.commit_fn is not None and not self.cancelled:
+                try:
+                    ready.commit_fn(ready.result)
+                except Exception as e:
+                    logging.error(f"Error committing {ready.description or ready.provider}: {str(e)}")
+
+    def _notify_progress(self):
+        if self.on_progress is not None:
+            try:
+                self.on_progress(self._get_progress())
+            except Exception as e:
+                logging.error(f"Error reporting generation progress: {str(e)}")
@@ -0,0 +1,141 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from utils.file_utils import probe_audio_file
+
+
+class MediaIndex:
+    """Per-project SQLite index of audio file metadata.
+
+    Each file is probed once (duration, sample rate, channels, ID3 title and
+    comments) and stored keyed by path, modification time and size. The whole
+    table is read into memory when the index is opened, so later lookups only
+    cost a stat() to confirm the entry is still current.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS media (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            duration REAL NOT NULL,
+            sample_rate INTEGER,
+            channels INTEGER,
+            title TEXT,
+            comments TEXT
+        )
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = None
+        self.connection = None
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.open(db_path)
+
+    def open(self, db_path=None):
+        """Open (or create) the index at ``db_path``; None keeps it in memory"""
+        self.close()
+        with self.lock:
+            self.db_path = db_path
+            if db_path:
+                os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            self.connection = sqlite3.connect(db_path or ':memory:', check_same_thread=False)
+            self.connection.execute(self.SCHEMA)
+            self.connection.commit()
+            self.entries = {}
+            for row in self.connection.execute(
+                    "SELECT path, mtime_ns, size, duration, sample_rate, channels, title, comments FROM media"):
+                self.entries[row[0]] = self._row_to_entry(row)
+        self.logger.info(f"Media index opened with {len(self.entries)} entries: {db_path or ':memory:'}")
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                try:
+                    self.connection.close()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error closing media index: {str(e)}")
+                self.connection = None
+            self.entries = {}
+
+    def _row_to_entry(self, row):
+        try:
+            comments = json.loads(row[7]) if row[7] else {}
+        except ValueError:
+            comments = {}
+        return {
+            'mtime_ns': row[1],
+            'size': row[2],
+            'duration': row[3],
+            'sample_rate': row[4],
+            'channels': row[5],
+            'title': row[6],
+            'comments': comments
+        }
+
+    def _key(self, file_path):
+        return os.path.abspath(file_path)
+
+    def get(self, file_path):
+        """Return the metadata for ``file_path``, probing the file only if it changed"""
+        key = self._key(file_path)
+        stat = os.stat(file_path)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry
+        return self.record(file_path, stat=stat)
+
+    def record(self, file_path, stat=None):
+        """Probe ``file_path`` and store its metadata; call after generating or importing"""
+        key = self._key(file_path)
+        stat = stat or os.stat(file_path)
+        info = probe_audio_file(file_path)
+        entry = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'duration': info['duration'],
+            'sample_rate': info['sample_rate'],
+            'channels': info['channels'],
+            'title': info['title'],
+            'comments': info['comments']
+        }
+        with self.lock:
+            self.entries[key] = entry
+            if self.connection is not None:
+                try:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, entry['mtime_ns'], entry['size'], entry['duration'], entry['sample_rate'],
+                         entry['channels'], entry['title'], json.dumps(entry['comments'])))
+                    self.connection.commit()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error writing media index entry for {file_path}: {str(e)}")
+        return entry
+
+    def forget(self, file_path):
+        key = self._key(file_path)
+        with self.lock:
+            self.entries.pop(key, None)
+            if self.connection is not None:
+                try:
+                    self.connection.execute("DELETE FROM media WHERE path = ?", (key,))
+                    self.connection.commit()
+                except sqlite3.Error as e:
+                    self.logger.error(f"Error removing media index entry for {file_path}: {str(e)}")
+
+    def get_duration(self, file_path):
+        return self.get(file_path)['duration']
+
+    def get_title(self, file_path):
+        return self.get(file_path)['title']
+
+    def get_comment(self, file_path, description):
+        return self.get(file_path)['comments'].get(description)
+
+    def get_prompt(self, file_path):
+        return self.get_comment(file_path, 'Prompt')
@@ -0,0 +1,118 @@
+import os
+import glob
+import hashlib
+import logging
+import tempfile
+import numpy as np
+from pydub import AudioSegment
+
+
+def decode_audio_file(file_path, sample_rate=44100, channels=2):
+    """Decode ``file_path`` into a float32 (frames, channels) array in [-1, 1]"""
+    audio = AudioSegment.from_file(file_path)
+    if audio.frame_rate != sample_rate:
+        logging.info(f"Resampling {file_path} from {audio.frame_rate}Hz to {sample_rate}Hz")
+        audio = audio.set_frame_rate(sample_rate)
+    if audio.channels != channels:
+        audio = audio.set_channels(channels)
+
+    full_scale = float(1 << (8 * audio.sample_width - 1))
+    samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+    samples /= full_scale
+    return samples.reshape((-1, channels))
+
+
+class PCMCache:
+    """On-disk cache of decoded audio, opened with numpy.memmap.
+
+    Every source file is decoded once into a float32 stereo ``.npy`` file keyed
+    by its path, modification time and size. Later lookups map that file
+    read-only instead of decoding again, so slices are zero-copy and residency
+    is left to the OS page cache.
+    """
+
+    def __init__(self, cache_dir, sample_rate=44100, channels=2):
+        self.cache_dir = cache_dir
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def set_cache_dir(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path_hash(self, file_path):
+        return hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+
+    def get_cache_path(self, file_path):
+        stat = os.stat(file_path)
+        name = f"{self._path_hash(file_path)}_{stat.st_mtime_ns}_{stat.st_size}_{self.sample_rate}.npy"
+        return os.path.join(self.cache_dir, name)
+
+    def contains(self, file_path):
+        try:
+            return os.path.exists(self.get_cache_path(file_path))
+        except OSError:
+            return False
+
+    def load(self, file_path):
+        """Map the cached samples for ``file_path``, or return None on a cache miss"""
+        try:
+            cache_path = self.get_cache_path(file_path)
+        except OSError:
+            return None
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            return np.load(cache_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Discarding unreadable PCM cache file {cache_path}: {str(e)}")
+            self._remove(cache_path)
+            return None
+
+    def get(self, file_path):
+        """Return memory-mapped float32 samples for ``file_path``, decoding on a miss"""
+        samples = self.load(file_path)
+        if samples is not None:
+            return samples
+
+        samples = self.decode(file_path)
+        try:
+            self.store(file_path, samples)
+        except OSError as e:
+            # An unwritable cache only costs us the reuse, not playback
+            self.logger.error(f"Error writing PCM cache for {file_path}: {str(e)}")
+            return samples
+        return self.load(file_path)
+
+    def decode(self, file_path):
+        """Decode ``file_path`` into a float32 (frames, channels) array at the cache rate"""
+        return decode_audio_file(file_path, self.sample_rate, self.channels)
+
+    def store(self, file_path, samples):
+        """Atomically write decoded samples and drop stale versions of the same file"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_path = self.get_cache_path(file_path)
+
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.ascontiguousarray(samples, dtype=np.float32))
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+        for stale_path in glob.glob(os.path.join(self.cache_dir, f"{self._path_hash(file_path)}_*.npy")):
+            if stale_path != cache_path:
+                self._remove(stale_path)
+        self.logger.info(f"Cached decoded PCM for {file_path} at {cache_path}")
+
+    def clear(self):
+        for cache_path in glob.glob(os.path.join(self.cache_dir, '*.npy')):
+            self._remove(cache_path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,49 @@
+import logging
+
+
+class PlayheadDriver:
+    """Frame clock that moves the playhead while the timeline is playing.
+
+    The audio callback only publishes the playback position (a single float
+    attribute written from the audio thread). This driver polls it from the
+    Tk thread with ``after()`` at a fixed frame rate and hands it to
+    ``on_frame``, so no Tk call is ever made from the audio thread and the
+    canvas is touched at most once per frame.
+    """
+
+    def __init__(self, widget, get_position, on_frame, fps=30):
+        self.widget = widget
+        self.get_position = get_position
+        self.on_frame = on_frame
+        self.interval = max(1, int(round(1000 / fps)))
+        self.after_id = None
+        self.last_position = None
+
+    @property
+    def is_running(self):
+        return self.after_id is not None
+
+    def start(self):
+        if self.is_running:
+            return
+        self.last_position = None
+        self._tick()
+
+    def stop(self):
+        if self.after_id is not None:
+            try:
+                self.widget.after_cancel(self.after_id)
+            except Exception as e:
+                logging.error(f"Error stopping playhead driver: {str(e)}")
+            self.after_id = None
+
+    def _tick(self):
+        try:
+            position = self.get_position()
+            # Skip the frame entirely if the audio has not advanced
+            if position != self.last_position:
+                self.last_position = position
+                self.on_frame(position)
+        except Exception as e:
+            logging.error(f"Error updating playhead: {str(e)}")
+        self.after_id = self.widget.after(self.interval, self._tick)
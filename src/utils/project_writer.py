@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import atexit
+import logging
+import tempfile
+import itertools
+import threading
+
+
+def write_json_atomic(path, data, indent=None):
+    """Write ``data`` as JSON next to ``path`` and swap it in, so readers never see a partial file"""
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class ProjectWriter:
+    """Background writer that coalesces project file saves.
+
+    ``write()`` only records the latest payload for a path. A single thread
+    writes it once no new payload has arrived for ``delay`` seconds (but at
+    most ``max_delay`` seconds after the first one). JSON encoding and disk IO
+    therefore never run on the UI thread, and a burst of edits costs one
+    write. Every file is replaced atomically. Files are written in the order
+    they were last queued. ``when_written()`` lets a caller learn, without
+    blocking, when everything it queued is on disk.
+    """
+
+    def __init__(self, delay=1.0, max_delay=5.0):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.condition = threading.Condition()
+        self.pending = {}  # path -> function that writes the latest payload to path
+        self.first_write_time = None
+        self.last_write_time = None
+        self.flush_requested = False
+        self.writing = False
+        self.closed = False
+        self.errors = []  # (path, message) of failed writes not yet reported
+        self.callback_ids = itertools.count()
+        self.thread = threading.Thread(target=self._run, daemon=True, name='project-writer')
+        self.thread.start()
+        atexit.register(self.close)
+
+    def write(self, path, data, indent=None):
+        self._queue(path, lambda target: write_json_atomic(target, data, indent))
+
+    def write_with(self, path, save_fn, data):
+        """Queue ``save_fn(path, data)`` for formats other than JSON; ``save_fn`` must write atomically"""
+        self._queue(path, lambda target: save_fn(target, data))
+
+    def remove(self, path):
+        """Delete ``path`` once everything queued before it has been written"""
+        self._queue(path, _remove_file)
+
+    def when_written(self, callback):
+        """Write pending files now and call ``callback(errors)`` from the writer thread once they are on disk
+
+        ``errors`` lists the ``(path, message)`` of writes that failed since
+        the last ``pop_errors()``.
+        """
+        def notify(_):
+            errors = self.pop_errors()
+            try:
+                callback(errors)
+            except Exception as e:
+                logging.error(f"Error in project writer callback: {str(e)}")
+
+        # Queued like a file so it runs after every write queued before it
+        self._queue(('callback', next(self.callback_ids)), notify)
+        self.flush()
+
+    def _queue(self, path, write_fn):
+        with self.condition:
+            if self.closed:
+                # Late saves during shutdown are written straight away
+                self._write(path, write_fn)
+                return
+            now = time.monotonic()
+            if not self.pending:
+                self.first_write_time = now
+            self.last_write_time = now
+            # Re-queueing moves the path to the back so writes keep their order
+            self.pending.pop(path, None)
+            self.pending[path] = write_fn
+            self.condition.notify_all()
+
+    def discard(self, directory):
+        """Drop pending writes below ``directory``, e.g. before it is deleted"""
+        prefix = os.path.join(os.path.abspath(directory), '')
+        with self.condition:
+            for path in [path for path in self.pending
+                         if isinstance(path, str) and os.path.abspath(path).startswith(prefix)]:
+                del self.pending[path]
+
+    def has_pending(self):
+        with self.condition:
+            return bool(self.pending) or self.writing
+
+    def flush(self, wait=False, timeout=None):
+        """Write pending files now; with ``wait`` block until they are on disk"""
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify_all()
+            if wait:
+                return self.condition.wait_for(lambda: not self.pending and not self.writing, timeout)
+        return True
+
+    def pop_errors(self):
+        """Return and forget the writes that failed since the last call"""
+        with self.condition:
+            errors, self.errors = self.errors, []
+        return errors
+
+    def close(self, timeout=10):
+        with self.condition:
+            if self.closed:
+                return
+        self.flush(wait=True, timeout=timeout)
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+
+    def _get_deadline(self):
+        return min(self.last_write_time + self.delay, self.first_write_time + self.max_delay)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.closed and not self.pending:
+                        return
+                    if self.pending and (self.flush_requested or self.closed):
+                        break
+                    if self.pending:
+                        remaining = self._get_deadline() - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.condition.wait(remaining)
+                    else:
+                        self.flush_requested = False
+                        self.condition.wait()
+                batch = self.pending
+                self.pending = {}
+                self.flush_requested = False
+                self.writing = True
+
+            for path, write_fn in batch.items():
+                self._write(path, write_fn)
+
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+    def _write(self, path, write_fn):
+        try:
+            write_fn(path)
+        except Exception as e:
+            logging.error(f"Error writing {path}: {str(e)}")
+            with self.condition:
+                self.errors.append((path, str(e)))
@@ -0,0 +1,64 @@
+class TextFitCache:
+    """Cache of labels truncated with an ellipsis to fit a pixel width.
+
+    Text is measured with ``tkinter.font.Font.measure`` (no canvas items).
+    The ellipsis point is found by binary search. Results are keyed by
+    (text, font, width bucket), so a redraw of an unchanged timeline measures
+    nothing at all. Call ``clear()`` when the font or the zoom changes.
+    """
+
+    ELLIPSIS = "..."
+
+    def __init__(self, font, bucket_width=4, max_entries=10000):
+        self.font = font
+        self.bucket_width = bucket_width
+        self.max_entries = max_entries
+        self.entries = {}
+        self.widths = {}
+
+    def set_font(self, font):
+        self.font = font
+        self.clear()
+
+    def clear(self):
+        self.entries.clear()
+        self.widths.clear()
+
+    def measure(self, text):
+        width = self.widths.get(text)
+        if width is None:
+            width = self.font.measure(text)
+            self.widths[text] = width
+        return width
+
+    def fit(self, text, available_width):
+        """Return ``text`` or a truncated copy ending in '...' that fits, or None if nothing fits"""
+        # Round down to a bucket so tiny width changes reuse the same entry
+        bucket = int(available_width // self.bucket_width) * self.bucket_width
+        key = (text, str(self.font), bucket)
+        if key in self.entries:
+            return self.entries[key]
+
+        if len(self.entries) >= self.max_entries:
+            self.clear()
+        result = self._fit(text, bucket)
+        self.entries[key] = result
+        return result
+
+    def _fit(self, text, width):
+        if width <= 0 or not text:
+            return None
+        if self.measure(text) <= width:
+            return text
+
+        # Longest prefix that still fits with the ellipsis; need at least one character of content
+        low, high = 0, len(text) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.font.measure(text[:middle] + self.ELLIPSIS) <= width:
+                low = middle
+            else:
+                high = middle - 1
+        if low < 1:
+            return None
+        return text[:low] + self.ELLIPSIS
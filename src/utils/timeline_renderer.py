@@ -0,0 +1,220 @@
+import os
+import logging
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import soundfile as sf
+from utils.audio_mixer import AudioMixer
+from utils.clip_index import ClipIndex
+from utils.pcm_cache import PCMCache
+
+RenderClip = namedtuple('RenderClip', ['file_path', 'x', 'duration'])
+
+
+class TimelineRenderer:
+    """Offline renderer that mixes the timeline one fixed-size block at a time.
+
+    Each block is mixed by the shared AudioMixer, which only touches the clips
+    the clip index reports for its time window, and finished blocks are written
+    straight to the encoder, so memory use depends on ``block_size`` rather
+    than on the length of the project.
+    """
+
+    BLOCK_SIZE = 65536  # frames (~1.5s at 44.1kHz)
+
+    def __init__(self, timeline_model, block_size=BLOCK_SIZE, channels=2):
+        self.timeline_model = timeline_model
+        self.block_size = block_size
+        self.channels = channels
+        self.sample_rate = timeline_model.sample_rate
+        self.mixer = AudioMixer(timeline_model, channels, block_size)
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get_total_frames(self):
+        return int(round(self.timeline_model.get_end_time() * self.sample_rate))
+
+    def render_block(self, start_frame, out):
+        """Mix the frames starting at ``start_frame`` into ``out`` (frames, channels)"""
+        return self.mixer.mix(start_frame, out)
+
+    def iter_blocks(self, start_frame=0, end_frame=None):
+        """Yield mixed blocks from ``start_frame`` to ``end_frame``; the buffer is reused"""
+        end_frame = self.get_total_frames() if end_frame is None else end_frame
+        block = np.zeros((self.block_size, self.channels), dtype=np.float32)
+        position = start_frame
+        while position < end_frame:
+            frames = min(self.block_size, end_frame - position)
+            yield position, self.render_block(position, block[:frames])
+            position += frames
+
+    def export(self, file_path, format=None, progress_callback=None):
+        """Stream the mix into ``file_path``; returns the number of frames written"""
+        total_frames = self.get_total_frames()
+        written = 0
+        with sf.SoundFile(file_path, 'w', samplerate=self.sample_rate,
+                          channels=self.channels, format=format) as f:
+            for position, block in self.iter_blocks(0, total_frames):
+                f.write(block)
+                written += len(block)
+                if progress_callback:
+                    progress_callback(written / total_frames)
+        self.logger.info(f"Exported {written} frames to {file_path}")
+        return written
+
+
+class TimelineSnapshot:
+    """Picklable, read-only copy of the audible timeline for render workers.
+
+    It offers the subset of TimelineModel that TimelineRenderer uses, reading
+    samples straight from the on-disk PCM cache.
+    """
+
+    def __init__(self, sample_rate, cache_dir, tracks):
+        self.sample_rate = sample_rate
+        self.cache_dir = cache_dir
+        self.tracks = tracks  # [{'volume_db', 'solo', 'mute', 'clips': [RenderClip]}]
+        self._setup()
+
+    @classmethod
+    def from_model(cls, timeline_model):
+        tracks = [{
+            'volume_db': track.get('volume_db', 0.0),
+            'solo': track.get('solo', False),
+            'mute': track.get('mute', False),
+            'clips': [RenderClip(clip.file_path, clip.x, clip.duration) for clip in track['clips']]
+        } for track in timeline_model.get_tracks()]
+        return cls(timeline_model.sample_rate, timeline_model.pcm_cache.cache_dir, tracks)
+
+    def _setup(self):
+        self.pcm_cache = PCMCache(self.cache_dir, self.sample_rate)
+        self.samples = {}
+        self.indexes = [ClipIndex(track['clips']) for track in self.tracks]
+        for position, track in enumerate(self.tracks):
+            track['index'] = position
+
+    def __getstate__(self):
+        return {'sample_rate': self.sample_rate, 'cache_dir': self.cache_dir,
+                'tracks': [{key: value for key, value in track.items() if key != 'index'}
+                           for track in self.tracks]}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+
+    def get_file_paths(self):
+        return sorted({clip.file_path for track in self.tracks for clip in track['clips']})
+
+    def get_tracks(self):
+        return self.tracks
+
+    def get_clips_in_range(self, track, start_time, end_time):
+        return self.indexes[track['index']].query(start_time, end_time)
+
+    def get_clip_samples(self, clip):
+        samples = self.samples.get(clip.file_path)
+        if samples is None:
+            try:
+                samples = self.pcm_cache.get(clip.file_path)
+            except Exception as e:
+                logging.error(f"Error loading audio for {clip.file_path}: {str(e)}")
+                return None
+            self.samples[clip.file_path] = samples
+        return samples
+
+    def get_end_time(self):
+        return max((index.end_time() for index in self.indexes), default=0.0)
+
+
+def _warm_pcm_cache(cache_dir, sample_rate, file_path):
+    """Decode ``file_path`` into the PCM cache in a worker process"""
+    PCMCache(cache_dir, sample_rate).get(file_path)
+    return file_path
+
+
+def _render_segment(snapshot, start_frame, end_frame, block_size):
+    """Render [start_frame, end_frame) of ``snapshot`` in a worker process"""
+    renderer = TimelineRenderer(snapshot, block_size)
+    segment = np.empty((end_frame - start_frame, renderer.channels), dtype=np.float32)
+    for position, block in renderer.iter_blocks(start_frame, end_frame):
+        segment[position - start_frame:position - start_frame + len(block)] = block
+    return segment
+
+
+class ParallelTimelineRenderer:
+    """Exports the timeline by rendering time segments in a process pool.
+
+    Source files are first decoded into the shared PCM cache in parallel. Then
+    segments of whole frames are mixed by the workers and written to the
+    encoder in order, so the joins are sample-accurate. Only a bounded number
+    of segments is in flight at once, which keeps memory flat for long
+    projects. Encoding itself stays in the calling process. The export is
+    aborted before anything is written if a source file cannot be decoded.
+    """
+
+    SEGMENT_SECONDS = 30
+
+    def __init__(self, timeline_model, workers=None, segment_seconds=SEGMENT_SECONDS,
+                 block_size=TimelineRenderer.BLOCK_SIZE, channels=2):
+        # Take the snapshot up front so the UI can keep editing while we render
+        self.snapshot = TimelineSnapshot.from_model(timeline_model)
+        self.workers = workers or os.cpu_count() or 1
+        self.segment_frames = int(segment_seconds * self.snapshot.sample_rate)
+        self.block_size = block_size
+        self.channels = channels
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get_total_frames(self):
+        return int(round(self.snapshot.get_end_time() * self.snapshot.sample_rate))
+
+    def export(self, file_path, format=None, progress_callback=None, cancel_event=None):
+        """Render and encode the timeline; returns the number of frames written"""
+        total_frames = self.get_total_frames()
+        file_paths = self.snapshot.get_file_paths()
+        segments = [(start, min(start + self.segment_frames, total_frames))
+                    for start in range(0, total_frames, self.segment_frames)]
+        # Decoding counts for a tenth of the progress bar, mixing and encoding the rest
+        decode_weight = 0.1 if file_paths else 0.0
+        written = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            warm_futures = [executor.submit(_warm_pcm_cache, self.snapshot.cache_dir,
+                                            self.snapshot.sample_rate, path) for path in file_paths]
+            failed = []
+            for done, (path, future) in enumerate(zip(file_paths, warm_futures), 1):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"Error decoding {path} for export: {str(e)}")
+                    failed.append(path)
+                if progress_callback:
+                    progress_callback(decode_weight * done / len(warm_futures))
+            if failed:
+                # Exporting anyway would silently leave these clips out of the mix
+                raise IOError(f"Could not decode {len(failed)} audio file(s): "
+                              + ", ".join(os.path.basename(path) for path in failed))
+
+            with sf.SoundFile(file_path, 'w', samplerate=self.snapshot.sample_rate,
+                              channels=self.channels, format=format) as f:
+                pending = []
+                next_segment = 0
+                while next_segment < len(segments) or pending:
+                    while next_segment < len(segments) and len(pending) < self.workers * 2:
+                        start, end = segments[next_segment]
+                        pending.append(executor.submit(_render_segment, self.snapshot,
+                                                       start, end, self.block_size))
+                        next_segment += 1
+
+                    if cancel_event is not None and cancel_event.is_set():
+                        for future in pending:
+                            future.cancel()
+                        self.logger.info(f"Export to {file_path} cancelled")
+                        return written
+
+                    segment = pending.pop(0).result()
+                    f.write(segment)
+                    written += len(segment)
+                    if progress_callback:
+                        progress_callback(decode_weight + (1 - decode_weight) * written / total_frames)
+
+        self.logger.info(f"Exported {written} frames to {file_path} using {self.workers} workers")
+        return written
@@ -0,0 +1,137 @@
+import os
+import json
+import tempfile
+import numpy as np
+
+JSON_FILENAME = "timeline_data.json"
+NPZ_FILENAME = "timeline_data.npz"
+
+# Version history of the columnar schema:
+#   1 - per-track name/solo/mute/volume_db, per-clip track/x/duration/index/path_id, path string table
+FORMAT_VERSION = 1
+
+
+def tracks_to_columns(serializable_tracks):
+    """Flatten serializable tracks into columnar numpy arrays"""
+    clip_count = sum(len(track['clips']) for track in serializable_tracks)
+    clip_track = np.empty(clip_count, dtype=np.int32)
+    clip_x = np.empty(clip_count, dtype=np.float64)
+    clip_duration = np.empty(clip_count, dtype=np.float64)
+    clip_index = np.empty(clip_count, dtype=np.int64)
+    clip_path = np.empty(clip_count, dtype=np.int32)
+    path_ids = {}
+
+    position = 0
+    for track_id, track in enumerate(serializable_tracks):
+        for clip in track['clips']:
+            clip_track[position] = track_id
+            clip_x[position] = clip['x']
+            clip_duration[position] = clip.get('duration') or 0.0
+            index = clip.get('index')
+            clip_index[position] = -1 if index is None else index
+            clip_path[position] = path_ids.setdefault(clip['file_path'], len(path_ids))
+            position += 1
+
+    return {
+        'version': np.int64(FORMAT_VERSION),
+        'track_name': np.array([track['name'] for track in serializable_tracks], dtype=np.str_),
+        'track_solo': np.array([track.get('solo', False) for track in serializable_tracks], dtype=bool),
+        'track_mute': np.array([track.get('mute', False) for track in serializable_tracks], dtype=bool),
+        'track_volume_db': np.array([track.get('volume_db', 0.0) for track in serializable_tracks],
+                                    dtype=np.float64),
+        'clip_track': clip_track,
+        'clip_x': clip_x,
+        'clip_duration': clip_duration,
+        'clip_index': clip_index,
+        'clip_path': clip_path,
+        'paths': np.array(list(path_ids), dtype=np.str_),
+    }
+
+
+def columns_to_tracks(columns):
+    """Rebuild serializable tracks (the JSON layout) from columnar arrays"""
+    paths = columns['paths'].tolist()
+    tracks = [{
+        'name': name,
+        'clips': [],
+        'solo': solo,
+        'mute': mute,
+        'volume_db': volume_db,
+    } for name, solo, mute, volume_db in zip(columns['track_name'].tolist(), columns['track_solo'].tolist(),
+                                             columns['track_mute'].tolist(), columns['track_volume_db'].tolist())]
+
+    # tolist() converts whole columns at once instead of boxing numpy scalars per clip
+    for track_id, x, duration, index, path_id in zip(columns['clip_track'].tolist(), columns['clip_x'].tolist(),
+                                                     columns['clip_duration'].tolist(),
+                                                     columns['clip_index'].tolist(), columns['clip_path'].tolist()):
+        tracks[track_id]['clips'].append({
+            'file_path': paths[path_id],
+            'x': x,
+            'duration': duration,
+            'index': None if index < 0 else index,
+        })
+    return tracks
+
+
+def _migrate_columns(columns):
+    """Upgrade columns written by an older schema version to FORMAT_VERSION"""
+    version = int(columns['version'])
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Timeline format version {version} is newer than supported ({FORMAT_VERSION})")
+    # No older columnar versions exist yet; upgrades go here as ``if version < N`` steps
+    return columns
+
+
+def save_npz(path, serializable_tracks):
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **tracks_to_columns(serializable_tracks))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_npz(path):
+    with np.load(path, allow_pickle=False) as data:
+        columns = {name: data[name] for name in data.files}
+    return columns_to_tracks(_migrate_columns(columns))
+
+
+def load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_timeline(path):
+    """Load serializable tracks from either a .npz or a .json timeline file"""
+    if path.endswith('.npz'):
+        return load_npz(path)
+    return load_json(path)
+
+
+def get_timeline_file(project_dir, timeline_format='json'):
+    """Return the timeline file a project uses for ``timeline_format`` ('json' or 'npz')"""
+    return os.path.join(project_dir, NPZ_FILENAME if timeline_format == 'npz' else JSON_FILENAME)
+
+
+def find_timeline_file(project_dir):
+    """Return the newest existing timeline file of a project, or None"""
+    candidates = [os.path.join(project_dir, name) for name in (NPZ_FILENAME, JSON_FILENAME)]
+    existing = [path for path in candidates if os.path.exists(path)]
+    return max(existing, key=os.path.getmtime) if existing else None
+
+
+def migrate_json_to_npz(project_dir):
+    """Convert a project's timeline_data.json to the columnar format; the JSON file is left in place"""
+    tracks = load_json(os.path.join(project_dir, JSON_FILENAME))
+    npz_path = os.path.join(project_dir, NPZ_FILENAME)
+    save_npz(npz_path, tracks)
+    return npz_path
@@ -0,0 +1,63 @@
+import queue
+import logging
+import threading
+
+
+class TkDispatcher:
+    """Single hand-off point from background threads to the Tk thread.
+
+    Tk may only be called from the thread running the main loop. Worker
+    threads, audio callbacks, the generation scheduler and the waveform pool
+    therefore never call ``after()`` themselves. They ``post()`` a callable to
+    a thread-safe queue, which never blocks the caller. The Tk thread drains
+    the queue every ``interval`` ms, in posting order. Code already on the Tk
+    thread calls widgets directly.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, interval=15):
+        self.interval = interval
+        self.queue = queue.SimpleQueue()
+        self.root = None
+        self.after_id = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def attach(self, root):
+        """Start draining posted callbacks on ``root``'s Tk thread; call from that thread"""
+        self.detach()
+        self.root = root
+        self._poll()
+
+    def detach(self):
+        if self.after_id is not None:
+            try:
+                self.root.after_cancel(self.after_id)
+            except Exception as e:
+                self.logger.debug(f"Error stopping Tk dispatcher: {str(e)}")
+            self.after_id = None
+        self.root = None
+
+    def post(self, callback, *args):
+        """Queue ``callback(*args)`` to run on the Tk thread; safe from any thread"""
+        self.queue.put((callback, args))
+
+    def _poll(self):
+        while True:
+            try:
+                callback, args = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.error(f"Error running callback on the Tk thread: {str(e)}", exc_info=True)
+        self.after_id = self.root.after(self.interval, self._poll)
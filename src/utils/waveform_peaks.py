@@ -0,0 +1,164 @@
+import os
+import logging
+import tempfile
+import numpy as np
+from utils.pcm_cache import decode_audio_file
+
+
+class WaveformPeaks:
+    """Multi-resolution min/max/RMS peak pyramid for one audio file.
+
+    The pyramid is computed once per file with vectorised reductions and saved
+    next to the audio as ``<file>.peaks``. Waveforms at any zoom level are then
+    drawn from the closest level without decoding the audio again.
+    """
+
+    VERSION = 1
+    LEVELS = (256, 1024, 4096)  # samples per bin
+    SAMPLE_RATE = 44100
+
+    def __init__(self, sample_rate, frames, levels, source_mtime_ns=0, source_size=0):
+        self.sample_rate = sample_rate
+        self.frames = frames
+        self.levels = levels  # samples per bin -> (mins, maxs, rms)
+        self.source_mtime_ns = source_mtime_ns
+        self.source_size = source_size
+        finest = levels[min(levels)]
+        self.peak = float(max(np.max(np.abs(finest[0]), initial=0.0), np.max(np.abs(finest[1]), initial=0.0)))
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    @staticmethod
+    def get_peaks_path(audio_file):
+        return f"{audio_file}.peaks"
+
+    @classmethod
+    def compute(cls, samples, sample_rate, levels=LEVELS):
+        """Build the pyramid from a (frames, channels) float array"""
+        frames = len(samples)
+        samples = samples.reshape((frames, -1))
+        pyramid = {}
+
+        finest = levels[0]
+        bins = -(-frames // finest)
+        padded = np.zeros((bins * finest, samples.shape[1]), dtype=np.float32)
+        padded[:frames] = samples
+        blocks = padded.reshape((bins, finest * samples.shape[1]))
+        mins = blocks.min(axis=1)
+        maxs = blocks.max(axis=1)
+        power = np.square(blocks).mean(axis=1)
+        pyramid[finest] = (mins, maxs, np.sqrt(power))
+
+        # Coarser levels reduce the level below instead of the raw samples
+        previous = finest
+        for level in levels[1:]:
+            factor = level // previous
+            bins = -(-len(mins) // factor)
+            pad = bins * factor - len(mins)
+            mins = np.pad(mins, (0, pad)).reshape((bins, factor)).min(axis=1)
+            maxs = np.pad(maxs, (0, pad)).reshape((bins, factor)).max(axis=1)
+            power = np.pad(power, (0, pad)).reshape((bins, factor)).mean(axis=1)
+            pyramid[level] = (mins, maxs, np.sqrt(power))
+            previous = level
+
+        return cls(sample_rate, frames, {level: tuple(a.astype(np.float32) for a in arrays)
+                                         for level, arrays in pyramid.items()})
+
+    @classmethod
+    def load(cls, peaks_path):
+        with np.load(peaks_path) as data:
+            if int(data['version']) != cls.VERSION:
+                raise ValueError(f"Unsupported peak file version in {peaks_path}")
+            levels = {int(level): (data[f'min_{level}'], data[f'max_{level}'], data[f'rms_{level}'])
+                      for level in data['levels']}
+            return cls(int(data['sample_rate']), int(data['frames']), levels,
+                       int(data['source_mtime_ns']), int(data['source_size']))
+
+    def save(self, peaks_path):
+        arrays = {
+            'version': np.int64(self.VERSION),
+            'sample_rate': np.int64(self.sample_rate),
+            'frames': np.int64(self.frames),
+            'source_mtime_ns': np.int64(self.source_mtime_ns),
+            'source_size': np.int64(self.source_size),
+            'levels': np.array(sorted(self.levels), dtype=np.int64),
+        }
+        for level, (mins, maxs, rms) in self.levels.items():
+            arrays[f'min_{level}'] = mins
+            arrays[f'max_{level}'] = maxs
+            arrays[f'rms_{level}'] = rms
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(peaks_path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, peaks_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def for_file(cls, audio_file):
+        """Load the peak file for ``audio_file``, (re)building it if missing or stale"""
+        stat = os.stat(audio_file)
+        peaks_path = cls.get_peaks_path(audio_file)
+        if os.path.exists(peaks_path):
+            try:
+                peaks = cls.load(peaks_path)
+                if peaks.source_mtime_ns == stat.st_mtime_ns and peaks.source_size == stat.st_size:
+                    return peaks
+            except Exception as e:
+                logging.warning(f"Rebuilding unreadable peak file {peaks_path}: {str(e)}")
+
+        samples = decode_audio_file(audio_file, cls.SAMPLE_RATE)
+        peaks = cls.compute(samples, cls.SAMPLE_RATE)
+        peaks.source_mtime_ns = stat.st_mtime_ns
+        peaks.source_size = stat.st_size
+        try:
+            peaks.save(peaks_path)
+        except OSError as e:
+            logging.error(f"Error writing peak file {peaks_path}: {str(e)}")
+        return peaks
+
+    def get_columns(self, start_time, end_time, width):
+        """Return (mins, maxs, rms) arrays with one value per pixel column"""
+        width = max(0, int(width))
+        empty = np.zeros(width, dtype=np.float32)
+        if width == 0 or end_time <= start_time:
+            return empty, empty.copy(), empty.copy()
+
+        samples_per_pixel = (end_time - start_time) * self.sample_rate / width
+        # Coarsest level that still gives at least one bin per pixel
+        level = min(self.levels)
+        for candidate in sorted(self.levels):
+            if candidate <= samples_per_pixel:
+                level = candidate
+        mins, maxs, rms = self.levels[level]
+        bins = len(mins)
+        if bins == 0:
+            return empty, empty.copy(), empty.copy()
+
+        edges = np.floor((start_time * self.sample_rate + np.arange(width + 1) * samples_per_pixel) / level)
+        edges = edges.astype(np.int64)
+        starts = np.clip(edges[:-1], 0, bins - 1)
+        stops = np.clip(np.maximum(edges[1:], edges[:-1] + 1), 1, bins)
+        stops = np.maximum(stops, starts + 1)
+        valid = (edges[:-1] < bins) & (edges[1:] >= 0)
+
+        # reduceat over interleaved [start, stop) pairs; the sentinel keeps ``bins`` a valid index
+        indices = np.empty(width * 2, dtype=np.int64)
+        indices[0::2] = starts
+        indices[1::2] = stops
+        column_mins = np.minimum.reduceat(np.append(mins, 0), indices)[0::2]
+        column_maxs = np.maximum.reduceat(np.append(maxs, 0), indices)[0::2]
+        power = np.add.reduceat(np.append(np.square(rms), 0), indices)[0::2] / (stops - starts)
+
+        column_mins[~valid] = 0
+        column_maxs[~valid] = 0
+        power[~valid] = 0
+        return column_mins, column_maxs, np.sqrt(power).astype(np.float32)
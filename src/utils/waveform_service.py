@@ -0,0 +1,124 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.waveform_peaks import WaveformPeaks
+from utils.tk_dispatcher import TkDispatcher
+
+
+class CancellationToken:
+    """Flag a render job checks between stages to stop early"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self._event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class WaveformService:
+    """Shared background pool for waveform rendering.
+
+    Requests are keyed by an owner (usually a widget). A new request for the
+    same owner cancels the previous one, so only the latest request per owner
+    ever delivers. Results return to the Tk thread through the TkDispatcher,
+    and only if the request is still current and the widget still exists. Peak pyramids are kept in a
+    small LRU so repeated renders of the same file skip the disk.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_workers=2, max_cached_peaks=64):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='waveform')
+        self.lock = threading.Lock()
+        self.pending = {}  # owner -> CancellationToken
+        self.peaks_cache = OrderedDict()  # file_path -> (mtime_ns, size, WaveformPeaks)
+        self.max_cached_peaks = max_cached_peaks
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def request(self, owner, widget, render_fn, callback):
+        """Run ``render_fn(token)`` in the pool and pass its result to ``callback`` on the Tk thread"""
+        token = CancellationToken()
+        with self.lock:
+            previous = self.pending.get(owner)
+            self.pending[owner] = token
+        if previous is not None:
+            previous.cancel()
+        token.future = self.executor.submit(self._run, owner, token, widget, render_fn, callback)
+        return token
+
+    def is_pending(self, owner):
+        with self.lock:
+            return owner in self.pending
+
+    def cancel(self, owner):
+        with self.lock:
+            token = self.pending.pop(owner, None)
+        if token is not None:
+            token.cancel()
+
+    def _run(self, owner, token, widget, render_fn, callback):
+        if token.cancelled:
+            return
+        try:
+            result = render_fn(token)
+        except Exception as e:
+            self.logger.error(f"Error rendering waveform: {str(e)}", exc_info=True)
+            result = None
+        if token.cancelled:
+            return
+        TkDispatcher.get_instance().post(self._deliver, owner, token, widget, callback, result)
+
+    def _finish(self, owner, token):
+        with self.lock:
+            if self.pending.get(owner) is token:
+                del self.pending[owner]
+                return True
+        return False
+
+    def _deliver(self, owner, token, widget, callback, result):
+        if not self._finish(owner, token) or token.cancelled:
+            return
+        try:
+            if not widget.winfo_exists():
+                return
+        except Exception as e:
+            # The widget was destroyed while we were rendering
+            self.logger.debug(f"Dropping waveform result: {str(e)}")
+            return
+        try:
+            callback(result)
+        except Exception as e:
+            self.logger.error(f"Error delivering waveform: {str(e)}", exc_info=True)
+
+    def get_peaks(self, file_path):
+        """Return the peak pyramid for ``file_path``, building it on first use"""
+        stat = os.stat(file_path)
+        with self.lock:
+            entry = self.peaks_cache.get(file_path)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self.peaks_cache.move_to_end(file_path)
+                return entry[2]
+
+        peaks = WaveformPeaks.for_file(file_path)
+        with self.lock:
+            self.peaks_cache[file_path] = (stat.st_mtime_ns, stat.st_size, peaks)
+            while len(self.peaks_cache) > self.max_cached_peaks:
+                self.peaks_cache.popitem(last=False)
+        return peaks
@@ -5,6 +5,7 @@ import time
 from tkinter import messagebox
 from utils.audio_visualizer import AudioVisualizer
 from utils.audio_file_selector import AudioFileSelector
+from utils.tk_dispatcher import TkDispatcher
 import sounddevice as sd
 import soundfile as sf
 import numpy as np
@@ -818,12 +819,12 @@ class AudioGeneratorView(ctk.CTkFrame):
             if self.controller:
                 success = self.controller.handle_voice_preview(description, text)
                 if success:
-                    self.after(0, self.show_preview_controls)
+                    TkDispatcher.get_instance().post(self.show_preview_controls)
                 else:
-                    self.after(0, lambda: messagebox.showerror("Error", "Failed to generate voice previews"))
+                    TkDispatcher.get_instance().post(lambda: messagebox.showerror("Error", "Failed to generate voice previews"))
             
-            self.after(0, self.hide_progress_bar)
-            self.after(0, lambda: self.preview_button.configure(state="normal"))
+            TkDispatcher.get_instance().post(self.hide_progress_bar)
+            TkDispatcher.get_instance().post(lambda: self.preview_button.configure(state="normal"))
         
         threading.Thread(target=preview_thread, daemon=True).start()
 
@@ -973,8 +974,8 @@ class AudioGeneratorView(ctk.CTkFrame):
         db = 20 * np.log10(max(1e-9, rms))
         normalized_level = min(1.0, max(0, (db + 60) / 60))  # Normalize between -60dB and 0dB
         
-        # Update level meter (using after to ensure thread safety)
-        self.after(0, lambda: self.update_level_meter(normalized_level))
+        # Runs on the audio input thread; the meter is updated on the Tk thread
+        TkDispatcher.get_instance().post(lambda: self.update_level_meter(normalized_level))
 
     def update_level_meter(self, level):
         """Update the level meter visualization"""
@@ -1187,9 +1188,11 @@ class AudioGeneratorView(ctk.CTkFrame):
         self.audio_visualizer.set_on_click_seek(command)
 
     def update_voice_dropdown(self, voices):
-        self.voice_dropdown.configure(values=[voice[0] for voice in voices])
-        if voices:
-            self.selected_voice.set(voices[0][0])
+        names = [voice[0] for voice in voices]
+        self.voice_dropdown.configure(values=names)
+        # Keep the current choice when the list is refreshed in the background
+        if names and self.selected_voice.get() not in names:
+            self.selected_voice.set(names[0])
     
     def set_add_to_reaper_command(self, command):
         self.add_to_reaper_button.configure(command=command)
\ No newline at end of file
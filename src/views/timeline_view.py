@@ -2,15 +2,20 @@
 
 import customtkinter as ctk
 import tkinter as tk
+import tkinter.font as tkfont
 import logging
 import os 
 import textwrap
+from collections import OrderedDict
 from tkinter import messagebox
 from utils.audio_clip import AudioClip
 from utils.audio_visualizer import AudioVisualizer
+from utils.waveform_service import WaveformService
+from PIL import ImageTk
 from utils.keyboard_shortcuts import KeyboardShortcuts
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
+from utils.text_fit_cache import TextFitCache
+from utils.playhead_driver import PlayheadDriver
+from utils.clip_hit_index import ClipHitIndex
 
 
 class TimelineView(ctk.CTkToplevel):
@@ -57,19 +62,42 @@ class TimelineView(ctk.CTkToplevel):
         self.max_x_zoom = 4.0
         self.option_key_pressed = False
         self.waveform_images = {}
-        self.waveform_cache = {}
+        self.waveform_cache = OrderedDict()  # (file_path, tile_index, tile_width) -> PhotoImage
+        self.waveform_cache_scale = None
+        self.waveform_requests = set()  # owners of tile renders in flight at the current scale
+        self.waveform_tile_width = 1024  # pixels
+        self.max_waveform_tiles = 256
+        self.clip_items = {}  # clip -> canvas item ids and the state they were last drawn with
+        self.canvas_item_pool = {"rectangle": [], "text": [], "image": []}
+        self.max_pooled_items = 500
+        self.canvas_items_added = False
+        self.viewport_margin = 0.5  # fraction of the view width drawn beyond each edge
+        self.track_highlight = None
+        self.drag_items = None
+        self.clip_label_font = tkfont.nametofont("TkDefaultFont")
+        self.text_fit_cache = TextFitCache(self.clip_label_font)
+        self.waveform_redraw_id = None
         self.timeline_width = 10000  # Initial width, will be adjusted based on clips
         self.playhead_line = None
         self.playhead_position = 0
+        settings = self.timeline_model.config.get('settings', {})
+        self.playhead_driver = PlayheadDriver(self, self.timeline_model.get_playhead_position,
+                                              self.update_playhead_position,
+                                              fps=settings.get('playhead_fps', 30))
         self.after_id = None
         self.after_ids = []
         self.start_time = 0
         self.selected_clip = None
+        self.selected_clips = set()  # rubber-band / shift-click selection
+        self.clip_hit_index = ClipHitIndex()
+        self.rubber_band_start = None
+        self.rubber_band_item = None
         self.dragging = False
         self.drag_start_x = 0
         self.drag_start_y = 0
         self.drag_threshold = 5  # pixels
         self.drag_offset = 0  # Store the click position relative to clip start
+        self.track_headers = {}  # visible track row -> pooled header widgets
         self.track_volume_vars = {}
         self.solo_buttons = {}  # Initialize solo_buttons
         self.mute_buttons = {}  # Initialize mute_buttons
@@ -113,6 +141,7 @@ class TimelineView(ctk.CTkToplevel):
         self.timeline_canvas.bind("<ButtonPress-1>", self.on_canvas_click)
         self.timeline_canvas.bind("<B1-Motion>", self.on_drag)
         self.timeline_canvas.bind("<ButtonRelease-1>", self.on_drag_release)
+        self.timeline_canvas.bind("<Shift-ButtonPress-1>", self.select_multiple_clips)
         self.timeline_canvas.bind("<Button-2>", self.show_clip_context_menu)
         
         self.track_label_canvas.bind("<Button-2>", self.show_track_context_menu)
@@ -254,15 +283,26 @@ class TimelineView(ctk.CTkToplevel):
             formatted_time = self.format_time_label(i)
             self.topbar.create_text(x, 15, text=formatted_time, fill="white", anchor="center")
 
+    def get_visible_region(self, margin=False):
+        """Return the visible canvas area as (start_x, end_x, start_y, end_y)"""
+        width = self.timeline_canvas.winfo_width()
+        height = self.timeline_canvas.winfo_height()
+        start_x = self.timeline_canvas.canvasx(0)
+        start_y = self.timeline_canvas.canvasy(0)
+        end_x = start_x + width
+        end_y = start_y + height
+        if margin:
+            # Pre-create items a little outside the view so small scrolls need no new items
+            start_x -= width * self.viewport_margin
+            end_x += width * self.viewport_margin
+            start_y -= self.track_height
+            end_y += self.track_height
+        return start_x, end_x, start_y, end_y
+
     def draw_grid(self):
         self.timeline_canvas.delete("grid")
         
-        width = self.timeline_width
-        height = len(self.tracks) * self.track_height
-        visible_start_x = self.timeline_canvas.canvasx(0)
-        visible_end_x = self.timeline_canvas.canvasx(self.timeline_canvas.winfo_width())
-        visible_start_y = self.timeline_canvas.canvasy(0)
-        visible_end_y = self.timeline_canvas.canvasy(self.timeline_canvas.winfo_height())
+        visible_start_x, visible_end_x, visible_start_y, visible_end_y = self.get_visible_region()
         
         # Draw vertical lines (1 second apart at default zoom)
         seconds_per_line = max(1, round(100 * self.seconds_per_pixel))
@@ -275,8 +315,10 @@ class TimelineView(ctk.CTkToplevel):
         start_track = max(0, int(visible_start_y // self.track_height))
         end_track = min(len(self.tracks), int(visible_end_y // self.track_height) + 1)
         for i in range(start_track, end_track + 1):
-            y = i * self.track_height - self.scroll_offset
+            y = i * self.track_height
             self.timeline_canvas.create_line(visible_start_x, y, visible_end_x, y, fill="gray50", tags="grid")
+        self.timeline_canvas.tag_lower("grid")
+        self.timeline_canvas.tag_lower("track_highlight")
 
     def create_status_bar(self):
         self.status_var = tk.StringVar()
@@ -287,14 +329,102 @@ class TimelineView(ctk.CTkToplevel):
         self.controller = controller
 
     def redraw_timeline(self):
-        self.timeline_canvas.delete("all")
+        """Sync the canvas with the tracks, only touching clips near the viewport.
+
+        Canvas items are kept per clip and updated in place; items of clips that
+        are no longer near the viewport go back to a pool for reuse.
+        """
         self.draw_grid()
-        for track_index, track in enumerate(self.tracks):
-            y = track_index * self.track_height - self.scroll_offset
-            for clip in track['clips']:
-                self.draw_clip(clip, y)
+        self.update_track_highlight()
+
+        start_x, end_x, start_y, end_y = self.get_visible_region(margin=True)
+        start_time = max(0, start_x * self.seconds_per_pixel)
+        end_time = end_x * self.seconds_per_pixel
+        start_track = max(0, int(start_y // self.track_height))
+        end_track = min(len(self.tracks), int(end_y // self.track_height) + 1)
+
+        visible_clips = {}
+        for track_index in range(start_track, end_track):
+            track = self.tracks[track_index]
+            for clip in self.timeline_model.get_clips_in_range(track, start_time, end_time):
+                visible_clips[clip] = track_index
+
+        # Free items of clips that left the viewport first so new clips can reuse them
+        for clip in [clip for clip in self.clip_items if clip not in visible_clips]:
+            self.recycle_clip_items(clip)
+        for clip, track_index in visible_clips.items():
+            self.draw_clip(clip, track_index)
+
+        if self.canvas_items_added:
+            self.restack_canvas_items()
         self.draw_playhead(self.playhead_position / self.seconds_per_pixel)
 
+    def take_canvas_item(self, kind):
+        """Reuse a pooled canvas item of ``kind`` or create a new one"""
+        pool = self.canvas_item_pool[kind]
+        if pool:
+            item = pool.pop()
+            self.timeline_canvas.itemconfigure(item, state="normal")
+        elif kind == "rectangle":
+            item = self.timeline_canvas.create_rectangle(0, 0, 0, 0, outline="blue", tags=("clip", "clip_rect"))
+        elif kind == "text":
+            item = self.timeline_canvas.create_text(0, 0, anchor="w", font=self.clip_label_font,
+                                                    tags=("clip", "clip_text"))
+        else:
+            item = self.timeline_canvas.create_image(0, 0, anchor="nw", tags=("clip", "clip_image"))
+        self.canvas_items_added = True
+        return item
+
+    def release_canvas_item(self, kind, item):
+        pool = self.canvas_item_pool[kind]
+        if len(pool) >= self.max_pooled_items:
+            self.timeline_canvas.delete(item)
+            return
+        if kind == "image":
+            self.timeline_canvas.itemconfigure(item, image="", state="hidden")
+        else:
+            self.timeline_canvas.itemconfigure(item, state="hidden")
+        pool.append(item)
+
+    def recycle_clip_items(self, clip):
+        items = self.clip_items.pop(clip, None)
+        if items is None:
+            return
+        self.release_canvas_item("rectangle", items['rect'])
+        self.release_canvas_item("text", items['text'])
+        for tile in items['tiles'].values():
+            self.release_canvas_item("image", tile['item'])
+
+    def clear_clip_items(self):
+        for clip in list(self.clip_items):
+            self.recycle_clip_items(clip)
+
+    def restack_canvas_items(self):
+        # Pooled items keep their old stacking position, so restore the layer order
+        self.timeline_canvas.tag_raise("clip_rect")
+        self.timeline_canvas.tag_raise("clip_image")
+        self.timeline_canvas.tag_raise("clip_text")
+        self.timeline_canvas.tag_raise("dragged_clip")
+        self.timeline_canvas.tag_raise("playhead")
+        self.canvas_items_added = False
+
+    def update_track_highlight(self):
+        if self.selected_track is None or not any(track is self.selected_track for track in self.tracks):
+            self.timeline_canvas.delete("track_highlight")
+            self.track_highlight = None
+            return
+
+        track_index = next(i for i, track in enumerate(self.tracks) if track is self.selected_track)
+        y1 = track_index * self.track_height
+        y2 = y1 + self.track_height
+        start_x, end_x, _, _ = self.get_visible_region()
+        if self.track_highlight is None:
+            self.track_highlight = self.timeline_canvas.create_rectangle(
+                start_x, y1, end_x, y2, fill="gray40", outline="", tags="track_highlight")
+        else:
+            self.timeline_canvas.coords(self.track_highlight, start_x, y1, end_x, y2)
+        self.timeline_canvas.tag_lower("track_highlight")
+
     def update_status(self, message):
         self.status_var.set(message)
 
@@ -406,73 +536,120 @@ class TimelineView(ctk.CTkToplevel):
             self.controller.set_playhead_position(new_position)
 
     def update_track_labels(self):
-        self.track_label_canvas.delete("all")
+        """Sync the pooled track headers with the tracks in view"""
         visible_start = int(self.track_label_canvas.canvasy(0))
         visible_end = int(self.track_label_canvas.canvasy(self.track_label_canvas.winfo_height()))
         
         start_index = max(0, int(visible_start / self.track_height))
         end_index = min(len(self.tracks), int(visible_end / self.track_height) + 1)
 
+        # Headers whose row left the view are handed to rows that entered it
+        spare = [self.track_headers.pop(row) for row in list(self.track_headers)
+                 if not start_index <= row < end_index]
+
         for i in range(start_index, end_index):
-            track = self.tracks[i]
-            y = i * self.track_height - self.scroll_offset
-            fill_color = "gray35" if track == self.selected_track else "gray25"
-            self.track_label_canvas.create_rectangle(0, y, 200, y + self.track_height, fill=fill_color, tags=f"track_{i}")
-            
-            # Create track name slightly higher
-            self.track_label_canvas.create_text(10, y + (self.track_height // 2) - 10, 
-                                              text=track["name"], anchor="w", fill="white", 
-                                              tags=f"track_{i}")
-            
-            # Add Solo button
-            solo_button = ctk.CTkButton(self.track_label_canvas, text="S", width=20, height=20, 
-                                        fg_color="green" if track.get("solo", False) else "gray50",
-                                        command=lambda t=track: self.toggle_solo(t))
-            solo_button_window = self.track_label_canvas.create_window(140, y + self.track_height // 2 - 10, window=solo_button)
-            self.solo_buttons[i] = solo_button
-            
-            # Add Mute button
-            mute_button = ctk.CTkButton(self.track_label_canvas, text="M", width=20, height=20, 
-                                        fg_color="red" if track.get("mute", False) else "gray50",
-                                        command=lambda t=track: self.toggle_mute(t))
-            mute_button_window = self.track_label_canvas.create_window(170, y + self.track_height // 2 - 10, window=mute_button)
-            self.mute_buttons[i] = mute_button
-            
-            # Add volume slider and label if track height is sufficient
-            if self.track_height >= self.min_track_height_for_slider:
-                # Create volume entry
-                volume_db = track.get("volume_db", 0.0)
-                volume_entry = ctk.CTkEntry(self.track_label_canvas, 
-                                          width=70,
-                                          height=20,
-                                          fg_color="gray35",
-                                          text_color="white")
-                volume_entry.insert(0, self.format_db(volume_db))
-                volume_entry_window = self.track_label_canvas.create_window(
-                    40, y + self.track_height - 15, window=volume_entry)
-                
-                # Create volume slider
-                volume_slider = ctk.CTkSlider(self.track_label_canvas, 
-                                            from_=-70, to=3,
-                                            width=100,
-                                            number_of_steps=730)  # 0.1 dB steps
-                volume_slider.set(volume_db)
-                volume_slider_window = self.track_label_canvas.create_window(
-                    140, y + self.track_height - 15, window=volume_slider)
-                
-                # Store references to the widgets
-                self.track_volume_vars[i] = {
-                    'slider': volume_slider,
-                    'entry': volume_entry
-                }
-                
-                # Bind the volume slider to update function and double-click
-                volume_slider.configure(command=lambda value, t=track: self.update_volume(t, value))
-                volume_slider.bind('<Double-Button-1>', lambda e, t=track: self.reset_volume(t))
-                
-                # Bind entry events
-                volume_entry.bind('<Return>', lambda e, t=track: self.handle_volume_entry(e, t))
-                volume_entry.bind('<FocusOut>', lambda e, t=track: self.handle_volume_entry(e, t))
+            header = self.track_headers.get(i)
+            if header is None:
+                header = spare.pop() if spare else self.create_track_header()
+                self.track_headers[i] = header
+            self.sync_track_header(header, i, self.tracks[i])
+
+        for header in spare:
+            self.destroy_track_header(header)
+
+        self.solo_buttons = {row: header['solo'] for row, header in self.track_headers.items()}
+        self.mute_buttons = {row: header['mute'] for row, header in self.track_headers.items()}
+        self.track_volume_vars = {row: {'slider': header['slider'], 'entry': header['entry']}
+                                  for row, header in self.track_headers.items()
+                                  if header['state'].get('show_volume')}
+
+    def create_track_header(self):
+        canvas = self.track_label_canvas
+        header = {'track': None, 'state': {}}
+        # Widget callbacks look the track up when they fire, so a header can move between tracks
+        header['rect'] = canvas.create_rectangle(0, 0, 200, 0, fill="gray25", tags="track_header")
+        header['name'] = canvas.create_text(10, 0, text="", anchor="w", fill="white", tags="track_header")
+
+        header['solo'] = ctk.CTkButton(canvas, text="S", width=20, height=20, fg_color="gray50",
+                                       command=lambda: self.toggle_solo(header['track']))
+        header['solo_window'] = canvas.create_window(140, 0, window=header['solo'])
+
+        header['mute'] = ctk.CTkButton(canvas, text="M", width=20, height=20, fg_color="gray50",
+                                       command=lambda: self.toggle_mute(header['track']))
+        header['mute_window'] = canvas.create_window(170, 0, window=header['mute'])
+
+        header['entry'] = ctk.CTkEntry(canvas, width=70, height=20, fg_color="gray35", text_color="white")
+        header['entry'].bind('<Return>', lambda e: self.handle_volume_entry(e, header['track']))
+        header['entry'].bind('<FocusOut>', lambda e: self.handle_volume_entry(e, header['track']))
+        header['entry_window'] = canvas.create_window(40, 0, window=header['entry'])
+
+        header['slider'] = ctk.CTkSlider(canvas, from_=-70, to=3, width=100,
+                                         number_of_steps=730,  # 0.1 dB steps
+                                         command=lambda value: self.update_volume(header['track'], value))
+        header['slider'].bind('<Double-Button-1>', lambda e: self.reset_volume(header['track']))
+        header['slider_window'] = canvas.create_window(140, 0, window=header['slider'])
+        return header
+
+    def sync_track_header(self, header, row, track):
+        """Move ``header`` to ``row`` and apply only the state that changed since it was last drawn"""
+        canvas = self.track_label_canvas
+        state = header['state']
+        if header['track'] is not track:
+            header['track'] = track
+            state.clear()
+
+        y = row * self.track_height
+        layout = (y, self.track_height)
+        if state.get('layout') != layout:
+            middle = y + self.track_height // 2 - 10
+            bottom = y + self.track_height - 15
+            canvas.coords(header['rect'], 0, y, 200, y + self.track_height)
+            canvas.coords(header['name'], 10, middle)
+            canvas.coords(header['solo_window'], 140, middle)
+            canvas.coords(header['mute_window'], 170, middle)
+            canvas.coords(header['entry_window'], 40, bottom)
+            canvas.coords(header['slider_window'], 140, bottom)
+            state['layout'] = layout
+
+        fill_color = "gray35" if track is self.selected_track else "gray25"
+        if state.get('fill') != fill_color:
+            canvas.itemconfigure(header['rect'], fill=fill_color)
+            state['fill'] = fill_color
+
+        if state.get('name') != track["name"]:
+            canvas.itemconfigure(header['name'], text=track["name"])
+            state['name'] = track["name"]
+
+        solo = track.get("solo", False)
+        if state.get('solo') != solo:
+            header['solo'].configure(fg_color="green" if solo else "gray50")
+            state['solo'] = solo
+
+        mute = track.get("mute", False)
+        if state.get('mute') != mute:
+            header['mute'].configure(fg_color="red" if mute else "gray50")
+            state['mute'] = mute
+
+        # Volume controls only fit if the track is tall enough
+        show_volume = self.track_height >= self.min_track_height_for_slider
+        if state.get('show_volume') != show_volume:
+            item_state = "normal" if show_volume else "hidden"
+            canvas.itemconfigure(header['entry_window'], state=item_state)
+            canvas.itemconfigure(header['slider_window'], state=item_state)
+            state['show_volume'] = show_volume
+
+        volume_db = track.get("volume_db", 0.0)
+        if show_volume and state.get('volume_db') != volume_db:
+            header['slider'].set(volume_db)
+            header['entry'].delete(0, tk.END)
+            header['entry'].insert(0, self.format_db(volume_db))
+            state['volume_db'] = volume_db
+
+    def destroy_track_header(self, header):
+        for item in ('rect', 'name', 'solo_window', 'mute_window', 'entry_window', 'slider_window'):
+            self.track_label_canvas.delete(header[item])
+        for widget in ('solo', 'mute', 'entry', 'slider'):
+            header[widget].destroy()
 
     def handle_volume_entry(self, event, track):
         """Handle volume entry events"""
@@ -504,7 +681,10 @@ class TimelineView(ctk.CTkToplevel):
         """Update track volume with decibel value"""
         # Round to 0.1 dB precision
         db_value = round(float(value), 1)
-        track["volume_db"] = db_value
+        if self.controller:
+            self.controller.update_track_volume(track, db_value)
+        else:
+            track["volume_db"] = db_value
         
         # Update the volume entry if it exists
         track_index = self.tracks.index(track)
@@ -512,9 +692,6 @@ class TimelineView(ctk.CTkToplevel):
             entry = self.track_volume_vars[track_index]['entry']
             entry.delete(0, tk.END)
             entry.insert(0, self.format_db(db_value))
-        
-        if self.controller:
-            self.controller.update_track_volume(track)
 
     def update_single_track_label(self, track):
         track_index = self.tracks.index(track)
@@ -562,28 +739,20 @@ class TimelineView(ctk.CTkToplevel):
             self.select_track(self.tracks[0])
 
     def on_track_label_click(self, event):
-        track_index = int(event.y // self.track_height)
+        track_index = int(self.track_label_canvas.canvasy(event.y) // self.track_height)
         if 0 <= track_index < len(self.tracks):
             self.select_track(self.tracks[track_index])
 
     def select_track(self, track):
-        if self.selected_track:
-            self.timeline_canvas.delete("track_highlight")
         self.selected_track = track
         self.update_track_labels()
-        
-        track_index = self.tracks.index(track)
-        y1 = track_index * self.track_height
-        y2 = y1 + self.track_height
-        width = self.timeline_canvas.winfo_width()
-        self.timeline_canvas.create_rectangle(0, y1, width, y2, fill="gray40", outline="", tags="track_highlight")
-        self.timeline_canvas.tag_lower("track_highlight", "grid")
+        self.update_track_highlight()
 
     def start_rename_track(self, track):
         """Start track renaming"""
         try:
             track_index = self.tracks.index(track)
-            y = track_index * self.track_height - self.scroll_offset
+            y = track_index * self.track_height
             
             # Create and configure entry widget
             entry = ctk.CTkEntry(self.track_label_canvas, fg_color="gray35", text_color="white", border_width=0)
@@ -651,9 +820,10 @@ class TimelineView(ctk.CTkToplevel):
                 
                 # Update track name if changed
                 if new_name and new_name != track["name"]:
-                    track["name"] = new_name
                     if hasattr(self, 'rename_track_callback'):
                         self.rename_track_callback(track, new_name)
+                    else:
+                        track["name"] = new_name
                 
                 # Clean up rename data
                 delattr(self, 'current_rename_data')
@@ -705,7 +875,11 @@ class TimelineView(ctk.CTkToplevel):
 
     def handle_delete(self, event):
         if not self.is_renaming:
-            if self.selected_clip and self.controller:
+            if self.selected_clips and self.controller:
+                for clip in list(self.selected_clips):
+                    self.controller.delete_clip(clip)
+                self.set_selected_clips(())
+            elif self.selected_clip and self.controller:
                 self.controller.delete_clip(self.selected_clip)
             elif self.selected_track:
                 self.remove_track(self.selected_track)
@@ -732,7 +906,7 @@ class TimelineView(ctk.CTkToplevel):
         self.tracks.clear()
         self.selected_track = None
         self.update_track_labels()
-        self.draw_grid()
+        self.redraw_timeline()
 
     def set_rename_track_callback(self, callback):
         self.rename_track_callback = callback
@@ -760,6 +934,7 @@ class TimelineView(ctk.CTkToplevel):
         self.stop_button.configure(state="normal")
         self.restart_button.configure(state="normal")
         self.update_playhead_position(position)
+        self.playhead_driver.start()
         logging.info("Timeline playback started in view")
 
     def on_playback_stopped(self, position):
@@ -767,6 +942,7 @@ class TimelineView(ctk.CTkToplevel):
         self.play_button.configure(state="normal")
         self.stop_button.configure(state="disabled")
         self.restart_button.configure(state="normal")
+        self.playhead_driver.stop()
         self.update_playhead_position(position)
         # Cancel any pending playhead updates
         while self.after_ids:
@@ -817,10 +993,13 @@ class TimelineView(ctk.CTkToplevel):
 
     def draw_playhead(self, x):
         if self.timeline_canvas:
+            height = max(len(self.tracks) * self.track_height, self.timeline_canvas.winfo_height())
             if self.playhead_line:
-                self.timeline_canvas.delete(self.playhead_line)
-            height = self.timeline_canvas.winfo_height()
-            self.playhead_line = self.timeline_canvas.create_line(x, 0, x, height, fill="red", width=2)
+                # Layer order is restored by restack_canvas_items, so moving the line is all a frame costs
+                self.timeline_canvas.coords(self.playhead_line, x, 0, x, height)
+            else:
+                self.playhead_line = self.timeline_canvas.create_line(x, 0, x, height, fill="red", width=2, tags="playhead")
+                self.timeline_canvas.tag_raise(self.playhead_line)
 
     def on_canvas_click(self, event):
         x = self.timeline_canvas.canvasx(event.x)
@@ -835,6 +1014,8 @@ class TimelineView(ctk.CTkToplevel):
             self.drag_offset = x - (clicked_clip.x / self.seconds_per_pixel)
         else:
             self.deselect_clip()
+            # Dragging on empty space selects with a rubber band
+            self.rubber_band_start = (x, y)
 
     def option_key_press(self, event):
         self.option_key_pressed = True
@@ -858,6 +1039,7 @@ class TimelineView(ctk.CTkToplevel):
     def update_x_zoom(self, value):
         self.x_zoom = float(value)
         self.seconds_per_pixel = self.base_seconds_per_pixel / self.x_zoom
+        self.text_fit_cache.clear()
         self.update_scrollregion()
         self.redraw_timeline()
         self.draw_playhead(self.playhead_position / self.seconds_per_pixel)
@@ -888,8 +1070,9 @@ class TimelineView(ctk.CTkToplevel):
 
     def find_next_available_position(self, track_index, x_position):
         if track_index < len(self.tracks):
-            for clip in self.tracks[track_index]['clips']:
-                if clip.x <= x_position < clip.x + clip.duration:
+            track = self.tracks[track_index]
+            for clip in self.timeline_model.get_clips_at(track, x_position):
+                if x_position < clip.x + clip.duration:
                     x_position = clip.x + clip.duration
         return x_position
 
@@ -898,8 +1081,10 @@ class TimelineView(ctk.CTkToplevel):
 
     def add_clip(self, clip, track_index):
         if track_index < len(self.tracks):
-            self.tracks[track_index]['clips'].append(clip)
-            self.draw_clip(clip, track_index)
+            # The view shares its track list with the model, which already holds the clip
+            if clip not in self.tracks[track_index]['clips']:
+                self.tracks[track_index]['clips'].append(clip)
+            self.clip_hit_index.add(clip, track_index)
             self.redraw_timeline()
             self.update_timeline_duration()
             self.update_scrollregion()
@@ -907,21 +1092,84 @@ class TimelineView(ctk.CTkToplevel):
         else:
             logging.warning(f"Attempted to add clip to non-existent track {track_index}")
 
-    def _process_clip(self, clip, track_index):
-        try:
-            waveform_image = self.audio_visualizer.create_waveform_image(
-                clip.file_path, 
-                int(clip.duration / self.seconds_per_pixel), 
-                int(self.track_height)
-            )
-            if waveform_image:
-                self.waveform_cache[clip.file_path] = waveform_image
-                self.draw_clip(clip, track_index)
-                self.redraw_timeline()
-            else:
-                logging.warning(f"Failed to create waveform for {clip.file_path}")
-        except Exception as e:
-            logging.error(f"Error processing clip: {str(e)}", exc_info=True)
+    def draw_clip_waveform(self, items, clip, x, y, width):
+        """Show the waveform tiles of a clip that are near the viewport"""
+        start_x, end_x, _, _ = self.get_visible_region(margin=True)
+        height = int(self.track_height) - 2
+        tile_size = self.waveform_tile_width
+
+        first_tile = max(0, int((start_x - x) // tile_size))
+        last_tile = int((min(x + width, end_x) - x) // tile_size)
+        shown = set()
+        for tile_index in range(first_tile, last_tile + 1):
+            tile_x = tile_index * tile_size
+            tile_width = int(min(tile_size, width - tile_x))
+            if tile_width <= 0:
+                break
+            image = self.get_waveform_tile(clip.file_path, tile_index, tile_width, height)
+            if not image:
+                continue
+
+            shown.add(tile_index)
+            tile = items['tiles'].get(tile_index)
+            if tile is None:
+                tile = {'item': self.take_canvas_item("image"), 'image': None, 'position': None}
+                items['tiles'][tile_index] = tile
+            position = (x + tile_x, y + 1)
+            if tile['position'] != position:
+                self.timeline_canvas.coords(tile['item'], *position)
+                tile['position'] = position
+            if tile['image'] is not image:
+                self.timeline_canvas.itemconfigure(tile['item'], image=image)
+                tile['image'] = image
+
+        for tile_index in [index for index in items['tiles'] if index not in shown]:
+            self.release_canvas_item("image", items['tiles'].pop(tile_index)['item'])
+
+    def get_waveform_tile(self, file_path, tile_index, tile_width, height):
+        """Return a cached tile image, or request it from the waveform service"""
+        scale = (self.seconds_per_pixel, height)
+        service = WaveformService.get_instance()
+        if scale != self.waveform_cache_scale:
+            # Zoom changed; tiles at the old scale, rendered or in flight, are no longer needed
+            self.waveform_cache.clear()
+            self.waveform_cache_scale = scale
+            for owner in self.waveform_requests:
+                service.cancel(owner)
+            self.waveform_requests.clear()
+
+        key = (file_path, tile_index, tile_width)
+        if key in self.waveform_cache:
+            self.waveform_cache.move_to_end(key)
+            return self.waveform_cache[key]
+
+        owner = (id(self), scale, key)
+        if not service.is_pending(owner):
+            self.waveform_requests.add(owner)
+            start_time = tile_index * self.waveform_tile_width * self.seconds_per_pixel
+            end_time = start_time + tile_width * self.seconds_per_pixel
+            service.request(
+                owner, self,
+                lambda token: self.audio_visualizer.create_waveform_image(
+                    file_path, tile_width, height, start_time, end_time,
+                    background=(0, 0, 0, 0), peak_color=(30, 90, 160, 255), rms_color=(60, 130, 200, 255)),
+                lambda image: self.on_waveform_tile_rendered(owner, key, scale, image))
+        return None
+
+    def on_waveform_tile_rendered(self, owner, key, scale, image):
+        self.waveform_requests.discard(owner)
+        if scale != self.waveform_cache_scale:
+            return  # Rendered for a zoom level we've since left
+        self.waveform_cache[key] = ImageTk.PhotoImage(image) if image is not None else None
+        while len(self.waveform_cache) > self.max_waveform_tiles:
+            self.waveform_cache.popitem(last=False)
+        # Batch tiles that finish together into one redraw
+        if self.waveform_redraw_id is None:
+            self.waveform_redraw_id = self.after_idle(self._redraw_after_waveforms)
+
+    def _redraw_after_waveforms(self):
+        self.waveform_redraw_id = None
+        self.redraw_timeline()
 
     def _draw_clip_on_gui(self, clip, track_index):
         try:
@@ -934,58 +1182,67 @@ class TimelineView(ctk.CTkToplevel):
         self.add_clip_callback = callback
 
     def draw_clips(self):
-        visible_start_y = self.timeline_canvas.canvasy(0)
-        visible_end_y = self.timeline_canvas.canvasy(self.timeline_canvas.winfo_height())
-        start_track = max(0, int(visible_start_y // self.track_height))
-        end_track = min(len(self.tracks), int(visible_end_y // self.track_height) + 1)
-
-        for i in range(start_track, end_track):
-            track = self.tracks[i]
-            y = i * self.track_height - self.scroll_offset
-            for clip in track['clips']:
-                self.draw_clip(clip, y)
+        self.redraw_timeline()
 
-    def draw_clip(self, clip, y):
+    def draw_clip(self, clip, track_index):
+        """Create or update the canvas items of one clip"""
         x = clip.x / self.seconds_per_pixel
+        y = track_index * self.track_height
         width = clip.duration / self.seconds_per_pixel
-        fill_color = "blue" if clip == self.selected_clip else "lightblue"
-        
-        self.timeline_canvas.create_rectangle(x, y, x + width, y + self.track_height, 
-                                            fill=fill_color, outline="blue", tags="clip")
-        
-        # Get display text (prompt or title)
+
+        items = self.clip_items.get(clip)
+        if items is None:
+            items = {
+                'rect': self.take_canvas_item("rectangle"),
+                'text': self.take_canvas_item("text"),
+                'tiles': {},
+                'geometry': None,
+                'fill': None,
+                'label_key': None,
+            }
+            self.clip_items[clip] = items
+
+        geometry = (x, y, width, self.track_height)
+        if items['geometry'] != geometry:
+            self.timeline_canvas.coords(items['rect'], x, y, x + width, y + self.track_height)
+            self.timeline_canvas.coords(items['text'], x + 5, y + self.track_height / 2)
+            items['geometry'] = geometry
+
+        self.update_clip_style(clip)
+
+        # Get display text (prompt or title) and re-fit it only when it or the width changed
         display_text = clip.get_display_text()
-        
-        # Calculate available width for text
-        available_width = width - 10  # 5 pixels padding on each side
-        
-        # Create a temporary text item to measure text width
-        temp_text = self.timeline_canvas.create_text(0, 0, text=display_text, anchor="w")
-        text_bbox = self.timeline_canvas.bbox(temp_text)
-        self.timeline_canvas.delete(temp_text)
-        
-        if text_bbox:
-            text_width = text_bbox[2] - text_bbox[0]
-            
-            if text_width <= available_width:
-                # If the full text fits, display it all
-                final_text = display_text
-            else:
-                # If it doesn't fit, calculate how many characters we can display
-                char_width = text_width / len(display_text)
-                max_chars = int(available_width / char_width)
-                
-                # Only display text if we can fit at least 4 characters (3 for "..." and 1 for content)
-                if max_chars >= 4:
-                    final_text = display_text[:max_chars-3] + "..."
-                else:
-                    return  # Don't display any text if there's not enough space
-            
-            self.timeline_canvas.create_text(x + 5, y + self.track_height/2, 
-                                            text=final_text, 
-                                            anchor="w",
-                                            tags="clip")
-            
+        label_key = (display_text, width)
+        if items['label_key'] != label_key:
+            # 5 pixels padding on each side
+            final_text = self.fit_clip_label(display_text, width - 10)
+            self.timeline_canvas.itemconfigure(items['text'], text=final_text or "")
+            items['label_key'] = label_key
+
+        self.draw_clip_waveform(items, clip, x, y, width)
+
+    def set_clip_label_font(self, font):
+        self.clip_label_font = font
+        self.text_fit_cache.set_font(font)
+        for items in self.clip_items.values():
+            self.timeline_canvas.itemconfigure(items['text'], font=font)
+            items['label_key'] = None
+        self.redraw_timeline()
+
+    def update_clip_style(self, clip):
+        items = self.clip_items.get(clip) if clip is not None else None
+        if items is None:
+            return
+        selected = clip is self.selected_clip or clip in self.selected_clips
+        fill_color = "blue" if selected else "lightblue"
+        if items['fill'] != fill_color:
+            self.timeline_canvas.itemconfigure(items['rect'], fill=fill_color)
+            items['fill'] = fill_color
+
+    def fit_clip_label(self, display_text, available_width):
+        """Return the label text that fits ``available_width``, or None if nothing fits"""
+        return self.text_fit_cache.fit(display_text, available_width)
+
     def on_drag(self, event):
         if self.selected_clip:
             x = self.timeline_canvas.canvasx(event.x)
@@ -1004,8 +1261,29 @@ class TimelineView(ctk.CTkToplevel):
                 
                 if 0 <= new_track_index < len(self.tracks):
                     self.draw_dragged_clip(self.selected_clip, new_x, new_track_index)
+        elif self.rubber_band_start:
+            self.update_rubber_band(self.timeline_canvas.canvasx(event.x), self.timeline_canvas.canvasy(event.y))
+
+    def update_rubber_band(self, x, y):
+        start_x, start_y = self.rubber_band_start
+        if self.rubber_band_item is None:
+            self.rubber_band_item = self.timeline_canvas.create_rectangle(
+                start_x, start_y, x, y, outline="white", dash=(4, 2), tags="rubber_band")
+        else:
+            self.timeline_canvas.coords(self.rubber_band_item, start_x, start_y, x, y)
+        self.set_selected_clips(self.find_clips_in_rect(start_x, start_y, x, y))
+
+    def clear_rubber_band(self):
+        if self.rubber_band_item is not None:
+            self.timeline_canvas.delete(self.rubber_band_item)
+            self.rubber_band_item = None
+        self.rubber_band_start = None
 
     def on_drag_release(self, event):
+        if self.rubber_band_start:
+            self.clear_rubber_band()
+            return
+
         if self.dragging and self.selected_clip:
             x = self.timeline_canvas.canvasx(event.x)
             y = self.timeline_canvas.canvasy(event.y)
@@ -1015,78 +1293,84 @@ class TimelineView(ctk.CTkToplevel):
             if 0 <= new_track_index < len(self.tracks):
                 old_track_index = self.find_clip_track_index(self.selected_clip)
                 if old_track_index != -1:
+                    old_x = self.selected_clip.x
                     success = self.controller.move_clip(self.selected_clip, new_x, old_track_index, new_track_index)
                     if success:
-                        # Let the controller handle the clip movement
-                        pass
+                        self.clip_hit_index.move(self.selected_clip, old_x, new_track_index)
                     else:
                         print("Failed to move clip")
         
         self.dragging = False
         self.drag_offset = 0  # Reset the offset
+        self.clear_dragged_clip()
         self.redraw_timeline()
         self.update_timeline_duration()
         self.update_scrollregion()
                 
     def draw_dragged_clip(self, clip, new_x, new_track_index):
-        self.redraw_timeline()  # Redraw to clear the old position
         x = new_x / self.seconds_per_pixel
         y = new_track_index * self.track_height
         width = clip.duration / self.seconds_per_pixel
-        self.timeline_canvas.create_rectangle(x, y, x + width, y + self.track_height, 
-                                            fill="red", outline="red", tags="dragged_clip")
-        
-        # Get display text (prompt or title)
-        display_text = clip.get_display_text()
-        
-        # Calculate available width for text
-        available_width = width - 10  # 5 pixels padding on each side
-        
-        # Create a temporary text item to measure text width
-        temp_text = self.timeline_canvas.create_text(0, 0, text=display_text, anchor="w")
-        text_bbox = self.timeline_canvas.bbox(temp_text)
-        self.timeline_canvas.delete(temp_text)
-        
-        if text_bbox:
-            text_width = text_bbox[2] - text_bbox[0]
-            
-            if text_width <= available_width:
-                # If the full text fits, display it all
-                final_text = display_text
-            else:
-                # If it doesn't fit, calculate how many characters we can display
-                char_width = text_width / len(display_text)
-                max_chars = int(available_width / char_width)
-                
-                # Only display text if we can fit at least 4 characters (3 for "..." and 1 for content)
-                if max_chars >= 4:
-                    final_text = display_text[:max_chars-3] + "..."
-                else:
-                    return  # Don't display any text if there's not enough space
-            
-            self.timeline_canvas.create_text(x + 5, y + self.track_height/2, 
-                                            text=final_text, 
-                                            anchor="w",
-                                            tags="clip")
+
+        # Create the drag preview once, then only move it
+        if self.drag_items is None:
+            rect = self.timeline_canvas.create_rectangle(x, y, x + width, y + self.track_height,
+                                                         fill="red", outline="red", tags="dragged_clip")
+            text = self.timeline_canvas.create_text(x + 5, y + self.track_height / 2, anchor="w",
+                                                    text=self.fit_clip_label(clip.get_display_text(), width - 10) or "",
+                                                    font=self.clip_label_font, tags="dragged_clip")
+            self.drag_items = (rect, text)
+            self.timeline_canvas.tag_raise("playhead")
+        else:
+            rect, text = self.drag_items
+            self.timeline_canvas.coords(rect, x, y, x + width, y + self.track_height)
+            self.timeline_canvas.coords(text, x + 5, y + self.track_height / 2)
+
+    def clear_dragged_clip(self):
+        self.timeline_canvas.delete("dragged_clip")
+        self.drag_items = None
         
+    def get_clip_hit_index(self):
+        """Return the hit-test index, rebuilding it if the tracks were edited behind its back"""
+        if self.clip_hit_index.is_stale(self.tracks):
+            self.clip_hit_index.rebuild(self.tracks)
+        return self.clip_hit_index
+
+    def invalidate_clip_hit_index(self):
+        self.clip_hit_index.invalidate()
+
     def find_clip_at_position(self, x, y):
-        for track_index, track in enumerate(self.tracks):
-            for clip in track['clips']:
-                clip_x = clip.x / self.seconds_per_pixel
-                clip_width = clip.duration / self.seconds_per_pixel
-                clip_y = track_index * self.track_height
-                if clip_x <= x <= clip_x + clip_width and clip_y <= y < clip_y + self.track_height:
-                    return clip
-        return None
+        if y < 0:
+            return None
+        return self.get_clip_hit_index().clip_at(int(y // self.track_height), x * self.seconds_per_pixel)
+
+    def find_clips_in_rect(self, x1, y1, x2, y2):
+        """Return the clips overlapping a canvas rectangle"""
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        return self.get_clip_hit_index().clips_in_rect(int(y1 // self.track_height), int(y2 // self.track_height),
+                                                       x1 * self.seconds_per_pixel, x2 * self.seconds_per_pixel)
 
     def select_clip(self, clip):
-        self.deselect_clip()
+        previous_clip = self.selected_clip
         self.selected_clip = clip
-        self.redraw_timeline()
+        self.set_selected_clips(())
+        self.update_clip_style(previous_clip)
+        self.update_clip_style(clip)
 
     def deselect_clip(self):
+        previous_clip = self.selected_clip
         self.selected_clip = None
-        self.redraw_timeline()
+        self.set_selected_clips(())
+        self.update_clip_style(previous_clip)
+
+    def set_selected_clips(self, clips):
+        """Replace the multi-selection, restyling only the clips whose state changed"""
+        clips = set(clips)
+        changed = clips ^ self.selected_clips
+        self.selected_clips = clips
+        for clip in changed:
+            self.update_clip_style(clip)
 
     def delete_selected_clip(self, event=None):
         if self.selected_clip and self.controller:
@@ -1098,23 +1382,21 @@ class TimelineView(ctk.CTkToplevel):
             return
             
         try:
-            # Read the audio file's metadata
-            audio = MP3(self.selected_clip.file_path, ID3=ID3)
-            if not audio.tags:
+            # Read the audio file's metadata from the project's media index
+            metadata = self.project_model.media_index.get(self.selected_clip.file_path)
+            comments = metadata['comments']
+            if not metadata['title'] and not comments:
                 messagebox.showerror("Error", "No metadata found in audio file")
                 return
 
             # Get the title to determine the type of audio
-            title = audio.tags.getall('TIT2')[0].text[0] if audio.tags.getall('TIT2') else None
+            title = metadata['title']
             
             # Get audio generator view
             audio_generator_view = self.controller.master_controller.audio_controller.view
             
             # Get the prompt from metadata
-            prompt = None
-            for comment in audio.tags.getall('COMM'):
-                if comment.desc == 'Prompt':
-                    prompt = comment.text[0] if isinstance(comment.text, list) else comment.text
+            prompt = comments.get('Prompt')
 
             if not prompt:
                 messagebox.showerror("Error", "Prompt not found in audio file")
@@ -1122,10 +1404,7 @@ class TimelineView(ctk.CTkToplevel):
 
             if title == "Generated Speech":
                 # Existing speech regeneration logic
-                voice_id = None
-                for comment in audio.tags.getall('COMM'):
-                    if comment.desc == 'VoiceID':
-                        voice_id = comment.text[0] if isinstance(comment.text, list) else comment.text
+                voice_id = comments.get('VoiceID')
                 
                 if not voice_id:
                     messagebox.showerror("Error", "VoiceID not found in audio file")
@@ -1137,8 +1416,8 @@ class TimelineView(ctk.CTkToplevel):
                 audio_generator_view.user_input.delete("1.0", "end")
                 audio_generator_view.user_input.insert("1.0", prompt)
                 
-                user_voices = self.controller.master_controller.audio_controller.speech_service.get_user_voices()
-                voice_name = next((name for name, id in user_voices if id == voice_id), None)
+                voice_catalog = self.controller.master_controller.audio_controller.speech_service.voice_catalog
+                voice_name = voice_catalog.get_voice_name(voice_id)
                 
                 if voice_name:
                     audio_generator_view.selected_voice.set(voice_name)
@@ -1148,10 +1427,8 @@ class TimelineView(ctk.CTkToplevel):
 
             elif title == "Generated Music":
                 # Music regeneration logic
-                is_instrumental = None
-                for comment in audio.tags.getall('COMM'):
-                    if comment.desc == 'Type':
-                        is_instrumental = comment.text[0] == "Instrumental" if isinstance(comment.text, list) else comment.text == "Instrumental"
+                music_type = comments.get('Type')
+                is_instrumental = music_type == "Instrumental" if music_type is not None else None
                 
                 if is_instrumental is None:
                     messagebox.showerror("Error", "Instrumental/Vocals setting not found in audio file metadata")
@@ -1165,10 +1442,9 @@ class TimelineView(ctk.CTkToplevel):
 
             elif title == "Generated SFX":
                 # SFX regeneration logic
-                duration = None
-                for comment in audio.tags.getall('COMM'):
-                    if comment.desc == 'Duration':
-                        duration = comment.text[0].rstrip('s') if isinstance(comment.text, list) else comment.text.rstrip('s')
+                duration = comments.get('Duration')
+                if duration is not None:
+                    duration = duration.rstrip('s')
                 
                 if duration is None:
                     messagebox.showerror("Error", "Duration setting not found in audio file metadata")
@@ -1189,10 +1465,7 @@ class TimelineView(ctk.CTkToplevel):
             messagebox.showerror("Error", f"Failed to regenerate clip: {str(e)}")
 
     def find_clip_track_index(self, clip):
-        for i, track in enumerate(self.tracks):
-            if clip in track['clips']:
-                return i
-        return -1
+        return self.get_clip_hit_index().row_of(clip)
 
     def show_clip_context_menu(self, event):
         x = self.timeline_canvas.canvasx(event.x)
@@ -1207,10 +1480,13 @@ class TimelineView(ctk.CTkToplevel):
             context_menu.tk_popup(event.x_root, event.y_root)
 
     def remove_clip(self, clip):
-        for track in self.tracks:
-            if clip in track['clips']:
-                track['clips'].remove(clip)
-                break
+        track_index = self.find_clip_track_index(clip)
+        if track_index != -1 and clip in self.tracks[track_index]['clips']:
+            self.tracks[track_index]['clips'].remove(clip)
+        self.clip_hit_index.remove(clip)
+        self.selected_clips.discard(clip)
+        if clip is self.selected_clip:
+            self.selected_clip = None
         self.redraw_timeline()
         self.update_timeline_duration()
         self.update_scrollregion()
@@ -1237,15 +1513,21 @@ class TimelineView(ctk.CTkToplevel):
         self.progress_bar.grid_remove()
  
     def select_multiple_clips(self, event):
+        """Shift-click toggles a clip in the multi-selection"""
         x = self.timeline_canvas.canvasx(event.x)
         y = self.timeline_canvas.canvasy(event.y)
         clicked_clip = self.find_clip_at_position(x, y)
         if clicked_clip:
-            if clicked_clip not in self.selected_clips:
-                self.selected_clips.append(clicked_clip)
-            else:
-                self.selected_clips.remove(clicked_clip)
-            self.redraw_timeline()
+            clips = set(self.selected_clips)
+            # A single-selected clip joins the multi-selection
+            previous_clip = self.selected_clip
+            if previous_clip is not None:
+                clips.add(previous_clip)
+                self.selected_clip = None
+            clips ^= {clicked_clip}
+            self.set_selected_clips(clips)
+            self.update_clip_style(previous_clip)
+        return "break"
 
     def set_keyboard_shortcuts_enabled(self, enabled):
         """Enable or disable keyboard shortcuts"""